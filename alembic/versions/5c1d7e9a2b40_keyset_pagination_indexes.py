@@ -0,0 +1,46 @@
+"""keyset pagination indexes
+
+Revision ID: 5c1d7e9a2b40
+Revises: 21e35aa7568b
+Create Date: 2026-10-18 09:12:44.318201
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5c1d7e9a2b40"
+down_revision: str | Sequence[str] | None = "21e35aa7568b"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_items_name_id", "items", ["name", "id"], unique=False)
+    op.create_index(
+        "ix_items_price_cents_id", "items", ["price_cents", "id"], unique=False
+    )
+    op.create_index(
+        "ix_restaurants_name_id", "restaurants", ["name", "id"], unique=False
+    )
+    op.create_index(
+        "ix_orders_created_at_id", "orders", ["created_at", "id"], unique=False
+    )
+    op.create_index(
+        "ix_orders_customer_id_created_at_id",
+        "orders",
+        ["customer_id", "created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_orders_customer_id_created_at_id", table_name="orders")
+    op.drop_index("ix_orders_created_at_id", table_name="orders")
+    op.drop_index("ix_restaurants_name_id", table_name="restaurants")
+    op.drop_index("ix_items_price_cents_id", table_name="items")
+    op.drop_index("ix_items_name_id", table_name="items")
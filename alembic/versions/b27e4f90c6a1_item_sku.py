@@ -0,0 +1,33 @@
+"""item sku
+
+Revision ID: b27e4f90c6a1
+Revises: 8f3a61c4d2e7
+Create Date: 2026-10-18 13:05:22.904117
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b27e4f90c6a1"
+down_revision: str | Sequence[str] | None = "8f3a61c4d2e7"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("items", sa.Column("sku", sa.String(), nullable=True))
+    op.create_unique_constraint(
+        "uq_items_restaurant_id_sku", "items", ["restaurant_id", "sku"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("uq_items_restaurant_id_sku", "items", type_="unique")
+    op.drop_column("items", "sku")
@@ -0,0 +1,83 @@
+"""courier dispatch locations
+
+Revision ID: d41c8e2f7a93
+Revises: b27e4f90c6a1
+Create Date: 2026-10-18 15:12:40.318664
+
+"""
+
+from collections.abc import Sequence
+
+import geoalchemy2
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d41c8e2f7a93"
+down_revision: str | Sequence[str] | None = "b27e4f90c6a1"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+
+    op.add_column(
+        "restaurants",
+        sa.Column(
+            "location",
+            geoalchemy2.Geometry("POINT", srid=4326, spatial_index=False),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_restaurants_location",
+        "restaurants",
+        ["location"],
+        unique=False,
+        postgresql_using="gist",
+    )
+
+    op.create_table(
+        "courier_locations",
+        sa.Column("courier_id", sa.UUID(), nullable=False),
+        sa.Column(
+            "location",
+            geoalchemy2.Geometry("POINT", srid=4326, spatial_index=False),
+            nullable=False,
+        ),
+        sa.Column("is_available", sa.Boolean(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["courier_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("courier_id"),
+    )
+    op.create_index(
+        "ix_courier_locations_location",
+        "courier_locations",
+        ["location"],
+        unique=False,
+        postgresql_using="gist",
+    )
+
+    op.create_index(
+        "ix_courier_assignments_courier_id",
+        "courier_assignments",
+        ["courier_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_courier_assignments_courier_id", table_name="courier_assignments")
+    op.drop_index("ix_courier_locations_location", table_name="courier_locations")
+    op.drop_table("courier_locations")
+    op.drop_index("ix_restaurants_location", table_name="restaurants")
+    op.drop_column("restaurants", "location")
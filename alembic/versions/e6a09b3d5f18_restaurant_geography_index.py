@@ -0,0 +1,48 @@
+"""restaurant geography index
+
+Revision ID: e6a09b3d5f18
+Revises: d41c8e2f7a93
+Create Date: 2026-10-18 16:40:07.551902
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e6a09b3d5f18"
+down_revision: str | Sequence[str] | None = "d41c8e2f7a93"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Free-text addresses are never searched by equality or prefix.
+    op.drop_index("ix_restaurant_address", table_name="restaurants")
+
+    op.drop_index("ix_restaurants_location", table_name="restaurants")
+    op.create_index(
+        "ix_restaurants_location",
+        "restaurants",
+        [sa.text("geography(location)")],
+        unique=False,
+        postgresql_using="gist",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_restaurants_location", table_name="restaurants")
+    op.create_index(
+        "ix_restaurants_location",
+        "restaurants",
+        ["location"],
+        unique=False,
+        postgresql_using="gist",
+    )
+
+    op.create_index("ix_restaurant_address", "restaurants", ["address"], unique=False)
@@ -0,0 +1,432 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from datetime import datetime
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.models import User, UserRole
+from app.settings import (
+    CACHE_REDIS_URL,
+    MENU_CACHE_MAX_BYTES,
+    MENU_CACHE_TTL,
+    PRINCIPAL_CACHE_SIZE,
+    PRINCIPAL_CACHE_TTL,
+)
+
+logger = logging.getLogger(__name__)
+
+redis_client = Redis.from_url(CACHE_REDIS_URL) if CACHE_REDIS_URL else None
+
+INVALIDATIONS_CHANNEL = "quickbite:cache:invalidations"
+
+
+class TTLCache:
+    """In-process LRU cache whose entries also expire after ``ttl`` seconds.
+
+    Bounded by entry count and, when ``maxbytes`` is given, by the summed
+    ``weigh(value)`` of its entries. Not thread safe; meant to be used from
+    the event loop only.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        maxbytes: int | None = None,
+        weigh: Callable[[Any], int] = len,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.weigh = weigh
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def _pop(self, key: Hashable) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None and self.maxbytes is not None:
+            self.nbytes -= self.weigh(entry[1])
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._pop(key)
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._pop(key)
+        if self.maxbytes is not None:
+            size = self.weigh(value)
+            if size > self.maxbytes:
+                return
+            self.nbytes += size
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        while len(self._data) > self.maxsize or (
+            self.maxbytes is not None and self.nbytes > self.maxbytes
+        ):
+            self._pop(next(iter(self._data)))
+
+    def delete(self, key: Hashable) -> None:
+        self._pop(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        stats = {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+        if self.maxbytes is not None:
+            stats["bytes"] = self.nbytes
+            stats["maxbytes"] = self.maxbytes
+        return stats
+
+
+# hashed_pw is deliberately left out; it is expired on cached principals and
+# loaded explicitly by the few endpoints that need it.
+_PRINCIPAL_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "phone",
+    "address",
+    "role",
+    "is_active",
+    "is_verified",
+    "is_superuser",
+    "created_at",
+    "updated_at",
+)
+
+
+def _dump_principal(user: User) -> dict:
+    data = {field: getattr(user, field) for field in _PRINCIPAL_FIELDS}
+    data["id"] = str(user.id)
+    data["role"] = user.role.value
+    for field in ("created_at", "updated_at"):
+        if data[field] is not None:
+            data[field] = data[field].isoformat()
+    return data
+
+
+def _load_principal(data: dict) -> User:
+    fields = dict(data)
+    fields["id"] = uuid.UUID(fields["id"])
+    fields["role"] = UserRole(fields["role"])
+    for field in ("created_at", "updated_at"):
+        if fields[field] is not None:
+            fields[field] = datetime.fromisoformat(fields[field])
+    return User(**fields)
+
+
+class PrincipalCache:
+    """Cache of authenticated users keyed by e-mail (the JWT identity).
+
+    Lookups go local LRU -> Redis (when configured) -> database. Local entries
+    live for ``ttl`` seconds; invalidations reach the other workers' local
+    tiers through :class:`CacheInvalidations`, with the TTL as the bound if
+    a message is lost. As with :class:`MenuCache`, take ``generation`` before
+    loading a user from the database and pass it to :meth:`set`, so a load
+    racing an invalidation does not cache the user it just replaced.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, redis: Redis | None = None):
+        self.local = TTLCache(maxsize, ttl)
+        self.redis = redis
+        self.redis_hits = 0
+        self.redis_errors = 0
+        self.generation = 0
+
+    @staticmethod
+    def _redis_key(email: str) -> str:
+        return f"quickbite:principal:{email}"
+
+    async def get(self, email: str) -> dict | None:
+        data = self.local.get(email)
+        if data is not None or self.redis is None:
+            return data
+
+        try:
+            raw = await self.redis.get(self._redis_key(email))
+        except RedisError as e:
+            self.redis_errors += 1
+            logger.warning("principal cache: redis get failed: %s", e)
+            return None
+        if raw is None:
+            return None
+
+        self.redis_hits += 1
+        data = json.loads(raw)
+        self.local.set(email, data)
+        return data
+
+    async def set(self, user: User, generation: int) -> None:
+        if generation != self.generation:
+            return
+
+        data = _dump_principal(user)
+        self.local.set(user.email, data)
+        if self.redis is None:
+            return
+
+        try:
+            await self.redis.set(
+                self._redis_key(user.email),
+                json.dumps(data),
+                px=max(1, math.ceil(self.local.ttl * 1000)),
+            )
+        except RedisError as e:
+            self.redis_errors += 1
+            logger.warning("principal cache: redis set failed: %s", e)
+
+    def forget(self, email: str | None) -> None:
+        """Drop ``email``, or everyone if None, from this worker's tier only."""
+        self.generation += 1
+        if email is None:
+            self.local.clear()
+        else:
+            self.local.delete(email)
+
+    async def invalidate(self, *emails: str) -> None:
+        for email in emails:
+            self.forget(email)
+        if self.redis is None or not emails:
+            return
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.delete(*(self._redis_key(email) for email in emails))
+                for email in emails:
+                    pipe.publish(INVALIDATIONS_CHANNEL, f"principal {email}")
+                await pipe.execute()
+        except RedisError as e:
+            self.redis_errors += 1
+            logger.warning("principal cache: redis invalidate failed: %s", e)
+
+    @staticmethod
+    async def attach(db: AsyncSession, data: dict) -> User:
+        """Turn a cached snapshot into a persistent User on ``db`` without a query."""
+        user = _load_principal(data)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    def stats(self) -> dict:
+        local = self.local.stats()
+        return {
+            "size": local["size"],
+            "maxsize": local["maxsize"],
+            "local_hits": local["hits"],
+            "redis_hits": self.redis_hits,
+            "misses": local["misses"] - self.redis_hits,
+            "redis_errors": self.redis_errors,
+        }
+
+
+principal_cache = PrincipalCache(
+    maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL, redis=redis_client
+)
+
+
+class CacheInvalidations:
+    """Drops invalidated keys from every worker's local cache tier.
+
+    A cache publishes ``"<name> <key>"`` on :data:`INVALIDATIONS_CHANNEL`
+    when it invalidates a key; each worker's listener hands the key to the
+    callback registered under ``name``. After (re)subscribing, the callbacks
+    get ``None``, meaning "clear everything", since messages sent while the
+    listener was away are lost.
+    """
+
+    def __init__(self, redis: Redis | None):
+        self.redis = redis
+        self.received = 0
+        self.errors = 0
+        self._handlers: dict[str, Callable[[str | None], None]] = {}
+        self._task: asyncio.Task | None = None
+
+    def register(self, name: str, drop: Callable[[str | None], None]) -> None:
+        self._handlers[name] = drop
+
+    def _apply(self, message: str) -> None:
+        name, _, key = message.partition(" ")
+        drop = self._handlers.get(name)
+        if drop is not None:
+            self.received += 1
+            drop(key)
+
+    async def _run(self) -> None:
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(INVALIDATIONS_CHANNEL)
+                for drop in self._handlers.values():
+                    drop(None)
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._apply(message["data"].decode())
+            except RedisError as e:
+                self.errors += 1
+                logger.warning(
+                    "cache invalidations: redis listener error, retrying: %s", e
+                )
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def start(self) -> None:
+        if self.redis is not None and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+cache_invalidations = CacheInvalidations(redis_client)
+cache_invalidations.register("principal", principal_cache.forget)
+
+
+class MenuCache:
+    """Pre-serialized menu payloads keyed by restaurant id.
+
+    Stores ``(etag, body)`` in a byte-bounded local LRU with a Redis tier
+    behind it; invalidations reach the other workers' local tiers through
+    :class:`CacheInvalidations`. ``generation`` guards against caching a
+    payload that was read before a concurrent invalidation, here or in
+    another worker: take it before querying and pass it to :meth:`set`.
+    """
+
+    def __init__(self, maxbytes: int, ttl: float, redis: Redis | None = None):
+        self.local = TTLCache(
+            maxsize=maxbytes, ttl=ttl, maxbytes=maxbytes, weigh=lambda v: len(v[1])
+        )
+        self.redis = redis
+        self.redis_hits = 0
+        self.redis_errors = 0
+        self.generation = 0
+
+    @staticmethod
+    def _redis_key(restaurant_id) -> str:
+        return f"quickbite:menu:{restaurant_id}"
+
+    @staticmethod
+    def etag(body: bytes) -> str:
+        return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+    async def get(self, restaurant_id) -> tuple[str, bytes] | None:
+        key = str(restaurant_id)
+        entry = self.local.get(key)
+        if entry is not None or self.redis is None:
+            return entry
+
+        try:
+            body = await self.redis.get(self._redis_key(key))
+        except RedisError as e:
+            self.redis_errors += 1
+            logger.warning("menu cache: redis get failed: %s", e)
+            return None
+        if body is None:
+            return None
+
+        self.redis_hits += 1
+        entry = (self.etag(body), body)
+        self.local.set(key, entry)
+        return entry
+
+    async def set(
+        self, restaurant_id, body: bytes, generation: int
+    ) -> tuple[str, bytes]:
+        entry = (self.etag(body), body)
+        if generation != self.generation:
+            return entry
+
+        key = str(restaurant_id)
+        self.local.set(key, entry)
+        if self.redis is not None:
+            try:
+                await self.redis.set(
+                    self._redis_key(key),
+                    body,
+                    px=max(1, math.ceil(self.local.ttl * 1000)),
+                )
+            except RedisError as e:
+                self.redis_errors += 1
+                logger.warning("menu cache: redis set failed: %s", e)
+        return entry
+
+    def forget(self, key: str | None) -> None:
+        """Drop ``key``, or every key if None, from this worker's tier only."""
+        self.generation += 1
+        if key is None:
+            self.local.clear()
+        else:
+            self.local.delete(key)
+
+    async def invalidate(self, restaurant_id) -> None:
+        key = str(restaurant_id)
+        self.forget(key)
+        if self.redis is None:
+            return
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.delete(self._redis_key(key))
+                pipe.publish(INVALIDATIONS_CHANNEL, f"menu {key}")
+                await pipe.execute()
+        except RedisError as e:
+            self.redis_errors += 1
+            logger.warning("menu cache: redis invalidate failed: %s", e)
+
+    def stats(self) -> dict:
+        local = self.local.stats()
+        return {
+            "size": local["size"],
+            "bytes": local["bytes"],
+            "maxbytes": local["maxbytes"],
+            "local_hits": local["hits"],
+            "redis_hits": self.redis_hits,
+            "misses": local["misses"] - self.redis_hits,
+            "redis_errors": self.redis_errors,
+        }
+
+
+menu_cache = MenuCache(
+    maxbytes=MENU_CACHE_MAX_BYTES, ttl=MENU_CACHE_TTL, redis=redis_client
+)
+cache_invalidations.register("menu", menu_cache.forget)
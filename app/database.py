@@ -1,14 +1,83 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
-from app.settings import DB_HOST, DB_NAME, DB_PASSWORD, DB_PORT, DB_USER
+from app import metrics, profiling
+from app.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+from app.replicas import ReplicaSet
+from app.settings import (
+    DB_ECHO,
+    DB_HOST,
+    DB_MAX_OVERFLOW,
+    DB_NAME,
+    DB_PASSWORD,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_PORT,
+    DB_REPLICA_CHECK_INTERVAL,
+    DB_REPLICA_MAX_LAG_SECONDS,
+    DB_REPLICA_URLS,
+    DB_USER,
+    METRICS_ENABLED,
+    QUERY_PROFILING,
+)
 
 DB_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+ASYNC_DB_URL = (
+    f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
 
-engine = create_engine(DB_URL, echo=True)
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+engine = create_engine(
+    DB_URL, echo=DB_ECHO, poolclass=InstrumentedQueuePool, **POOL_OPTIONS
+)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    ASYNC_DB_URL, echo=DB_ECHO, poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS
+)
+
+# expire_on_commit=False: attribute access after commit would otherwise
+# trigger implicit IO, which AsyncSession cannot do.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+# Read-only traffic. Sessions are bound per request to whichever replica
+# read_replicas picks, falling back to async_engine.
+read_replicas = ReplicaSet(
+    [
+        create_async_engine(
+            url, echo=DB_ECHO, poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS
+        )
+        for url in DB_REPLICA_URLS
+    ],
+    max_lag_seconds=DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=DB_REPLICA_CHECK_INTERVAL,
+)
+
+for _engine in (
+    engine,
+    *(
+        e.sync_engine
+        for e in (async_engine, *(r.engine for r in read_replicas.replicas))
+    ),
+):
+    if METRICS_ENABLED:
+        metrics.instrument_engine(_engine)
+    if QUERY_PROFILING:
+        profiling.instrument_engine(_engine)
+
 
 class Base(DeclarativeBase):
     pass
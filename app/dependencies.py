@@ -1,4 +1,6 @@
-from typing import Annotated
+import uuid
+from datetime import datetime
+from typing import Annotated, Literal
 
 from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import (
@@ -7,11 +9,16 @@ from fastapi.security import (
 )
 from jose import JWTError, jwt
 from jose.exceptions import ExpiredSignatureError
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute, Session
 
-from app.database import SessionLocal
+from app.cache import principal_cache
+from app.database import AsyncSessionLocal, SessionLocal, read_replicas
 from app.models import User
+from app.revocation import token_revocation
 from app.settings import ALGORITHM, SECRET_KEY
+from app.utils import decode_cursor, encode_cursor
 
 # oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 # oauth2_dep = Annotated[str, Depends(oauth2_scheme)]
@@ -29,46 +36,186 @@ def get_db_session():
 db_dep = Annotated[Session, Depends(get_db_session)]
 
 
+async def get_async_db_session():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async_db_dep = Annotated[AsyncSession, Depends(get_async_db_session)]
+
+
+async def open_read_session() -> AsyncSession:
+    """New session on a healthy replica if one exists, else on the primary."""
+    replica = read_replicas.choose()
+    if replica is None:
+        return AsyncSessionLocal()
+    return AsyncSessionLocal(bind=replica)
+
+
+async def get_read_db_session():
+    """Session for read-only endpoints; uses a healthy replica if one exists."""
+    async with await open_read_session() as db:
+        yield db
+
+
+db_read_dep = Annotated[AsyncSession, Depends(get_read_db_session)]
+
+
 class Pagination:
+    """Keyset pagination over ``(sort_key, id)`` with signed, opaque cursors.
+
+    Each endpoint passes its own allow-list of sortable columns; every entry
+    must be backed by an index on ``(column, id)`` so that any page, however
+    deep, is a single index range scan.
+    """
+
     def __init__(
         self,
-        q: str | None = Query(None, description="Search query"),
-        offset: int = Query(0, ge=0, description="Number of items to skip"),
-        limit: int = Query(100, ge=1, le=100, description="Number of items to return"),
+        cursor: str | None = Query(
+            None, description="next_cursor/prev_cursor of a previous page"
+        ),
+        limit: int = Query(20, ge=1, le=100, description="Number of items to return"),
+        sort_by: str | None = Query(None, description="Column to sort by"),
+        sort_order: Literal["asc", "desc"] | None = Query(None),
     ):
-        self.q = q
-        self.offset = offset
+        self.cursor = cursor
         self.limit = limit
+        self.sort_by = sort_by
+        self.sort_order = sort_order
+
+    @staticmethod
+    def _dump_value(value):
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def _load_value(column, value):
+        python_type = column.type.python_type
+        if python_type is uuid.UUID:
+            return uuid.UUID(value)
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        return value
+
+    async def paginate(
+        self,
+        db: AsyncSession,
+        query: Select,
+        sortable: dict[str, InstrumentedAttribute],
+        default_sort: str = "id",
+        default_order: str = "asc",
+        scalars: bool = True,
+    ) -> dict:
+        """Run ``query`` for one page; returns ``items``, ``next_cursor``, ``prev_cursor``.
+
+        Items are ORM objects, or with ``scalars=False`` the result rows of a
+        column select, which must include every column in ``sortable``.
+        """
+        sort_by = self.sort_by or default_sort
+        sort_order = self.sort_order or default_order
+        if sort_by not in sortable:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"sort_by must be one of: {', '.join(sortable)}",
+            )
+
+        id_column = sortable["id"]
+        columns = (
+            [sortable[sort_by]] if sort_by == "id" else [sortable[sort_by], id_column]
+        )
+        key = tuple_(*columns) if len(columns) > 1 else columns[0]
+
+        data = None
+        if self.cursor:
+            data = decode_cursor(self.cursor)
+            if not data or data.get("s") != sort_by or data.get("o") != sort_order:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+                )
+
+        # A "prev" cursor walks the index the other way, then flips the page.
+        backwards = data is not None and data["d"] == "prev"
+        ascending_scan = (sort_order == "asc") != backwards
+        if data is not None:
+            values = [
+                self._load_value(c, v) for c, v in zip(columns, data["v"], strict=True)
+            ]
+            bound = tuple_(*values) if len(values) > 1 else values[0]
+            query = query.where(key > bound if ascending_scan else key < bound)
+
+        query = query.order_by(
+            *(c.asc() if ascending_scan else c.desc() for c in columns)
+        ).limit(self.limit + 1)
+
+        result = await db.execute(query)
+        rows = list(result.scalars().all() if scalars else result.all())
+        has_more = len(rows) > self.limit
+        rows = rows[: self.limit]
+        if backwards:
+            rows.reverse()
+
+        def cursor_for(row, direction: str) -> str:
+            return encode_cursor(
+                {
+                    "s": sort_by,
+                    "o": sort_order,
+                    "d": direction,
+                    "v": [self._dump_value(getattr(row, c.key)) for c in columns],
+                }
+            )
+
+        has_next = has_more if not backwards else True
+        has_prev = has_more if backwards else bool(self.cursor)
+        return {
+            "items": rows,
+            "next_cursor": cursor_for(rows[-1], "next") if rows and has_next else None,
+            "prev_cursor": cursor_for(rows[0], "prev") if rows and has_prev else None,
+        }
 
 
 PaginationDep = Annotated[Pagination, Depends()]
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(dbearer_scheme),
-    db: Session = Depends(get_db_session),
-):
+async def load_principal(db: AsyncSession, email: str) -> User | None:
+    """The user behind a token's ``email``, from the principal cache if possible."""
+    cached = await principal_cache.get(email)
+    if cached is not None:
+        return await principal_cache.attach(db, cached)
+
+    generation = principal_cache.generation
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
+    if user is not None:
+        await principal_cache.set(user, generation)
+    return user
+
+
+async def authenticate_token(token: str | None, db: AsyncSession) -> User:
+    """The active, verified user an access token belongs to; 401/400/403 otherwise."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    if not credentials or not credentials.credentials:
+    if not token:
         raise credentials_exception
 
-    token = credentials.credentials
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("email")
-        if not email:
+        # Tokens issued before jti/type existed carry neither.
+        if not email or payload.get("type", "access") != "access":
             raise credentials_exception
     except ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has expired",
             headers={"WWW-Authenticate": "Bearer"},
-        )
+        ) from None
     except JWTError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -76,7 +223,14 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         ) from e
 
-    user = db.query(User).filter(User.email == email).first()
+    if await token_revocation.is_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    user = await load_principal(db, email)
     if user is None:
         raise credentials_exception
 
@@ -94,4 +248,23 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(dbearer_scheme),
+    db: AsyncSession = Depends(get_async_db_session),
+):
+    return await authenticate_token(credentials and credentials.credentials, db)
+
+
+async def get_current_user_read(
+    credentials: HTTPAuthorizationCredentials = Depends(dbearer_scheme),
+    db: AsyncSession = Depends(get_read_db_session),
+):
+    """Like get_current_user, but loaded through the read session.
+
+    Only for endpoints that never write the user back.
+    """
+    return await authenticate_token(credentials and credentials.credentials, db)
+
+
 current_user_dep = Annotated[User, Depends(get_current_user)]
+current_user_read_dep = Annotated[User, Depends(get_current_user_read)]
@@ -0,0 +1,384 @@
+import asyncio
+import logging
+import time
+from collections.abc import Sequence
+from datetime import timedelta
+from uuid import UUID
+
+import numpy as np
+import shapely
+from sqlalchemy import bindparam, exists, func, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.database import AsyncSessionLocal
+from app.events import publish_order_event
+from app.geo import SRID, degrees_for, haversine, project
+from app.models import (
+    CourierAssignment,
+    CourierLocation,
+    Order,
+    OrderStatus,
+    Restaurant,
+    User,
+    UserRole,
+)
+from app.settings import (
+    DISPATCH_BATCH_SIZE,
+    DISPATCH_COURIER_STALE_SECONDS,
+    DISPATCH_INTERVAL_SECONDS,
+    DISPATCH_MAX_DISTANCE_METERS,
+)
+
+logger = logging.getLogger(__name__)
+
+# pg advisory lock held for the length of a tick, so that with several API
+# workers only one of them dispatches at a time.
+DISPATCH_LOCK_KEY = 7_315_002
+
+# A courier with an assignment on an order in one of these states is busy.
+BUSY_STATUSES = (OrderStatus.READY, OrderStatus.PICKED_UP)
+
+Point = tuple[UUID, float, float]
+
+
+# Orders are matched per cell of this many degrees, each cell in its own
+# projection and with its own courier bounding box, so a batch spanning
+# several cities is neither distorted nor padded into one huge box.
+REGION_DEGREES = 1.0
+
+
+def _regions(latitudes, longitudes) -> list[np.ndarray]:
+    """Indices of the points in each occupied REGION_DEGREES cell."""
+    cells = np.column_stack(
+        (
+            np.floor(np.asarray(latitudes, dtype=float) / REGION_DEGREES),
+            np.floor(np.asarray(longitudes, dtype=float) / REGION_DEGREES),
+        )
+    )
+    _, cell_of = np.unique(cells, axis=0, return_inverse=True)
+    cell_of = cell_of.ravel()
+    by_cell = np.argsort(cell_of, kind="stable")
+    bounds = np.flatnonzero(np.diff(cell_of[by_cell])) + 1
+    return np.split(by_cell, bounds)
+
+
+def _envelope(latitudes: np.ndarray, longitudes: np.ndarray, max_distance: float):
+    """(min_lon, min_lat, max_lon, max_lat) around the points, padded by
+    ``max_distance``."""
+    pad = degrees_for(max_distance, float(np.abs(latitudes).max()))
+    return (
+        float(longitudes.min()) - pad,
+        float(latitudes.min()) - pad,
+        float(longitudes.max()) + pad,
+        float(latitudes.max()) + pad,
+    )
+
+
+def match(
+    orders: Sequence[Point],
+    couriers: Sequence[Point],
+    max_distance: float,
+    max_rounds: int = 8,
+) -> list[tuple[UUID, UUID, float]]:
+    """Pair orders with nearby couriers; ``(id, latitude, longitude)`` in,
+    ``(order_id, courier_id, meters)`` out.
+
+    Orders are taken a region (see :data:`REGION_DEGREES`) at a time, in a
+    projection centred on that region, against the couriers still free
+    within reach of it. Each round every unmatched order asks an STRtree of
+    those couriers for its nearest one within ``max_distance``; where
+    several orders want the same courier the closest order gets them and
+    the rest go again next round. All queries in a round run in one
+    vectorized call. Pairs are re-checked and reported with
+    :func:`haversine`. Orders still unmatched after ``max_rounds`` wait for
+    the next tick.
+    """
+    if not orders or not couriers:
+        return []
+
+    order_ids, order_lat, order_lon = zip(*orders, strict=True)
+    courier_ids, courier_lat, courier_lon = zip(*couriers, strict=True)
+    order_lat, order_lon = (
+        np.array(order_lat, dtype=float),
+        np.array(order_lon, dtype=float),
+    )
+    courier_lat = np.array(courier_lat, dtype=float)
+    courier_lon = np.array(courier_lon, dtype=float)
+    taken = np.zeros(len(couriers), dtype=bool)
+
+    matches = []
+    for region in _regions(order_lat, order_lon):
+        min_lon, min_lat, max_lon, max_lat = _envelope(
+            order_lat[region], order_lon[region], max_distance
+        )
+        nearby = np.flatnonzero(
+            ~taken
+            & (courier_lat >= min_lat)
+            & (courier_lat <= max_lat)
+            & (courier_lon >= min_lon)
+            & (courier_lon <= max_lon)
+        )
+        if not len(nearby):
+            continue
+
+        # Indices below are into region / nearby.
+        origin = float(order_lat[region].mean())
+        order_points = shapely.points(
+            project(order_lat[region], order_lon[region], origin)
+        )
+        courier_points = shapely.points(
+            project(courier_lat[nearby], courier_lon[nearby], origin)
+        )
+        pending = np.arange(len(region))
+        free = np.arange(len(nearby))
+        for _ in range(max_rounds):
+            if not len(pending) or not len(free):
+                break
+
+            tree = shapely.STRtree(courier_points[free])
+            (order_idx, courier_idx), distances = tree.query_nearest(
+                order_points[pending],
+                max_distance=max_distance,
+                return_distance=True,
+                all_matches=False,
+            )
+            if not len(order_idx):
+                break
+            wanted_orders = pending[order_idx]
+            wanted_couriers = free[courier_idx]
+
+            by_distance = np.argsort(distances, kind="stable")
+            _, first = np.unique(wanted_couriers[by_distance], return_index=True)
+            won = by_distance[first]
+            won_orders = region[wanted_orders[won]]
+            won_couriers = nearby[wanted_couriers[won]]
+            meters = haversine(
+                order_lat[won_orders],
+                order_lon[won_orders],
+                courier_lat[won_couriers],
+                courier_lon[won_couriers],
+            )
+            # The projection only approximates the sphere: a pair that turns
+            # out to be out of range is dropped and its courier sits this
+            # tick out.
+            matches.extend(
+                (order_ids[o], courier_ids[c], float(d))
+                for o, c, d in zip(won_orders, won_couriers, meters, strict=True)
+                if d <= max_distance
+            )
+            taken[won_couriers] = True
+
+            # Orders with no courier in range drop out: the free set only shrinks.
+            lost = np.ones(len(order_idx), dtype=bool)
+            lost[won] = False
+            pending = wanted_orders[lost]
+            free = np.setdiff1d(free, wanted_couriers[won], assume_unique=True)
+
+    return matches
+
+
+class Dispatcher:
+    """Assigns READY orders to available couriers every ``interval`` seconds."""
+
+    def __init__(
+        self,
+        interval: float,
+        batch_size: int,
+        max_distance: float,
+        stale_seconds: int,
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_distance = max_distance
+        self.stale_seconds = stale_seconds
+
+        self.ticks = 0
+        self.skipped = 0
+        self.errors = 0
+        self.assigned = 0
+        self.last_pending = 0
+        self.last_couriers = 0
+        self.last_assigned = 0
+        self.last_tick_seconds = 0.0
+
+        self._task: asyncio.Task | None = None
+
+    def _available_couriers(self, pending):
+        """Fresh, idle couriers inside the padded bounding box of each region
+        of ``pending``."""
+        latitudes = np.array([row.latitude for row in pending], dtype=float)
+        longitudes = np.array([row.longitude for row in pending], dtype=float)
+        areas = [
+            CourierLocation.location.intersects(
+                func.ST_MakeEnvelope(
+                    *_envelope(
+                        latitudes[region], longitudes[region], self.max_distance
+                    ),
+                    SRID,
+                )
+            )
+            for region in _regions(latitudes, longitudes)
+        ]
+        busy = (
+            exists()
+            .where(CourierAssignment.courier_id == CourierLocation.courier_id)
+            .where(CourierAssignment.order_id == Order.id)
+            .where(Order.status.in_(BUSY_STATUSES))
+        )
+        return (
+            select(
+                CourierLocation.courier_id,
+                func.ST_Y(CourierLocation.location).label("latitude"),
+                func.ST_X(CourierLocation.location).label("longitude"),
+            )
+            .join(User, User.id == CourierLocation.courier_id)
+            .where(
+                or_(*areas),
+                CourierLocation.is_available.is_(True),
+                CourierLocation.updated_at
+                >= func.now() - timedelta(seconds=self.stale_seconds),
+                User.role == UserRole.COURIER,
+                User.is_active.is_(True),
+                ~busy,
+            )
+        )
+
+    async def tick(self) -> int:
+        """Run one matching pass; returns the number of orders assigned."""
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            locked = await db.scalar(
+                select(func.pg_try_advisory_xact_lock(DISPATCH_LOCK_KEY))
+            )
+            if not locked:
+                self.skipped += 1
+                return 0
+
+            pending = (
+                await db.execute(
+                    select(
+                        Order.id,
+                        func.ST_Y(Restaurant.location).label("latitude"),
+                        func.ST_X(Restaurant.location).label("longitude"),
+                    )
+                    .join(Restaurant, Restaurant.id == Order.restaurant_id)
+                    .where(
+                        Order.status == OrderStatus.READY,
+                        Restaurant.location.is_not(None),
+                        ~exists().where(CourierAssignment.order_id == Order.id),
+                    )
+                    .order_by(Order.updated_at)
+                    .limit(self.batch_size)
+                )
+            ).all()
+            couriers = (
+                (await db.execute(self._available_couriers(pending))).all()
+                if pending
+                else []
+            )
+
+            pairs = match(pending, couriers, self.max_distance)
+            assigned = []
+            if pairs:
+                # Two array parameters however large the batch; the join
+                # skips orders cancelled since they were read.
+                uuids = ARRAY(PG_UUID(as_uuid=True))
+                chosen = (
+                    func.unnest(
+                        bindparam("order_ids", [o for o, _, _ in pairs], type_=uuids),
+                        bindparam("courier_ids", [c for _, c, _ in pairs], type_=uuids),
+                    )
+                    .table_valued("order_id", "courier_id")
+                    .render_derived(name="chosen")
+                )
+                assigned = (
+                    await db.execute(
+                        pg_insert(CourierAssignment)
+                        .from_select(
+                            ["order_id", "courier_id", "assigned_at"],
+                            select(
+                                chosen.c.order_id,
+                                chosen.c.courier_id,
+                                func.timezone("UTC", func.now()),
+                            )
+                            .join(Order, Order.id == chosen.c.order_id)
+                            .where(Order.status == OrderStatus.READY),
+                        )
+                        .on_conflict_do_nothing(index_elements=["order_id"])
+                        .returning(
+                            CourierAssignment.order_id,
+                            CourierAssignment.courier_id,
+                            CourierAssignment.assigned_at,
+                        )
+                    )
+                ).all()
+            await db.commit()
+
+        await asyncio.gather(
+            *(
+                publish_order_event(
+                    row.order_id,
+                    "assignment",
+                    assignment={
+                        "order_id": row.order_id,
+                        "courier_id": row.courier_id,
+                        "assigned_at": row.assigned_at.isoformat(),
+                    },
+                )
+                for row in assigned
+            )
+        )
+
+        self.ticks += 1
+        self.assigned += len(assigned)
+        self.last_pending = len(pending)
+        self.last_couriers = len(couriers)
+        self.last_assigned = len(assigned)
+        self.last_tick_seconds = time.perf_counter() - started
+        return len(assigned)
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                await self.tick()
+            except Exception:
+                self.errors += 1
+                logger.exception("dispatch: tick failed")
+            await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "ticks": self.ticks,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "assigned": self.assigned,
+            "last_pending": self.last_pending,
+            "last_couriers": self.last_couriers,
+            "last_assigned": self.last_assigned,
+            "last_tick_seconds": self.last_tick_seconds,
+        }
+
+
+dispatcher = Dispatcher(
+    interval=DISPATCH_INTERVAL_SECONDS,
+    batch_size=DISPATCH_BATCH_SIZE,
+    max_distance=DISPATCH_MAX_DISTANCE_METERS,
+    stale_seconds=DISPATCH_COURIER_STALE_SECONDS,
+)
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from uuid import UUID
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.settings import EVENTS_QUEUE_SIZE, EVENTS_REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One listener's bounded inbox.
+
+    A slow consumer never grows memory or blocks the publisher: when the
+    inbox is full the oldest message is dropped. Order events carry the full
+    current state, so losing an intermediate one is harmless.
+    """
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def push(self, message: str) -> bool:
+        dropped = False
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            dropped = True
+        self.queue.put_nowait(message)
+        return dropped
+
+    async def get(self) -> str:
+        return await self.queue.get()
+
+
+class MemoryBackend:
+    """Single-process backend; publish delivers straight to local subscribers."""
+
+    dispatch = None
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def subscribe(self, channel: str) -> None:
+        pass
+
+    async def unsubscribe(self, channel: str) -> None:
+        pass
+
+    async def publish(self, channel: str, message: str) -> None:
+        self.dispatch(channel, message)
+
+
+class RedisBackend:
+    """Redis pub/sub: one connection per worker, subscribed only to channels
+    that have a local listener."""
+
+    # Keeps the pubsub connection subscribed so listen() never idles out.
+    CONTROL_CHANNEL = "quickbite:events:control"
+
+    dispatch = None
+
+    def __init__(self, url: str):
+        self.redis = Redis.from_url(url)
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        await self.pubsub.subscribe(self.CONTROL_CHANNEL)
+        self._task = asyncio.create_task(self._reader())
+
+    async def _reader(self) -> None:
+        while True:
+            try:
+                async for message in self.pubsub.listen():
+                    if message["type"] == "message":
+                        self.dispatch(
+                            message["channel"].decode(), message["data"].decode()
+                        )
+            except asyncio.CancelledError:
+                raise
+            except RedisError as e:
+                logger.warning("events: redis listener error, retrying: %s", e)
+                await asyncio.sleep(1)
+            except Exception:
+                # Anything else would end the task and silently stop every
+                # live update on this worker.
+                logger.exception("events: redis listener failed, restarting")
+                await asyncio.sleep(1)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.pubsub.aclose()
+        await self.redis.aclose()
+
+    async def subscribe(self, channel: str) -> None:
+        await self.pubsub.subscribe(channel)
+
+    async def unsubscribe(self, channel: str) -> None:
+        await self.pubsub.unsubscribe(channel)
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self.redis.publish(channel, message)
+
+
+class Channel:
+    """Local subscribers of one channel and whether the backend carries it.
+
+    ``lock`` serializes the backend subscribe/unsubscribe for this channel
+    only; joining or leaving never waits on another channel's round trip.
+    """
+
+    def __init__(self):
+        self.subscribers: set[Subscription] = set()
+        self.lock = asyncio.Lock()
+        self.subscribed = False
+
+
+class Broadcaster:
+    """Fans messages for a channel out to every local subscriber.
+
+    The backend carries messages between workers; each worker holds one
+    backend subscription per channel no matter how many clients listen.
+    """
+
+    def __init__(self, backend, queue_size: int):
+        self.backend = backend
+        self.queue_size = queue_size
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self._channels: dict[str, Channel] = {}
+        backend.dispatch = self._dispatch
+
+    async def start(self) -> None:
+        await self.backend.start()
+
+    async def stop(self) -> None:
+        await self.backend.stop()
+
+    def _dispatch(self, channel: str, message: str) -> None:
+        entry = self._channels.get(channel)
+        for subscription in entry.subscribers if entry is not None else ():
+            self.delivered += 1
+            if subscription.push(message):
+                self.dropped += 1
+
+    async def publish(self, channel: str, event: dict) -> None:
+        self.published += 1
+        try:
+            await self.backend.publish(channel, json.dumps(event, default=str))
+        except RedisError as e:
+            # Live updates are best effort; the write they describe succeeded.
+            logger.warning("events: publish to %s failed: %s", channel, e)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str):
+        subscription = Subscription(self.queue_size)
+        # Joining is synchronous, so a channel being torn down is either
+        # found and kept or already gone.
+        entry = self._channels.get(channel)
+        if entry is None:
+            entry = self._channels[channel] = Channel()
+        entry.subscribers.add(subscription)
+        try:
+            async with entry.lock:
+                if not entry.subscribed:
+                    await self.backend.subscribe(channel)
+                    entry.subscribed = True
+            yield subscription
+        finally:
+            entry.subscribers.discard(subscription)
+            if not entry.subscribers:
+                async with entry.lock:
+                    if not entry.subscribers and entry.subscribed:
+                        entry.subscribed = False
+                        await self.backend.unsubscribe(channel)
+                    if not entry.subscribers and self._channels.get(channel) is entry:
+                        del self._channels[channel]
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._channels),
+            "subscribers": sum(len(e.subscribers) for e in self._channels.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+broadcaster = Broadcaster(
+    RedisBackend(EVENTS_REDIS_URL) if EVENTS_REDIS_URL else MemoryBackend(),
+    queue_size=EVENTS_QUEUE_SIZE,
+)
+
+
+def order_channel(order_id: UUID) -> str:
+    return f"quickbite:orders:{order_id}"
+
+
+async def publish_order_event(order_id: UUID, event_type: str, **data) -> None:
+    await broadcaster.publish(
+        order_channel(order_id), {"type": event_type, "order_id": order_id, **data}
+    )
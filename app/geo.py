@@ -0,0 +1,57 @@
+import math
+
+import numpy as np
+from geoalchemy2 import WKBElement, WKTElement
+from geoalchemy2.shape import to_shape
+
+# Locations are stored as lon/lat points in WGS 84.
+SRID = 4326
+EARTH_RADIUS_METERS = 6_371_008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_METERS / 180
+
+
+def point(latitude: float, longitude: float) -> WKTElement:
+    return WKTElement(f"POINT({longitude} {latitude})", srid=SRID)
+
+
+def coordinates(location: WKBElement | WKTElement | None) -> tuple[float, float] | None:
+    """``(latitude, longitude)`` of a stored point, or None."""
+    if location is None:
+        return None
+    shape = to_shape(location)
+    return shape.y, shape.x
+
+
+def degrees_for(meters: float, latitude: float) -> float:
+    """Degree padding that covers ``meters`` in every direction at ``latitude``.
+
+    A degree of longitude shrinks towards the poles, so this is the longitude
+    span; it over-covers latitude, which only matters for bounding boxes.
+    """
+    return meters / (METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters; works on scalars and numpy arrays."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(a))
+
+
+def project(latitudes, longitudes, origin_latitude: float) -> np.ndarray:
+    """Equirectangular projection to meters around ``origin_latitude``.
+
+    Accurate to well under a percent across a city, which is all the matcher
+    needs to rank candidates within one region; it re-checks the pairs it
+    keeps, and reports their distances, with :func:`haversine`.
+    """
+    scale = math.cos(math.radians(origin_latitude))
+    return np.column_stack(
+        (
+            np.asarray(longitudes, dtype=float) * METERS_PER_DEGREE * scale,
+            np.asarray(latitudes, dtype=float) * METERS_PER_DEGREE,
+        )
+    )
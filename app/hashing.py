@@ -0,0 +1,145 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException, status
+
+from app.settings import (
+    PASSWORD_HASH_MAX_WAITING,
+    PASSWORD_HASH_QUEUE_TIMEOUT,
+    PASSWORD_HASH_WORKERS,
+)
+from app.utils import get_password_hash, verify_password
+
+
+class PasswordHasherPool:
+    """Runs Argon2 on a dedicated, size-limited process pool.
+
+    At most ``workers`` hashes run at once. Further callers wait up to
+    ``queue_timeout`` seconds for a slot; once ``max_waiting`` callers are
+    already queued, new ones are rejected straight away. Both cases surface
+    as 503 so a login spike cannot stall unrelated requests.
+    """
+
+    def __init__(self, workers: int, max_waiting: int, queue_timeout: float):
+        self.workers = workers
+        self.max_waiting = max_waiting
+        self.queue_timeout = queue_timeout
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.run_seconds_total = 0.0
+        self.run_seconds_max = 0.0
+
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: never fork a process that holds open DB sockets.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    @staticmethod
+    def _busy() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+    async def run(self, fn, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+        if self._slots.locked() and self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise self._busy()
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await self._slots.acquire()
+        except TimeoutError:
+            self.timeouts += 1
+            raise self._busy() from None
+        finally:
+            self.waiting -= 1
+
+        started_at = time.perf_counter()
+        self.wait_seconds_total += started_at - queued_at
+        self.in_flight += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._finish(started_at)
+            raise
+        # The slot belongs to the worker process, not to this caller: a
+        # cancelled request must not free it while the hash is still running.
+        future.add_done_callback(
+            lambda _: loop.call_soon_threadsafe(self._finish, started_at)
+        )
+        return await asyncio.wrap_future(future)
+
+    def _finish(self, started_at: float) -> None:
+        self.in_flight -= 1
+        self._slots.release()
+        elapsed = time.perf_counter() - started_at
+        self.completed += 1
+        self.run_seconds_total += elapsed
+        self.run_seconds_max = max(self.run_seconds_max, elapsed)
+
+    async def start(self) -> None:
+        """Spawn the workers up front so the first logins do not pay for it."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(
+            *(loop.run_in_executor(executor, os.getpid) for _ in range(self.workers))
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": self.wait_seconds_total,
+            "run_seconds_total": self.run_seconds_total,
+            "run_seconds_max": self.run_seconds_max,
+            "run_seconds_avg": (
+                self.run_seconds_total / self.completed if self.completed else 0.0
+            ),
+        }
+
+
+password_hasher = PasswordHasherPool(
+    workers=PASSWORD_HASH_WORKERS,
+    max_waiting=PASSWORD_HASH_MAX_WAITING,
+    queue_timeout=PASSWORD_HASH_QUEUE_TIMEOUT,
+)
+
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.run(get_password_hash, password)
+
+
+async def check_password(plain_password: str, hashed_pw: str) -> bool:
+    return await password_hasher.run(verify_password, plain_password, hashed_pw)
@@ -0,0 +1,280 @@
+import logging
+import smtplib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from email.mime.text import MIMEText
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import RedisError
+
+from app.settings import (
+    CELERY_BROKER_URL,
+    EMAIL_ADDRESS,
+    EMAIL_PASSWORD,
+    EMAIL_RATE_LIMIT,
+    SMTP_HOST,
+    SMTP_IDLE_CHECK_SECONDS,
+    SMTP_MAX_MESSAGES_PER_CONNECTION,
+    SMTP_POOL_SIZE,
+    SMTP_PORT,
+    SMTP_STARTTLS,
+    SMTP_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+EMAIL_METRICS_KEY = "quickbite:metrics:email"
+
+
+class EmailMetrics:
+    """Delivery counters in a Redis hash, summed across all worker processes."""
+
+    def __init__(self, url: str):
+        self.redis = Redis.from_url(url)
+
+    def incr(self, **counts: int) -> None:
+        counts = {field: n for field, n in counts.items() if n}
+        if not counts:
+            return
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                for field, n in counts.items():
+                    pipe.hincrby(EMAIL_METRICS_KEY, field, n)
+                pipe.execute()
+        except RedisError as e:
+            logger.warning("email metrics: redis update failed: %s", e)
+
+
+class RateLimiter:
+    """Token bucket; :meth:`acquire` blocks until a token is free."""
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.burst = burst or max(rate, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+class _Connection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+        self.broken = False
+
+
+class SMTPPool:
+    """Logged-in SMTP sessions kept open and reused within one process.
+
+    Celery's prefork workers import this module before forking, so the pool
+    starts empty and each child opens its own connections on first use.
+    A connection is retired after ``max_messages`` and NOOP-checked before
+    reuse when it sat idle for ``idle_check`` seconds.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str | None,
+        password: str | None,
+        starttls: bool,
+        timeout: float,
+        size: int,
+        max_messages: int,
+        idle_check: float,
+        metrics: EmailMetrics | None = None,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.size = size
+        self.max_messages = max_messages
+        self.idle_check = idle_check
+        self.metrics = metrics
+
+        self._idle: list[_Connection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _open(self) -> _Connection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except BaseException:
+            smtp.close()
+            raise
+        if self.metrics:
+            self.metrics.incr(connections_opened=1)
+        return _Connection(smtp)
+
+    def _usable(self, conn: _Connection) -> bool:
+        if conn.sent >= self.max_messages:
+            return False
+        if time.monotonic() - conn.last_used < self.idle_check:
+            return True
+        try:
+            return conn.smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            if self.metrics:
+                self.metrics.incr(health_check_failures=1)
+            return False
+
+    @staticmethod
+    def _quit(conn: _Connection) -> None:
+        try:
+            conn.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.smtp.close()
+
+    def _checkout(self) -> _Connection:
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._open()
+            if self._usable(conn):
+                return conn
+            self._quit(conn)
+
+    @contextmanager
+    def connection(self):
+        with self._slots:
+            conn = self._checkout()
+            try:
+                yield conn
+            except BaseException:
+                conn.broken = True
+                raise
+            finally:
+                if conn.broken or conn.sent >= self.max_messages:
+                    self._quit(conn)
+                else:
+                    conn.last_used = time.monotonic()
+                    with self._lock:
+                        self._idle.append(conn)
+
+    def reset(self) -> None:
+        """Forget connections without closing them; for a freshly forked child,
+        whose inherited sockets belong to the parent."""
+        with self._lock:
+            self._idle = []
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._quit(conn)
+
+
+def _build_message(message: dict) -> MIMEText:
+    msg = MIMEText(message["body"], "plain", "utf-8")
+    msg["Subject"] = message["subject"]
+    msg["From"] = EMAIL_ADDRESS
+    msg["To"] = message["to_email"]
+    return msg
+
+
+def _permanent(e: smtplib.SMTPException) -> bool:
+    """5xx replies will fail the same way again; 4xx and the rest may not."""
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in e.recipients.values())
+    if isinstance(e, smtplib.SMTPResponseException):
+        return e.smtp_code >= 500
+    return False
+
+
+class Mailer:
+    """Sends messages over pooled sessions at no more than ``limiter``'s rate."""
+
+    def __init__(self, pool: SMTPPool, limiter: RateLimiter):
+        self.pool = pool
+        self.limiter = limiter
+
+    def deliver(self, messages: list[dict]) -> dict:
+        """Send ``{to_email, subject, body}`` dicts, as many per session as allowed.
+
+        Returns ``sent`` (count), ``failed`` (permanently rejected messages)
+        and ``retry`` (messages worth trying again later).
+        """
+        sent = 0
+        failed: list[dict] = []
+        retry: list[dict] = []
+        remaining = deque(messages)
+        while remaining:
+            try:
+                with self.pool.connection() as conn:
+                    while remaining and conn.sent < self.pool.max_messages:
+                        self.limiter.acquire()
+                        message = remaining[0]
+                        conn.sent += 1
+                        try:
+                            conn.smtp.send_message(_build_message(message))
+                        except (
+                            smtplib.SMTPResponseException,
+                            smtplib.SMTPRecipientsRefused,
+                        ) as e:
+                            # Rejected, but the session itself is still usable.
+                            logger.warning(
+                                "email to %s rejected: %s", message["to_email"], e
+                            )
+                            (failed if _permanent(e) else retry).append(message)
+                        else:
+                            sent += 1
+                        remaining.popleft()
+            except (smtplib.SMTPException, OSError) as e:
+                # The session is gone; whatever is left waits for a retry.
+                logger.warning("smtp connection failed: %s", e)
+                retry.extend(remaining)
+                remaining.clear()
+        return {"sent": sent, "failed": failed, "retry": retry}
+
+
+email_metrics = EmailMetrics(CELERY_BROKER_URL)
+
+smtp_pool = SMTPPool(
+    host=SMTP_HOST,
+    port=int(SMTP_PORT or 0),
+    username=EMAIL_ADDRESS,
+    password=EMAIL_PASSWORD,
+    starttls=SMTP_STARTTLS,
+    timeout=SMTP_TIMEOUT,
+    size=SMTP_POOL_SIZE,
+    max_messages=SMTP_MAX_MESSAGES_PER_CONNECTION,
+    idle_check=SMTP_IDLE_CHECK_SECONDS,
+    metrics=email_metrics,
+)
+
+mailer = Mailer(smtp_pool, RateLimiter(EMAIL_RATE_LIMIT))
+
+
+async def email_stats() -> dict:
+    """Current delivery counters, for the admin API."""
+    redis = AsyncRedis.from_url(CELERY_BROKER_URL)
+    try:
+        raw = await redis.hgetall(EMAIL_METRICS_KEY)
+    finally:
+        await redis.aclose()
+    return {field.decode(): int(n) for field, n in raw.items()}
@@ -0,0 +1,195 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-on-export histogram; :meth:`observe` is one bisect and two adds."""
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        """``(le, cumulative count)`` pairs ending with ``+Inf``."""
+        total = 0
+        for le, count in zip((*self.buckets, "+Inf"), self.counts, strict=True):
+            total += count
+            yield le, total
+
+
+class RequestStats:
+    """Queries and DB time of the request running in the current context."""
+
+    __slots__ = ("db_seconds", "queries")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar(
+    "current_request", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start
+    # time so the stack, which lives as long as the pooled connection, does
+    # not grow by one entry per error.
+    if context.connection is not None:
+        started = context.connection.info.get("query_start")
+        if started:
+            started.pop()
+
+
+def instrument_engine(engine) -> None:
+    """Count queries and DB time per request on a sync ``Engine``
+    (pass ``async_engine.sync_engine`` for async ones)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestMetrics:
+    """Per-route request counters and histograms in the Prometheus text format.
+
+    Routes are labelled by their path template (``/orders/{order_id}/``),
+    never the raw path, so label cardinality stays bounded; requests that
+    match no route share the ``unmatched`` label. Everything is updated
+    from the event loop thread, so no locking. Each worker process keeps
+    its own numbers.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.requests: dict[tuple[str, str, int], int] = {}
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.queries: dict[tuple[str, str], Histogram] = {}
+        self.db_seconds: dict[tuple[str, str], float] = {}
+
+    def observe(
+        self, method: str, route: str, status: int, seconds: float, stats: RequestStats
+    ) -> None:
+        key = (method, route)
+        latency = self.latency.get(key)
+        if latency is None:
+            latency = self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.queries[key] = Histogram(QUERY_BUCKETS)
+            self.db_seconds[key] = 0.0
+        latency.observe(seconds)
+        self.queries[key].observe(stats.queries)
+        self.db_seconds[key] += stats.db_seconds
+        counter = (method, route, status)
+        self.requests[counter] = self.requests.get(counter, 0) + 1
+
+    @staticmethod
+    def _histogram(lines: list[str], name: str, histograms: dict) -> None:
+        for (method, route), histogram in histograms.items():
+            labels = f'method="{method}",route="{_escape(route)}"'
+            for le, count in histogram.samples():
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{name}_count{{{labels}}} {sum(histogram.counts)}")
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_requests_total Finished requests by route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in self.requests.items():
+            lines.append(
+                f'http_requests_total{{method="{method}",route="{_escape(route)}",'
+                f'status="{status}"}} {count}'
+            )
+
+        lines += [
+            "# HELP http_request_duration_seconds Request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        self._histogram(lines, "http_request_duration_seconds", self.latency)
+        lines += [
+            "# HELP http_request_db_queries SQL statements executed per request.",
+            "# TYPE http_request_db_queries histogram",
+        ]
+        self._histogram(lines, "http_request_db_queries", self.queries)
+
+        lines += [
+            "# HELP http_request_db_seconds_total Time spent in SQL statements.",
+            "# TYPE http_request_db_seconds_total counter",
+        ]
+        for (method, route), seconds in self.db_seconds.items():
+            lines.append(
+                f'http_request_db_seconds_total{{method="{method}",'
+                f'route="{_escape(route)}"}} {seconds}'
+            )
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware; times each HTTP request until its body is sent."""
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats = RequestStats()
+        token = current_request.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.in_flight -= 1
+            current_request.reset(token)
+            # The router records the matched route on the shared scope.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.metrics.observe(scope["method"], route, status, elapsed, stats)
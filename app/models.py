@@ -2,24 +2,36 @@ import uuid
 from datetime import datetime
 from enum import Enum as PyEnum
 
+from geoalchemy2 import Geometry, WKBElement
 from sqlalchemy import (
-    String,
-    Integer,
-    Float,
     Boolean,
+    CheckConstraint,
+    Computed,
     DateTime,
-    ForeignKey,
     Enum,
-    Text,
+    Float,
+    ForeignKey,
     Index,
-    CheckConstraint,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
 )
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import Mapped, mapped_column, query_expression, relationship
+from sqlalchemy.sql import func, text
 
 from app.database import Base
+from app.geo import SRID, coordinates
 from app.timestamp_mixin import TimestampMixin
 
+# Weighted full-text document over name (A) and description (B). "simple"
+# rather than a language config: menus mix languages and brand names.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+)
+
 
 class UserRole(PyEnum):
     CUSTOMER = "customer"
@@ -36,6 +48,18 @@ class OrderStatus(PyEnum):
     CANCELLED = "cancelled"
 
 
+# Legal predecessors for every target status. DONE and CANCELLED are terminal.
+ORDER_TRANSITIONS: dict[OrderStatus, frozenset[OrderStatus]] = {
+    OrderStatus.ACCEPTED: frozenset({OrderStatus.PLACED}),
+    OrderStatus.READY: frozenset({OrderStatus.ACCEPTED}),
+    OrderStatus.PICKED_UP: frozenset({OrderStatus.READY}),
+    OrderStatus.DONE: frozenset({OrderStatus.PICKED_UP}),
+    OrderStatus.CANCELLED: frozenset(
+        {OrderStatus.PLACED, OrderStatus.ACCEPTED, OrderStatus.READY}
+    ),
+}
+
+
 class User(Base, TimestampMixin):
     __tablename__ = "users"
 
@@ -60,6 +84,10 @@ class User(Base, TimestampMixin):
         back_populates="courier"
     )
 
+    @property
+    def is_admin(self) -> bool:
+        return self.role == UserRole.ADMIN
+
     __table_args__ = (
         Index("ix_user_phone", "phone"),
         Index("ix_user_email", "email"),
@@ -82,14 +110,46 @@ class Restaurant(Base):
     operating_hours: Mapped[str] = mapped_column(String, nullable=False)
     rating: Mapped[float | None] = mapped_column(Float, nullable=True)
     is_open: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    location: Mapped[WKBElement | None] = mapped_column(
+        Geometry("POINT", srid=SRID, spatial_index=False), nullable=True
+    )
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True), deferred=True
+    )
+
+    # Meters from the search point; only loaded by geo queries.
+    distance: Mapped[float | None] = query_expression()
 
     items: Mapped[list["Item"]] = relationship(back_populates="restaurant")
     orders: Mapped[list["Order"]] = relationship(back_populates="restaurant")
 
+    @property
+    def latitude(self) -> float | None:
+        point = coordinates(self.location)
+        return point[0] if point else None
+
+    @property
+    def longitude(self) -> float | None:
+        point = coordinates(self.location)
+        return point[1] if point else None
+
     __table_args__ = (
         Index("ix_restaurant_phone", "phone"),
-        Index("ix_restaurant_address", "address"),
         Index("ix_restaurant_email", "email"),
+        Index("ix_restaurants_name_id", "name", "id"),
+        # On the geography cast so meter-based ST_DWithin and <-> can use it.
+        Index(
+            "ix_restaurants_location",
+            text("geography(location)"),
+            postgresql_using="gist",
+        ),
+        Index(
+            "ix_restaurants_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index("ix_restaurants_search_vector", "search_vector", postgresql_using="gin"),
     )
 
 
@@ -102,9 +162,14 @@ class Item(Base):
     name: Mapped[str] = mapped_column(String, index=True, nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=True)
     price_cents: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Restaurant-scoped stock keeping unit; the natural key for menu imports.
+    sku: Mapped[str | None] = mapped_column(String, nullable=True)
     image: Mapped[str | None] = mapped_column(String, nullable=True)
     is_available: Mapped[bool] = mapped_column(Boolean, default=True)
     is_recommended: Mapped[bool] = mapped_column(Boolean, default=False)
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True), deferred=True
+    )
 
     restaurant_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("restaurants.id"))
     restaurant: Mapped["Restaurant"] = relationship(back_populates="items")
@@ -113,6 +178,16 @@ class Item(Base):
 
     __table_args__ = (
         Index("ix_items_name", "name"),
+        Index("ix_items_name_id", "name", "id"),
+        Index("ix_items_price_cents_id", "price_cents", "id"),
+        Index(
+            "ix_items_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index("ix_items_search_vector", "search_vector", postgresql_using="gin"),
+        UniqueConstraint("restaurant_id", "sku", name="uq_items_restaurant_id_sku"),
         CheckConstraint("price_cents >= 0", name="check_price_positive"),
     )
 
@@ -139,7 +214,11 @@ class Order(Base, TimestampMixin):
         back_populates="order", uselist=False
     )
 
-    __table_args__ = (Index("ix_order_status", "status"),)
+    __table_args__ = (
+        Index("ix_order_status", "status"),
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_customer_id_created_at_id", "customer_id", "created_at", "id"),
+    )
 
 
 class OrderItem(Base, TimestampMixin):
@@ -172,3 +251,26 @@ class CourierAssignment(Base, TimestampMixin):
 
     order: Mapped["Order"] = relationship(back_populates="assignment")
     courier: Mapped["User"] = relationship(back_populates="assignments")
+
+    __table_args__ = (Index("ix_courier_assignments_courier_id", "courier_id"),)
+
+
+class CourierLocation(Base):
+    """Last reported position of a courier and whether they take orders."""
+
+    __tablename__ = "courier_locations"
+
+    courier_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    location: Mapped[WKBElement] = mapped_column(
+        Geometry("POINT", srid=SRID, spatial_index=False), nullable=False
+    )
+    is_available: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index("ix_courier_locations_location", "location", postgresql_using="gist"),
+    )
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import os
+import time
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.settings import (
+    NOTIFICATION_BACKEND,
+    NOTIFICATION_BATCH_SIZE,
+    NOTIFICATION_FLUSH_INTERVAL,
+    NOTIFICATION_LOG_BACKUPS,
+    NOTIFICATION_LOG_MAX_BYTES,
+    NOTIFICATION_LOG_PATH,
+    NOTIFICATION_QUEUE_SIZE,
+    NOTIFICATION_REDIS_URL,
+    NOTIFICATION_STREAM,
+    NOTIFICATION_STREAM_MAXLEN,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class FileBackend:
+    """Appends records to one long-lived file handle, rotating by size.
+
+    Rotation works like ``logging.handlers.RotatingFileHandler``: ``path``
+    becomes ``path.1``, ``path.1`` becomes ``path.2`` and so on, keeping
+    ``backups`` old files. Writes run in a thread so the loop never blocks.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.rotations = 0
+        self._file = None
+
+    def _open(self) -> None:
+        # Kept open across writes on purpose; _rotate() and close() close it.
+        self._file = open(self.path, mode="a", encoding="utf-8")  # noqa: SIM115
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for n in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{n}"):
+                os.replace(f"{self.path}.{n}", f"{self.path}.{n + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+        self.rotations += 1
+
+    def _write(self, records: list[dict]) -> None:
+        if self._file is None:
+            self._open()
+        self._file.write(
+            "".join(
+                f"Notification for {record['email']}: {record['message']}\n"
+                for record in records
+            )
+        )
+        self._file.flush()
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    async def write(self, records: list[dict]) -> None:
+        await asyncio.to_thread(self._write, records)
+
+    async def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class RedisStreamBackend:
+    """XADDs records to a capped Redis stream, one pipeline per batch."""
+
+    def __init__(self, url: str, stream: str, maxlen: int):
+        self.redis = Redis.from_url(url)
+        self.stream = stream
+        self.maxlen = maxlen
+
+    async def write(self, records: list[dict]) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for record in records:
+                pipe.xadd(self.stream, record, maxlen=self.maxlen, approximate=True)
+            await pipe.execute()
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+class NotificationSink:
+    """Queues notification records and writes them in batches.
+
+    :meth:`notify` never blocks: when the queue is full the record is
+    dropped and counted. A background task flushes once ``batch_size``
+    records are waiting or ``flush_interval`` seconds after the first one
+    arrived, whichever is sooner. :meth:`stop` drains the queue.
+    """
+
+    def __init__(
+        self, backend, queue_size: int, batch_size: int, flush_interval: float
+    ):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(queue_size)
+
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.lost = 0
+        self.flushes = 0
+        self.errors = 0
+
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+
+    def notify(self, email: str, message: str = "") -> None:
+        record = {"email": email, "message": message, "ts": f"{time.time():.6f}"}
+        try:
+            self.queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return
+        self.queued += 1
+
+    async def _collect(self) -> list[dict]:
+        loop = asyncio.get_running_loop()
+        batch = []
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if self._stopping or timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except TimeoutError:
+                break
+        return batch
+
+    async def _flush(self, batch: list[dict]) -> None:
+        try:
+            await self.backend.write(batch)
+        except (OSError, RedisError):
+            self.errors += 1
+            self.lost += len(batch)
+            logger.exception("notifications: failed to write %d records", len(batch))
+            return
+        self.flushes += 1
+        self.written += len(batch)
+
+    async def _run(self) -> None:
+        while not (self._stopping and self.queue.empty()):
+            batch = await self._collect()
+            if batch:
+                await self._flush(batch)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush everything queued so far, then close the backend."""
+        self._stopping = True
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.backend.close()
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "pending": self.queue.qsize(),
+            "queued": self.queued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "lost": self.lost,
+            "flushes": self.flushes,
+            "errors": self.errors,
+        }
+
+
+def _backend():
+    if NOTIFICATION_BACKEND == "redis":
+        return RedisStreamBackend(
+            NOTIFICATION_REDIS_URL, NOTIFICATION_STREAM, NOTIFICATION_STREAM_MAXLEN
+        )
+    return FileBackend(
+        NOTIFICATION_LOG_PATH, NOTIFICATION_LOG_MAX_BYTES, NOTIFICATION_LOG_BACKUPS
+    )
+
+
+notification_sink = NotificationSink(
+    _backend(),
+    queue_size=NOTIFICATION_QUEUE_SIZE,
+    batch_size=NOTIFICATION_BATCH_SIZE,
+    flush_interval=NOTIFICATION_FLUSH_INTERVAL,
+)
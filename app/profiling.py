@@ -0,0 +1,176 @@
+import logging
+import re
+import time
+from contextvars import ContextVar
+
+from fastapi import Depends
+from sqlalchemy import event
+
+from app.settings import (
+    QUERY_PROFILING_REPEAT_THRESHOLD,
+    QUERY_PROFILING_SLOW_MS,
+    QUERY_PROFILING_STRICT,
+)
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|%s|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\?(::\w+)?(?:\s*,\s*\?(?:::\w+)?)+")
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+class QueryBudgetExceededError(Exception):
+    """An endpoint ran more statements than its :func:`query_budget`."""
+
+
+def normalize(statement: str) -> str:
+    """Statement with parameters and literals as ``?`` and IN lists folded,
+    so every execution of one query in a loop maps to the same key."""
+    statement = _PLACEHOLDER.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub(r"?\1, ...", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class RequestProfile:
+    """Statements run while serving one request, grouped by normalized SQL."""
+
+    __slots__ = ("budget", "over_budget", "queries", "scope", "statements")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.queries = 0
+        self.statements: dict[str, int] = {}
+        self.budget: int | None = None
+        self.over_budget = False
+
+    @property
+    def origin(self) -> str:
+        route = getattr(self.scope.get("route"), "path", self.scope["path"])
+        return f"{self.scope['method']} {route}"
+
+
+current_profile: ContextVar[RequestProfile | None] = ContextVar(
+    "current_profile", default=None
+)
+
+
+def query_budget(max_queries: int):
+    """Route dependency declaring how many statements the endpoint may run.
+
+    Only enforced while profiling: overruns are logged, or raise
+    :class:`QueryBudgetExceededError` at the offending query with
+    ``QUERY_PROFILING_STRICT``, which is how a test fails on a regression.
+    """
+
+    async def declare() -> None:
+        profile = current_profile.get()
+        if profile is not None:
+            profile.budget = max_queries
+
+    return Depends(declare)
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    # Straight on the DBAPI connection so these don't go through the event
+    # hooks again; the savepoint keeps a failed EXPLAIN from aborting the
+    # request's own transaction.
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT query_profiler")
+        try:
+            cursor.execute(f"EXPLAIN {statement}", parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT query_profiler")
+            return f"EXPLAIN failed: {e}"
+        cursor.execute("RELEASE SAVEPOINT query_profiler")
+        return plan
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["profile_start"].pop()
+    profile = current_profile.get()
+
+    if elapsed * 1000 >= QUERY_PROFILING_SLOW_MS:
+        explainable = not executemany and statement.lstrip()[:6].upper().startswith(
+            _EXPLAINABLE
+        )
+        logger.warning(
+            "slow query (%.1f ms) in %s:\n%s\n%s",
+            elapsed * 1000,
+            profile.origin if profile else "background task",
+            statement,
+            _explain(conn, statement, parameters) if explainable else "(not explained)",
+        )
+
+    if profile is None:
+        return
+    profile.queries += 1
+    key = normalize(statement)
+    profile.statements[key] = profile.statements.get(key, 0) + 1
+
+    if profile.budget is not None and profile.queries > profile.budget:
+        message = f"{profile.origin} ran {profile.queries} queries, budget is {profile.budget}"
+        if QUERY_PROFILING_STRICT:
+            raise QueryBudgetExceededError(message)
+        if not profile.over_budget:
+            profile.over_budget = True
+            logger.warning("query budget exceeded: %s", message)
+
+
+def _handle_error(context):
+    # Failed statements skip after_cursor_execute (see app.metrics).
+    if context.connection is not None:
+        started = context.connection.info.get("profile_start")
+        if started:
+            started.pop()
+
+
+def instrument_engine(engine) -> None:
+    """Profile statements on a sync ``Engine``
+    (pass ``async_engine.sync_engine`` for async ones)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def report(profile: RequestProfile) -> None:
+    """Log statements repeated often enough within one request to look like N+1."""
+    for statement, count in profile.statements.items():
+        if count >= QUERY_PROFILING_REPEAT_THRESHOLD:
+            logger.warning(
+                "possible N+1 in %s: %d x %s", profile.origin, count, statement
+            )
+    logger.debug(
+        "%s: %d queries, %d distinct",
+        profile.origin,
+        profile.queries,
+        len(profile.statements),
+    )
+
+
+class QueryProfilerMiddleware:
+    """Plain ASGI middleware giving each HTTP request a :class:`RequestProfile`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope)
+        token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_profile.reset(token)
+            report(profile)
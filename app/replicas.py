@@ -0,0 +1,121 @@
+import asyncio
+import itertools
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Replay lag in seconds; 0 when the replica has replayed everything it has
+# received, so an idle primary does not make a caught-up replica look stale.
+PG_REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class Replica:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.healthy = True
+        self.lag_seconds = 0.0
+        self.last_error: str | None = None
+
+    async def check(self, max_lag: float, timeout: float) -> None:
+        try:
+            async with asyncio.timeout(timeout):
+                async with self.engine.connect() as conn:
+                    if self.engine.dialect.name == "postgresql":
+                        lag = await conn.scalar(PG_REPLICA_LAG_SQL)
+                    else:
+                        lag = await conn.scalar(text("SELECT 0"))
+        except Exception as e:
+            self.healthy = False
+            self.last_error = f"{type(e).__name__}: {e}"
+            return
+
+        self.lag_seconds = float(lag or 0)
+        self.healthy = self.lag_seconds <= max_lag
+        self.last_error = None if self.healthy else "replication lag"
+
+
+class ReplicaSet:
+    """Round-robin over read replicas, skipping unhealthy or lagging ones.
+
+    Health is refreshed every ``check_interval`` by a background task started
+    from the app lifespan, so picking a replica never waits on a check.
+    """
+
+    def __init__(
+        self,
+        engines: list[AsyncEngine],
+        max_lag_seconds: float,
+        check_interval: float,
+        check_timeout: float = 1.0,
+    ):
+        self.replicas = [Replica(engine) for engine in engines]
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._counter = itertools.count()
+        self._task: asyncio.Task | None = None
+
+    async def refresh(self) -> None:
+        await asyncio.gather(
+            *(
+                replica.check(self.max_lag_seconds, self.check_timeout)
+                for replica in self.replicas
+            )
+        )
+
+    def choose(self) -> AsyncEngine | None:
+        """Return the next healthy replica engine, or None to use the primary."""
+        if not self.replicas:
+            return None
+
+        start = next(self._counter)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.healthy:
+                return replica.engine
+        return None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("replica health check failed")
+
+    async def start(self) -> None:
+        """Check every replica once, then keep checking in the background."""
+        if self.replicas and self._task is None:
+            await self.refresh()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> list[dict]:
+        return [
+            {
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "healthy": replica.healthy,
+                "lag_seconds": replica.lag_seconds,
+                "last_error": replica.last_error,
+            }
+            for replica in self.replicas
+        ]
@@ -0,0 +1,74 @@
+import uuid
+
+import fastapi
+import orjson
+from fastapi.datastructures import Default
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def _default(value):
+    # asyncpg returns its own uuid.UUID subclass, which orjson won't take.
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON rendered by orjson, which handles UUID, datetime and enums itself.
+
+    Datetimes in UTC end in ``Z`` like pydantic's, so a payload reads the same
+    whichever way it was produced.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+
+# FastAPI 0.130 started rendering response_model output straight to JSON
+# bytes in pydantic-core, but only on routes left with the default response
+# class; orjson only pays off where it still goes through a dict and
+# json.dumps.
+NATIVE_JSON_SINCE = (0, 130)
+
+
+def native_json(version: str) -> bool:
+    """Whether FastAPI ``version`` serializes response models in pydantic-core."""
+    major, minor = (int(part) for part in version.split(".")[:2])
+    return (major, minor) >= NATIVE_JSON_SINCE
+
+
+NATIVE_JSON = native_json(fastapi.__version__)
+DEFAULT_RESPONSE_CLASS = Default(JSONResponse) if NATIVE_JSON else ORJSONResponse
+
+
+def columns_for(schema: type[BaseModel], model, **overrides) -> list:
+    """One labelled column per field of ``schema``, in its order.
+
+    Fields without a column of the same name on ``model`` (properties such
+    as ``Restaurant.latitude``) need an SQL expression in ``overrides``.
+    """
+    columns = []
+    for name in schema.model_fields:
+        column = overrides.get(name)
+        if column is None:
+            column = getattr(model, name)
+            if not isinstance(column, InstrumentedAttribute):
+                raise TypeError(f"{model.__name__}.{name} is not a column")
+        columns.append(column.label(name))
+    return columns
+
+
+def page_response(page: dict) -> ORJSONResponse:
+    """A page from ``Pagination.paginate(..., scalars=False)`` as a response.
+
+    Skips response_model validation: the rows are built from
+    :func:`columns_for` of the route's schema, so their shape already matches.
+    """
+    rows = page["items"]
+    # Row._asdict() costs far more than the JSON encoding of the row itself.
+    keys = rows[0]._fields if rows else ()
+    return ORJSONResponse(
+        {**page, "items": [dict(zip(keys, row, strict=True)) for row in rows]}
+    )
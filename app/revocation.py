@@ -0,0 +1,299 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.settings import (
+    REVOCATION_BLOOM_CAPACITY,
+    REVOCATION_BLOOM_ERROR_RATE,
+    REVOCATION_REDIS_URL,
+    REVOCATION_SYNC_SECONDS,
+)
+from app.utils import REFRESH_TOKEN_LIFETIME
+
+logger = logging.getLogger(__name__)
+
+REVOKED_TOKENS_KEY = "quickbite:revoked:tokens"  # zset: jti/sid -> exp
+REVOKED_USERS_KEY = "quickbite:revoked:users"  # hash: email -> cutoff
+REVOCATIONS_CHANNEL = "quickbite:revoked:events"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings; no false negatives."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key)
+        )
+
+
+class TokenRevocation:
+    """Denylist of token and session ids plus per-user "revoked before" cutoffs.
+
+    A token is rejected if its ``jti`` or its session's ``sid`` was revoked.
+    Redis holds the shared state: a sorted set of revoked ids scored by
+    when they stop mattering (expired members are pruned on write) and a
+    hash of user cutoffs. Each worker mirrors it locally, kept current over pub/sub and
+    rebuilt every ``sync_interval`` seconds:
+
+    * ids go into a Bloom filter, so a token that was never revoked is
+      cleared without leaving the process; only filter hits ask Redis.
+    * cutoffs are few and are checked straight from memory.
+
+    Without Redis everything stays in-process, which is only correct for a
+    single worker; expired ids and cutoffs are pruned as new ones are
+    written, so memory follows the live revocations only.
+    """
+
+    def __init__(
+        self,
+        redis: Redis | None,
+        capacity: int,
+        error_rate: float,
+        sync_interval: float,
+        cutoff_ttl: float,
+    ):
+        self.redis = redis
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.cutoff_ttl = cutoff_ttl
+
+        self.local_passes = 0
+        self.redis_checks = 0
+        self.rejected = 0
+        self.errors = 0
+        self.syncs = 0
+
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._rebuilding: BloomFilter | None = None
+        self._cutoffs: dict[str, float] = {}
+        self._revoked: dict[str, float] = {}
+        self._prune_at = capacity
+        self._task: asyncio.Task | None = None
+
+    def _note_token(self, jti: str) -> None:
+        # Our own revocations come back over pub/sub too.
+        if jti not in self._bloom:
+            self._bloom.add(jti)
+        if self._rebuilding is not None:
+            self._rebuilding.add(jti)
+
+    def _note_user(self, email: str, cutoff: float) -> None:
+        self._cutoffs[email] = max(cutoff, self._cutoffs.get(email, 0.0))
+
+    def _prune_local(self, now: float) -> None:
+        """Drop expired in-process state and rebuild the filter from the rest.
+
+        Only used without Redis, where :meth:`sync` never runs. Amortized:
+        runs once the denylist has doubled since the last pass.
+        """
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        self._cutoffs = {
+            email: cutoff
+            for email, cutoff in self._cutoffs.items()
+            if cutoff >= now - self.cutoff_ttl
+        }
+        bloom = BloomFilter(max(self.capacity, 2 * len(self._revoked)), self.error_rate)
+        for jti in self._revoked:
+            bloom.add(jti)
+        self._bloom = bloom
+        self._prune_at = max(self.capacity, 2 * len(self._revoked))
+
+    async def revoke(self, jti: str, exp: float) -> bool:
+        """Reject the token or session ``jti`` until ``exp``.
+
+        Returns False if it was already revoked, atomically across workers,
+        so refresh-token rotation can use it to spot a token used twice.
+        """
+        now = time.time()
+        if exp <= now:
+            return True
+        self._note_token(jti)
+        if self.redis is None:
+            fresh = self._revoked.get(jti, 0) <= now
+            self._revoked[jti] = max(exp, self._revoked.get(jti, 0))
+            if len(self._revoked) >= self._prune_at:
+                self._prune_local(now)
+            return fresh
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(REVOKED_TOKENS_KEY, "-inf", now)
+            pipe.zadd(REVOKED_TOKENS_KEY, {jti: exp}, nx=True)
+            pipe.publish(REVOCATIONS_CHANNEL, f"token {jti}")
+            _, added, _ = await pipe.execute()
+        return bool(added)
+
+    async def revoke_user(self, email: str) -> None:
+        """Reject every token issued to ``email`` up to now."""
+        cutoff = time.time()
+        self._note_user(email, cutoff)
+        if self.redis is None:
+            if len(self._cutoffs) >= self._prune_at:
+                self._prune_local(cutoff)
+            return
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(REVOKED_USERS_KEY, email, cutoff)
+            pipe.publish(REVOCATIONS_CHANNEL, f"user {cutoff} {email}")
+            await pipe.execute()
+
+    async def is_revoked(self, payload: dict, fail_closed: bool = True) -> bool:
+        """Whether ``payload`` was revoked.
+
+        If Redis can't be asked, a Bloom filter hit counts as revoked, which
+        is right for access checks. Callers that act on a positive answer,
+        like refresh-reuse detection, pass ``fail_closed=False`` to get the
+        RedisError instead.
+        """
+        revoked = await self._check(payload, fail_closed)
+        if revoked:
+            self.rejected += 1
+        return revoked
+
+    async def _check(self, payload: dict, fail_closed: bool) -> bool:
+        cutoff = self._cutoffs.get(payload.get("email"))
+        if cutoff is not None and payload.get("iat", 0) <= cutoff:
+            return True
+
+        ids = [
+            key
+            for key in (payload.get("jti"), payload.get("sid"))
+            if key is not None and key in self._bloom
+        ]
+        if not ids:
+            self.local_passes += 1
+            return False
+        now = time.time()
+        if self.redis is None:
+            return any(self._revoked.get(key, 0) > now for key in ids)
+
+        self.redis_checks += 1
+        try:
+            scores = await self.redis.zmscore(REVOKED_TOKENS_KEY, ids)
+        except RedisError as e:
+            # A filter hit is almost always a real revocation.
+            self.errors += 1
+            logger.warning("token revocation: redis check failed: %s", e)
+            if not fail_closed:
+                raise
+            return True
+        return any(exp is not None and exp > now for exp in scores)
+
+    def _apply(self, message: str) -> None:
+        kind, _, rest = message.partition(" ")
+        if kind == "token":
+            self._note_token(rest)
+        elif kind == "user":
+            cutoff, _, email = rest.partition(" ")
+            self._note_user(email, float(cutoff))
+
+    async def sync(self) -> None:
+        """Rebuild the local mirror from Redis, dropping expired entries."""
+        now = time.time()
+        jtis = await self.redis.zrangebyscore(REVOKED_TOKENS_KEY, now, "+inf")
+        self._rebuilding = BloomFilter(
+            max(self.capacity, 2 * len(jtis)), self.error_rate
+        )
+        try:
+            for jti in jtis:
+                self._rebuilding.add(jti.decode())
+            self._bloom = self._rebuilding
+        finally:
+            self._rebuilding = None
+
+        stale = []
+        cutoffs = {}
+        for email, cutoff in (await self.redis.hgetall(REVOKED_USERS_KEY)).items():
+            if float(cutoff) < now - self.cutoff_ttl:
+                stale.append(email)
+            else:
+                cutoffs[email.decode()] = float(cutoff)
+        if stale:
+            await self.redis.hdel(REVOKED_USERS_KEY, *stale)
+        self._cutoffs = cutoffs
+        self.syncs += 1
+
+    async def _run(self) -> None:
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                # Subscribe before the snapshot so nothing falls in between.
+                await pubsub.subscribe(REVOCATIONS_CHANNEL)
+                await self.sync()
+                next_sync = time.monotonic() + self.sync_interval
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._apply(message["data"].decode())
+                    if time.monotonic() >= next_sync:
+                        await self.sync()
+                        next_sync = time.monotonic() + self.sync_interval
+            except RedisError as e:
+                self.errors += 1
+                logger.warning(
+                    "token revocation: redis listener error, retrying: %s", e
+                )
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def start(self) -> None:
+        if self.redis is not None and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "shared": self.redis is not None,
+            "bloom_bits": self._bloom.size,
+            "bloom_entries": self._bloom.count,
+            "user_cutoffs": len(self._cutoffs),
+            "local_passes": self.local_passes,
+            "redis_checks": self.redis_checks,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "syncs": self.syncs,
+        }
+
+
+token_revocation = TokenRevocation(
+    redis=Redis.from_url(REVOCATION_REDIS_URL) if REVOCATION_REDIS_URL else None,
+    capacity=REVOCATION_BLOOM_CAPACITY,
+    error_rate=REVOCATION_BLOOM_ERROR_RATE,
+    sync_interval=REVOCATION_SYNC_SECONDS,
+    # A cutoff only matters while tokens issued before it can still be valid.
+    cutoff_ttl=REFRESH_TOKEN_LIFETIME.total_seconds(),
+)
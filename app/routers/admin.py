@@ -0,0 +1,160 @@
+from uuid import UUID
+
+from fastapi import APIRouter, HTTPException
+from redis.exceptions import RedisError
+
+from app.cache import menu_cache, principal_cache
+from app.database import async_engine, engine, read_replicas
+from app.dependencies import async_db_dep, current_user_dep
+from app.dispatch import dispatcher
+from app.events import broadcaster
+from app.hashing import password_hasher
+from app.mailer import email_stats
+from app.models import User
+from app.notifications import notification_sink
+from app.pool_metrics import pool_status
+from app.revocation import token_revocation
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/db-pool/", response_model=dict)
+async def db_pool_status(current_user: current_user_dep):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return {
+        "async": pool_status(async_engine.pool),
+        "sync": pool_status(engine.pool),
+        "replicas": [
+            {**status, "pool": pool_status(replica.engine.pool)}
+            for replica, status in zip(
+                read_replicas.replicas, read_replicas.status(), strict=True
+            )
+        ],
+    }
+
+
+@router.get("/principal-cache/", response_model=dict)
+async def principal_cache_status(current_user: current_user_dep):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return principal_cache.stats()
+
+
+@router.get("/menu-cache/", response_model=dict)
+async def menu_cache_status(current_user: current_user_dep):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return menu_cache.stats()
+
+
+@router.get("/password-hasher/", response_model=dict)
+async def password_hasher_status(current_user: current_user_dep):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return password_hasher.stats()
+
+
+@router.get("/email/", response_model=dict)
+async def email_delivery_status(current_user: current_user_dep):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    try:
+        return await email_stats()
+    except RedisError:
+        raise HTTPException(
+            status_code=503, detail="Email metrics unavailable"
+        ) from None
+
+
+@router.get("/notifications/", response_model=dict)
+async def notifications_status(current_user: current_user_dep):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return notification_sink.stats()
+
+
+@router.get("/order-events/", response_model=dict)
+async def order_events_status(current_user: current_user_dep):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return broadcaster.stats()
+
+
+@router.get("/dispatch/", response_model=dict)
+async def dispatch_status(current_user: current_user_dep):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return dispatcher.stats()
+
+
+@router.post("/dispatch/run/", response_model=dict)
+async def run_dispatch(current_user: current_user_dep):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return {"assigned": await dispatcher.tick()}
+
+
+@router.get("/token-revocation/", response_model=dict)
+async def token_revocation_status(current_user: current_user_dep):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return token_revocation.stats()
+
+
+@router.post("/users/{user_id}/revoke-sessions/", response_model=dict)
+async def revoke_user_sessions(
+    user_id: UUID,
+    db: async_db_dep,
+    current_user: current_user_dep,
+):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    try:
+        await token_revocation.revoke_user(user.email)
+    except RedisError:
+        raise HTTPException(
+            status_code=503, detail="Token revocation unavailable"
+        ) from None
+    return {"detail": "All sessions revoked"}
+
+
+@router.post("/users/{user_id}/deactivate/", response_model=dict)
+async def deactivate_user(
+    user_id: UUID,
+    db: async_db_dep,
+    current_user: current_user_dep,
+):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    user.is_active = False
+    await db.commit()
+    await principal_cache.invalidate(user.email)
+    # Otherwise reactivating the account would bring its old tokens back.
+    try:
+        await token_revocation.revoke_user(user.email)
+    except RedisError:
+        raise HTTPException(
+            status_code=503, detail="Token revocation unavailable"
+        ) from None
+    return {"detail": "User deactivated"}
@@ -1,47 +1,59 @@
+import time
+import uuid
+
 from fastapi import APIRouter, HTTPException
+from jose import JWTError
+from redis.exceptions import RedisError
+from sqlalchemy import func, select
+
+from app.cache import principal_cache
+from app.dependencies import async_db_dep, current_user_dep, load_principal
+from app.hashing import check_password, hash_password
 from app.models import User
+from app.revocation import token_revocation
+from app.schemas.auth import LoginRequest, RefreshRequest, Token
 from app.schemas.user import UserCreate
-from app.schemas.auth import LoginRequest, Token
+from app.settings import FRONTEND_URL
+from app.tasks import send_email
 from app.utils import (
+    REFRESH_TOKEN_LIFETIME,
     create_access_token,
     create_refresh_token,
     decode_token,
     generate_confirmation_token,
-    verify_password,
-    get_password_hash,
 )
-from app.tasks import send_email
-from app.dependencies import db_dep
-from app.settings import FRONTEND_URL
 
 router = APIRouter()
 
 
 @router.post("/register/")
-def register_user(register_data: UserCreate, db: db_dep):
-    existing_user = db.query(User).filter(User.email == register_data.email).first()
+async def register_user(register_data: UserCreate, db: async_db_dep):
+    result = await db.execute(select(User).where(User.email == register_data.email))
+    existing_user = result.scalars().first()
     if existing_user:
         raise HTTPException(status_code=400, detail="User already exists")
 
     is_superuser = False
     is_verified = False
 
-    if db.query(User).count() == 0:
+    if await db.scalar(select(func.count()).select_from(User)) == 0:
         is_superuser = True
         is_verified = True
 
+    hashed_pw = await hash_password(register_data.hashed_pw)
+
     user = User(
         username=register_data.username,
         email=register_data.email,
-        hashed_pw=get_password_hash(register_data.hashed_pw),
+        hashed_pw=hashed_pw,
         is_superuser=is_superuser,
         is_active=True,
         is_verified=is_verified,
     )
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     if not is_verified:
         token = generate_confirmation_token(email=user.email)
@@ -51,44 +63,99 @@ def register_user(register_data: UserCreate, db: db_dep):
             body=f"Click to confirm: {FRONTEND_URL}/auth/confirm/{token}/",
         )
 
-    return {"detail": f"User registered. {'Confirmation email sent.' if not is_verified else 'Auto-confirmed.'}"}
+    return {
+        "detail": f"User registered. {'Confirmation email sent.' if not is_verified else 'Auto-confirmed.'}"
+    }
 
 
 @router.post("/login/", response_model=Token)
-def login_user(login_data: LoginRequest, db: db_dep):
-    user = db.query(User).filter(User.email == login_data.email).first()
+async def login_user(login_data: LoginRequest, db: async_db_dep):
+    result = await db.execute(select(User).where(User.email == login_data.email))
+    user = result.scalars().first()
 
-    if not user or not verify_password(login_data.password, user.hashed_pw):
+    if not user or not await check_password(login_data.password, user.hashed_pw):
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
     if not user.is_verified:
         raise HTTPException(status_code=403, detail="Account not confirmed")
 
+    return _issue_tokens(user, sid=uuid.uuid4().hex)
+
+
+def _issue_tokens(user: User, sid: str) -> Token:
+    """New access/refresh pair for the session ``sid``."""
     payload = {
         "sub": user.username,
         "email": user.email,
         "role": user.role.value,
+        "sid": sid,
     }
 
     access_token = create_access_token(data=payload)
     refresh_token = create_refresh_token(data=payload)
 
     return Token(
-        access_token=access_token,
-        refresh_token=refresh_token,
-        token_type="bearer"
+        access_token=access_token, refresh_token=refresh_token, token_type="bearer"
+    )
+
+
+async def _revoke_session(sid: str) -> None:
+    # Outlives every token issued in the session so far.
+    await token_revocation.revoke(
+        sid, time.time() + REFRESH_TOKEN_LIFETIME.total_seconds()
     )
 
 
+@router.post("/refresh/", response_model=Token)
+async def refresh_tokens(refresh_data: RefreshRequest, db: async_db_dep):
+    """Swap a refresh token for a new pair; no password check.
+
+    Each refresh token works once. Presenting one that was already used
+    (or logged out) means it leaked, so the whole session is revoked.
+    """
+    invalid_token = HTTPException(status_code=401, detail="Invalid refresh token")
+    payload = decode_token(refresh_data.refresh_token)
+    if (
+        not payload
+        or payload.get("type") != "refresh"
+        or not payload.get("jti")
+        or not payload.get("sid")
+    ):
+        raise invalid_token
+
+    # An unreachable Redis is a 503, never taken as reuse: revoking the
+    # session over a blip would log the user out.
+    try:
+        reused = await token_revocation.is_revoked(payload, fail_closed=False)
+        if not reused:
+            # Spends the token; of two concurrent refreshes only one wins.
+            reused = not await token_revocation.revoke(payload["jti"], payload["exp"])
+        if reused:
+            await _revoke_session(payload["sid"])
+    except RedisError:
+        raise HTTPException(
+            status_code=503, detail="Token revocation unavailable"
+        ) from None
+    if reused:
+        raise invalid_token
+
+    user = await load_principal(db, payload["email"])
+    if user is None or not user.is_active or not user.is_verified:
+        raise invalid_token
+
+    return _issue_tokens(user, sid=payload["sid"])
+
+
 @router.get("/confirm/{token}/", response_model=dict)
-def confirm_email(token: str, db: db_dep):
+async def confirm_email(token: str, db: async_db_dep):
     try:
         payload = decode_token(token)
         email = payload.get("email")
         if not email:
             raise HTTPException(status_code=400, detail="Invalid token")
 
-        user = db.query(User).filter(User.email == email).first()
+        result = await db.execute(select(User).where(User.email == email))
+        user = result.scalars().first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
@@ -96,25 +163,51 @@ def confirm_email(token: str, db: db_dep):
             return {"message": "User already confirmed"}
 
         user.is_verified = True
-        db.commit()
+        await db.commit()
+        await principal_cache.invalidate(user.email)
         return {"message": "Email confirmed successfully"}
 
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except JWTError:
-        raise HTTPException(status_code=400, detail="Invalid or expired token")
+        raise HTTPException(
+            status_code=400, detail="Invalid or expired token"
+        ) from None
 
 
 @router.post("/logout/", response_model=dict)
-def logout_user(token_data: Token, db: db_dep) -> dict:
+async def logout_user(token_data: Token) -> dict:
+    payload = decode_token(token_data.access_token)
+    if not payload or not payload.get("email"):
+        raise HTTPException(status_code=401, detail="Invalid access token")
+
+    # Revoke the pair together; a refresh token for someone else is ignored.
+    tokens = [payload]
+    refresh = decode_token(token_data.refresh_token)
+    if refresh and refresh.get("email") == payload["email"]:
+        tokens.append(refresh)
+
     try:
-        payload = decode_token(token_data.access_token)
-        email = payload.get("email")
+        for token in tokens:
+            if token.get("jti"):
+                await token_revocation.revoke(token["jti"], token["exp"])
+        if payload.get("sid"):
+            await _revoke_session(payload["sid"])
+    except RedisError:
+        raise HTTPException(
+            status_code=503, detail="Token revocation unavailable"
+        ) from None
 
-        if not email:
-            raise HTTPException(status_code=401, detail="Invalid access token")
+    return {"message": f"User {payload['email']} logged out."}
 
-        return {"message": f"User {email} logged out (client should delete token)."}
 
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid access token")
+@router.post("/logout-all/", response_model=dict)
+async def logout_all_sessions(current_user: current_user_dep) -> dict:
+    try:
+        await token_revocation.revoke_user(current_user.email)
+    except RedisError:
+        raise HTTPException(
+            status_code=503, detail="Token revocation unavailable"
+        ) from None
+
+    return {"message": f"All sessions of {current_user.email} logged out."}
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, HTTPException
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.dependencies import async_db_dep, current_user_dep
+from app.geo import point
+from app.models import CourierLocation, UserRole
+from app.schemas.courier import CourierLocationResponse, CourierLocationUpdate
+
+router = APIRouter(prefix="/couriers", tags=["Couriers"])
+
+
+@router.put("/me/location/", response_model=CourierLocationResponse)
+async def update_my_location(
+    data: CourierLocationUpdate,
+    db: async_db_dep,
+    current_user: current_user_dep,
+):
+    """Report the courier's position; apps call this every few seconds, so it
+    is a single upsert with no read."""
+    if current_user.role != UserRole.COURIER:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    stmt = pg_insert(CourierLocation).values(
+        courier_id=current_user.id,
+        location=point(data.latitude, data.longitude),
+        is_available=data.is_available,
+    )
+    updated_at = await db.scalar(
+        stmt.on_conflict_do_update(
+            index_elements=[CourierLocation.courier_id],
+            set_={
+                "location": stmt.excluded.location,
+                "is_available": stmt.excluded.is_available,
+                "updated_at": func.now(),
+            },
+        ).returning(CourierLocation.updated_at)
+    )
+    await db.commit()
+    return {
+        **data.model_dump(),
+        "courier_id": current_user.id,
+        "updated_at": updated_at,
+    }
@@ -1,99 +1,101 @@
+from uuid import UUID
+
 from fastapi import APIRouter, HTTPException, Query
+from sqlalchemy import select
+
+from app.cache import menu_cache
+from app.dependencies import (
+    PaginationDep,
+    async_db_dep,
+    current_user_dep,
+    db_read_dep,
+)
 from app.models import Item, Restaurant
-from app.schemas.item import ItemCreate, ItemUpdate, ItemResponse
-from app.dependencies import db_dep, current_user_dep
+from app.schemas.item import ItemCreate, ItemResponse, ItemUpdate
+from app.schemas.pagination import Page
 
 router = APIRouter(prefix="/items", tags=["Items"])
 
 
-@router.get("/", response_model=list[ItemResponse])
-def list_items(
-    db: db_dep,
+ITEM_SORTABLE = {
+    "id": Item.id,
+    "name": Item.name,
+    "price_cents": Item.price_cents,
+}
+
+
+@router.get("/", response_model=Page[ItemResponse])
+async def list_items(
+    db: db_read_dep,
+    pagination: PaginationDep,
     name: str = Query(None),
-    restaurant_id: int = Query(None),
+    restaurant_id: UUID = Query(None),
     min_price: float = Query(None),
     max_price: float = Query(None),
-    skip: int = 0,
-    limit: int = 10,
-    sort_by: str = Query("id"),
-    sort_order: str = Query("asc"),
 ):
-    query = db.query(Item)
+    query = select(Item)
 
     if name:
-        query = query.filter(Item.name.ilike(f"%{name}%"))
+        query = query.where(Item.name.ilike(f"%{name}%"))
     if restaurant_id:
-        query = query.filter(Item.restaurant_id == restaurant_id)
+        query = query.where(Item.restaurant_id == restaurant_id)
     if min_price is not None:
-        query = query.filter(Item.price >= min_price)
+        query = query.where(Item.price_cents >= min_price)
     if max_price is not None:
-        query = query.filter(Item.price <= max_price)
-
-    sort_column = getattr(Item, sort_by, Item.id)
-    if sort_order == "desc":
-        sort_column = sort_column.desc()
-    else:
-        sort_column = sort_column.asc()
-
-    return query.order_by(sort_column).offset(skip).limit(limit).all()
+        query = query.where(Item.price_cents <= max_price)
 
+    return await pagination.paginate(db, query, ITEM_SORTABLE)
 
 
 @router.post("/", response_model=ItemResponse)
-def create_item(
-    data: ItemCreate,
-    db: db_dep,
-    current_user: current_user_dep
+async def create_item(
+    data: ItemCreate, db: async_db_dep, current_user: current_user_dep
 ):
     if not current_user.is_superuser and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    restaurant = db.query(Restaurant).get(data.restaurant_id)
+    restaurant = await db.get(Restaurant, data.restaurant_id)
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
 
     item = Item(**data.model_dump())
     db.add(item)
-    db.commit()
-    db.refresh(item)
+    await db.commit()
+    await menu_cache.invalidate(item.restaurant_id)
+    await db.refresh(item)
     return item
 
 
 @router.put("/{item_id}/", response_model=ItemResponse)
-def update_item(
-    item_id: int,
-    data: ItemUpdate,
-    db: db_dep,
-    current_user: current_user_dep
+async def update_item(
+    item_id: UUID, data: ItemUpdate, db: async_db_dep, current_user: current_user_dep
 ):
     if not current_user.is_superuser and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    item = db.query(Item).get(item_id).first()
+    item = await db.get(Item, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
     for field, value in data.model_dump(exclude_unset=True).items():
         setattr(item, field, value)
 
-    db.commit()
-    db.refresh(item)
+    await db.commit()
+    await menu_cache.invalidate(item.restaurant_id)
+    await db.refresh(item)
     return item
 
 
 @router.delete("/{item_id}/", response_model=dict)
-def delete_item(
-    item_id: int,
-    db: db_dep,
-    current_user: current_user_dep
-):
+async def delete_item(item_id: UUID, db: async_db_dep, current_user: current_user_dep):
     if not current_user.is_superuser and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    item = db.query(Item).get(item_id).first()
+    item = await db.get(Item, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    db.delete(item)
-    db.commit()
-    return {"detail": "Item deleted"}
\ No newline at end of file
+    await db.delete(item)
+    await db.commit()
+    await menu_cache.invalidate(item.restaurant_id)
+    return {"detail": "Item deleted"}
@@ -1,57 +1,560 @@
-from fastapi import APIRouter, HTTPException
-from app.models import Order, Item
-from app.schemas.order_item import OrderCreate, OrderResponse
-from app.dependencies import db_dep, current_user_dep
+import asyncio
+import csv
+import io
+import json
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from datetime import datetime
+from typing import Literal
+from uuid import UUID, uuid4
+
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Query,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, insert, select, true, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.database import AsyncSessionLocal
+from app.dependencies import (
+    PaginationDep,
+    async_db_dep,
+    authenticate_token,
+    current_user_dep,
+    current_user_read_dep,
+    db_read_dep,
+    open_read_session,
+)
+from app.events import broadcaster, order_channel, publish_order_event
+from app.models import (
+    ORDER_TRANSITIONS,
+    CourierAssignment,
+    Item,
+    Order,
+    OrderItem,
+    OrderStatus,
+    User,
+    UserRole,
+)
+from app.profiling import query_budget
+from app.responses import columns_for, page_response
+from app.schemas.assignment import CourierAssignmentResponse
+from app.schemas.order_item import (
+    OrderCreate,
+    OrderDetailResponse,
+    OrderResponse,
+    OrderTransition,
+)
+from app.schemas.pagination import Page
+from app.settings import EVENTS_HEARTBEAT_SECONDS, FAST_JSON_RESPONSES
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
 
-@router.get("/", response_model=list[OrderResponse])
-def list_orders(
-    db: db_dep,
-    current_user: current_user_dep
+ORDER_SORTABLE = {
+    "id": Order.id,
+    "created_at": Order.created_at,
+}
+ORDER_COLUMNS = columns_for(OrderResponse, Order)
+
+
+@router.get("/", response_model=Page[OrderResponse], dependencies=[query_budget(2)])
+async def list_orders(
+    db: db_read_dep,
+    current_user: current_user_read_dep,
+    pagination: PaginationDep,
+):
+    query = select(*ORDER_COLUMNS) if FAST_JSON_RESPONSES else select(Order)
+    if not current_user.is_superuser:
+        query = query.where(Order.customer_id == current_user.id)
+    page = await pagination.paginate(
+        db,
+        query,
+        ORDER_SORTABLE,
+        default_sort="created_at",
+        default_order="desc",
+        scalars=not FAST_JSON_RESPONSES,
+    )
+    return page_response(page) if FAST_JSON_RESPONSES else page
+
+
+@router.get(
+    "/history/",
+    response_model=Page[OrderDetailResponse],
+    dependencies=[query_budget(3)],
+)
+async def order_history(
+    db: db_read_dep,
+    current_user: current_user_read_dep,
+    pagination: PaginationDep,
+    status: OrderStatus = Query(None),
+    created_from: datetime = Query(None),
+    created_to: datetime = Query(None),
+):
+    """Orders with their line items and courier assignment, newest first.
+
+    Customers page through (customer_id, created_at, id) via its composite
+    index; line items come from one selectin query per page and the
+    assignment is joined in, so a page costs two queries regardless of size.
+    """
+    query = select(Order).options(
+        selectinload(Order.order_items), joinedload(Order.assignment)
+    )
+    if not current_user.is_superuser:
+        query = query.where(Order.customer_id == current_user.id)
+    if status:
+        query = query.where(Order.status == status)
+    if created_from:
+        query = query.where(Order.created_at >= created_from)
+    if created_to:
+        query = query.where(Order.created_at < created_to)
+
+    return await pagination.paginate(
+        db, query, ORDER_SORTABLE, default_sort="created_at", default_order="desc"
+    )
+
+
+EXPORT_COLUMNS = (
+    Order.id,
+    Order.customer_id,
+    Order.restaurant_id,
+    Order.status,
+    Order.total_cents,
+    Order.delivery_address,
+    Order.created_at,
+)
+EXPORT_BATCH_SIZE = 1000
+
+
+def _export_value(value):
+    if isinstance(value, OrderStatus):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+async def _export_rows(query, export_format: str):
+    """Yield the export one batch at a time from a server-side cursor.
+
+    Opens its own session: the response body is produced after the endpoint
+    has returned, so it cannot borrow the request-scoped one.
+    """
+    names = [column.key for column in EXPORT_COLUMNS]
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        yield buffer.getvalue()
+
+    async with await open_read_session() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows([_export_value(v) for v in row] for row in rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps(dict(zip(names, map(_export_value, row), strict=True)))
+                    + "\n"
+                    for row in rows
+                )
+
+
+@router.get("/export/")
+async def export_orders(
+    current_user: current_user_dep,
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    restaurant_id: UUID = Query(None),
+    created_from: datetime = Query(None),
+    created_to: datetime = Query(None),
 ):
-    if current_user.is_superuser:
-        return db.query(Order).all()
-    return db.query(Order).filter(Order.customer_id == current_user.id).all()
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    query = select(*EXPORT_COLUMNS).order_by(Order.created_at, Order.id)
+    if restaurant_id:
+        query = query.where(Order.restaurant_id == restaurant_id)
+    if created_from:
+        query = query.where(Order.created_at >= created_from)
+    if created_to:
+        query = query.where(Order.created_at < created_to)
+
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_rows(query, export_format),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="orders.{export_format}"'
+        },
+    )
+
+
+# total_cents is a 32-bit Integer column.
+ORDER_MAX_TOTAL_CENTS = 2**31 - 1
 
 
 @router.post("/", response_model=OrderResponse)
-def create_order(
-    data: OrderCreate,
-    db: db_dep,
-    current_user: current_user_dep
+async def create_order(
+    data: OrderCreate, db: async_db_dep, current_user: current_user_dep
 ):
-    item = db.query(Item).get(data.item_id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
-
-    order = Order(
-        customer_id=current_user.id,
-        restaurant_id=data.restaurant_id,
-        delivery_address=data.delivery_address,
-        total_cents=data.total_cents,
-        status=data.status,
-    )
-    db.add(order)
-    db.commit()
-    db.refresh(order)
+    # Repeated lines for the same item collapse into one (order_id, item_id) row.
+    quantities: dict[UUID, int] = defaultdict(int)
+    for line in data.items:
+        quantities[line.item_id] += line.quantity
+
+    result = await db.execute(
+        select(Item.id, Item.price_cents, Item.is_available, Item.restaurant_id).where(
+            Item.id.in_(quantities)
+        )
+    )
+    items = {row.id: row for row in result}
+
+    missing = [str(item_id) for item_id in quantities if item_id not in items]
+    if missing:
+        raise HTTPException(
+            status_code=404, detail=f"Item not found: {', '.join(missing)}"
+        )
+    for item in items.values():
+        if item.restaurant_id != data.restaurant_id:
+            raise HTTPException(
+                status_code=400,
+                detail="All items must belong to the order's restaurant",
+            )
+        if not item.is_available:
+            raise HTTPException(
+                status_code=400, detail=f"Item not available: {item.id}"
+            )
+
+    total_cents = sum(
+        items[item_id].price_cents * quantity
+        for item_id, quantity in quantities.items()
+    )
+    if total_cents > ORDER_MAX_TOTAL_CENTS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Order total may not exceed {ORDER_MAX_TOTAL_CENTS} cents",
+        )
+
+    order = (
+        await db.execute(
+            insert(Order)
+            .values(
+                id=uuid4(),
+                customer_id=current_user.id,
+                restaurant_id=data.restaurant_id,
+                delivery_address=data.delivery_address,
+                total_cents=total_cents,
+                status=OrderStatus.PLACED,
+            )
+            .returning(Order)
+        )
+    ).scalar_one()
+    await db.execute(
+        insert(OrderItem),
+        [
+            {
+                "order_id": order.id,
+                "item_id": item_id,
+                "quantity": quantity,
+                "price_at_time": items[item_id].price_cents,
+            }
+            for item_id, quantity in quantities.items()
+        ],
+    )
+    await db.commit()
     return order
 
 
+# Assignment timestamps stamped in the same statement as these transitions.
+ASSIGNMENT_STAMPS = {
+    OrderStatus.PICKED_UP: "picked_up_at",
+    OrderStatus.DONE: "delivered_at",
+}
+
+
+def _transition_scope(user: User, target: OrderStatus):
+    """Return (allowed source statuses, row filter) for ``user``, or None."""
+    sources = ORDER_TRANSITIONS.get(target)
+    if not sources:
+        return None
+    if user.is_superuser or user.is_admin:
+        return sources, true()
+    if user.role == UserRole.COURIER and target in ASSIGNMENT_STAMPS:
+        assigned = select(CourierAssignment.order_id).where(
+            CourierAssignment.courier_id == user.id
+        )
+        return sources, Order.id.in_(assigned)
+    if target == OrderStatus.CANCELLED:
+        # Customers may only withdraw an order the restaurant has not accepted.
+        return frozenset({OrderStatus.PLACED}), Order.customer_id == user.id
+    return None
+
+
+@router.post("/{order_id}/transition/", response_model=OrderResponse)
+async def transition_order(
+    order_id: UUID,
+    data: OrderTransition,
+    db: async_db_dep,
+    current_user: current_user_dep,
+):
+    """Move an order to ``data.status`` with one conditional UPDATE.
+
+    The WHERE clause carries both the legal source statuses and the caller's
+    scope, so concurrent callers (tablet, courier, customer) race safely:
+    exactly one wins, the rest match no row. No lock outlives the statement.
+    """
+    target = OrderStatus(data.status.value)
+    scope = _transition_scope(current_user, target)
+    if scope is None:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    sources, row_filter = scope
+
+    updated = (
+        update(Order)
+        .where(Order.id == order_id, Order.status.in_(sources), row_filter)
+        .values(status=target, updated_at=func.now())
+        .returning(*Order.__table__.c)
+        .cte("updated")
+    )
+    stmt = select(updated)
+    stamp = ASSIGNMENT_STAMPS.get(target)
+    if stamp:
+        # Data-modifying CTE: runs in the same statement even though the
+        # outer SELECT does not read from it.
+        stmt = stmt.add_cte(
+            update(CourierAssignment)
+            .where(CourierAssignment.order_id.in_(select(updated.c.id)))
+            .values({stamp: func.timezone("UTC", func.now())})
+            .cte("stamped")
+        )
+
+    order = (await db.execute(stmt)).mappings().one_or_none()
+    await db.commit()
+    if order is not None:
+        await publish_order_event(
+            order_id,
+            "status",
+            order=OrderResponse.model_validate(order, from_attributes=True).model_dump(
+                mode="json"
+            ),
+            updated_at=order["updated_at"],
+        )
+        return order
+
+    # No row matched: tell "not yours" (403) apart from "not from this
+    # status" (409), the latter also for a customer's order the restaurant
+    # has already accepted.
+    found = (
+        await db.execute(
+            select(Order.status, row_filter.label("in_scope")).where(
+                Order.id == order_id
+            )
+        )
+    ).one_or_none()
+    if found is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    current, in_scope = found
+    if not in_scope:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    raise HTTPException(
+        status_code=409,
+        detail=f"Cannot move order from {current.value} to {target.value}",
+    )
+
+
+TERMINAL_STATUSES = frozenset({OrderStatus.DONE, OrderStatus.CANCELLED})
+
+
+async def _watch_snapshot(db: AsyncSession, user: User, order_id: UUID) -> dict:
+    """Current state of an order ``user`` may follow, as the first event."""
+    order = await db.scalar(
+        select(Order).options(joinedload(Order.assignment)).where(Order.id == order_id)
+    )
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+
+    assignment = order.assignment
+    if not (
+        user.is_superuser
+        or user.is_admin
+        or order.customer_id == user.id
+        or (assignment is not None and assignment.courier_id == user.id)
+    ):
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return {
+        "type": "snapshot",
+        "order_id": str(order.id),
+        "order": OrderResponse.model_validate(order, from_attributes=True).model_dump(
+            mode="json"
+        ),
+        "updated_at": order.updated_at.isoformat() if order.updated_at else None,
+        "assignment": (
+            CourierAssignmentResponse.model_validate(
+                assignment, from_attributes=True
+            ).model_dump(mode="json")
+            if assignment is not None
+            else None
+        ),
+    }
+
+
+def _is_final(message: str) -> bool:
+    order = json.loads(message).get("order")
+    return order is not None and OrderStatus(order["status"]) in TERMINAL_STATUSES
+
+
+async def _sse_events(subscription, snapshot: dict):
+    yield f"data: {json.dumps(snapshot)}\n\n"
+    if OrderStatus(snapshot["order"]["status"]) in TERMINAL_STATUSES:
+        return
+
+    while True:
+        try:
+            message = await asyncio.wait_for(
+                subscription.get(), timeout=EVENTS_HEARTBEAT_SECONDS
+            )
+        except TimeoutError:
+            # Comment line: keeps proxies from reaping the idle connection.
+            yield ": ping\n\n"
+            continue
+        yield f"data: {message}\n\n"
+        if _is_final(message):
+            return
+
+
+@router.get("/{order_id}/events/")
+async def order_events(
+    order_id: UUID,
+    db: async_db_dep,
+    current_user: current_user_dep,
+):
+    """Server-sent events for one order: a snapshot, then every change.
+
+    Subscribes before reading the snapshot so no change can slip in between;
+    a change that lands in both is simply delivered twice. The stream ends
+    once the order is done or cancelled.
+    """
+    subscribed = AsyncExitStack()
+    sub = await subscribed.enter_async_context(
+        broadcaster.subscribe(order_channel(order_id))
+    )
+    try:
+        snapshot = await _watch_snapshot(db, current_user, order_id)
+    except BaseException:
+        await subscribed.aclose()
+        raise
+    # An idle stream must not pin a pooled connection.
+    await db.close()
+
+    async def stream():
+        async with subscribed:
+            async for chunk in _sse_events(sub, snapshot):
+                yield chunk
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _ws_relay(websocket: WebSocket, subscription) -> None:
+    """Forward ``subscription`` to an accepted socket until it closes."""
+    # Clients only listen; a pending receive is how a disconnect shows up.
+    receiver = asyncio.create_task(websocket.receive())
+    try:
+        while True:
+            getter = asyncio.create_task(subscription.get())
+            done, _ = await asyncio.wait(
+                {getter, receiver},
+                timeout=EVENTS_HEARTBEAT_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                getter.cancel()
+                await websocket.send_json({"type": "ping"})
+                continue
+
+            # Both can finish in the same wait; an event already taken
+            # off the queue must still go out unless the client is gone.
+            if receiver in done:
+                if receiver.result()["type"] == "websocket.disconnect":
+                    getter.cancel()
+                    return
+                receiver = asyncio.create_task(websocket.receive())
+            if getter not in done:
+                getter.cancel()
+                continue
+
+            message = getter.result()
+            await websocket.send_text(message)
+            if _is_final(message):
+                await websocket.close()
+                return
+    except WebSocketDisconnect:
+        return
+    finally:
+        receiver.cancel()
+
+
+# Browsers cannot set headers on a WebSocket handshake, so the access token
+# travels as a subprotocol: ``new WebSocket(url, ["bearer", token])``. Unlike a
+# query string it stays out of access logs and proxy URLs.
+WS_AUTH_PROTOCOL = "bearer"
+
+
+def _ws_token(websocket: WebSocket) -> str:
+    protocols = websocket.scope.get("subprotocols", [])
+    if len(protocols) == 2 and protocols[0] == WS_AUTH_PROTOCOL:
+        return protocols[1]
+    return ""
+
+
+@router.websocket("/{order_id}/ws")
+async def order_events_ws(websocket: WebSocket, order_id: UUID):
+    """WebSocket twin of :func:`order_events`, authenticated through the
+    ``Sec-WebSocket-Protocol`` header (see ``WS_AUTH_PROTOCOL``)."""
+    async with broadcaster.subscribe(order_channel(order_id)) as sub:
+        try:
+            async with AsyncSessionLocal() as db:
+                user = await authenticate_token(_ws_token(websocket), db)
+                snapshot = await _watch_snapshot(db, user, order_id)
+        except HTTPException as e:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+            return
+
+        await websocket.accept(subprotocol=WS_AUTH_PROTOCOL)
+        await websocket.send_text(json.dumps(snapshot))
+        if OrderStatus(snapshot["order"]["status"]) in TERMINAL_STATUSES:
+            await websocket.close()
+            return
+
+        await _ws_relay(websocket, sub)
+
+
 @router.delete("/{order_id}/", response_model=dict)
-def delete_order(
-    order_id: int,
-    db: db_dep,
-    current_user: current_user_dep
+async def delete_order(
+    order_id: UUID, db: async_db_dep, current_user: current_user_dep
 ):
-    order = db.query(Order).get(order_id).first()
+    order = await db.get(Order, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
     if order.customer_id != current_user.id and not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    db.delete(order)
-    db.commit()
+    await db.delete(order)
+    await db.commit()
     return {"detail": "Order deleted"}
@@ -1,85 +1,373 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from app.models import Restaurant
-from app.schemas.restaurant import RestaurantCreate, RestaurantUpdate, RestaurantResponse
-from app.dependencies import db_dep, current_user_dep
+import asyncio
+import csv
+import io
+import json
+from typing import Literal
+from uuid import UUID
+
+from fastapi import (
+    APIRouter,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
+from pydantic import ValidationError
+from sqlalchemy import Float, func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import with_expression
+
+from app.cache import menu_cache
+from app.dependencies import (
+    PaginationDep,
+    async_db_dep,
+    current_user_dep,
+    db_read_dep,
+)
+from app.geo import SRID, point
+from app.models import Item, Restaurant
+from app.responses import columns_for, page_response
+from app.schemas.item import BulkImportResponse, BulkItemRow, BulkRowError
+from app.schemas.pagination import Page
+from app.schemas.restaurant import (
+    MenuResponse,
+    NearbyRestaurantResponse,
+    RestaurantCreate,
+    RestaurantResponse,
+    RestaurantUpdate,
+)
+from app.settings import FAST_JSON_RESPONSES
 
 router = APIRouter(prefix="/restaurants", tags=["Restaurants"])
 
 
-@router.get("/", response_model=list[RestaurantResponse])
-def list_restaurants(
-    db: db_dep,
+RESTAURANT_SORTABLE = {
+    "id": Restaurant.id,
+    "name": Restaurant.name,
+}
+RESTAURANT_COLUMNS = columns_for(
+    RestaurantResponse,
+    Restaurant,
+    latitude=func.ST_Y(Restaurant.location),
+    longitude=func.ST_X(Restaurant.location),
+)
+
+
+@router.get("/", response_model=Page[RestaurantResponse])
+async def list_restaurants(
+    db: db_read_dep,
+    pagination: PaginationDep,
     name: str = Query(None),
-    skip: int = 0,
-    limit: int = 10,
-    sort_by: str = Query("id"),
-    sort_order: str = Query("asc"),
 ):
-    query = db.query(Restaurant)
+    query = select(*RESTAURANT_COLUMNS) if FAST_JSON_RESPONSES else select(Restaurant)
     if name:
-        query = query.filter(Restaurant.name.ilike(f"%{name}%"))
+        query = query.where(Restaurant.name.ilike(f"%{name}%"))
+
+    page = await pagination.paginate(
+        db, query, RESTAURANT_SORTABLE, scalars=not FAST_JSON_RESPONSES
+    )
+    return page_response(page) if FAST_JSON_RESPONSES else page
+
+
+NEARBY_MAX_RADIUS_METERS = 50_000
+
+
+@router.get("/nearby/", response_model=Page[NearbyRestaurantResponse])
+async def nearby_restaurants(
+    db: db_read_dep,
+    pagination: PaginationDep,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: float = Query(
+        2000, gt=0, le=NEARBY_MAX_RADIUS_METERS, description="Meters"
+    ),
+    is_open: bool = Query(None),
+):
+    """Restaurants within ``radius`` meters of (lat, lon), nearest first.
+
+    ST_DWithin does a bounding-box probe of the geography GiST index before
+    the exact distance check, so cost tracks the restaurants in range rather
+    than the table; <-> gives the same sphere distance for ordering.
+    """
+    here = func.geography(func.ST_SetSRID(func.ST_MakePoint(lon, lat), SRID))
+    there = func.geography(Restaurant.location)
+    distance = there.op("<->", return_type=Float)(here).label("distance")
 
-    sort_column = getattr(Restaurant, sort_by, Restaurant.id)
-    if sort_order == "desc":
-        sort_column = sort_column.desc()
-    else:
-        sort_column = sort_column.asc()
+    query = (
+        select(Restaurant)
+        .options(with_expression(Restaurant.distance, distance))
+        .where(func.ST_DWithin(there, here, radius))
+    )
+    if is_open is not None:
+        query = query.where(Restaurant.is_open.is_(is_open))
 
-    return query.order_by(sort_column).offset(skip).limit(limit).all()
+    return await pagination.paginate(
+        db, query, {"distance": distance, "id": Restaurant.id}, default_sort="distance"
+    )
 
 
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x".
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+@router.get("/{restaurant_id}/menu/", response_model=MenuResponse)
+async def get_menu(restaurant_id: UUID, request: Request, db: async_db_dep):
+    # A miss is read from the primary: it often follows an invalidation, and
+    # a lagging replica would put the old menu (and its ETag) back in cache.
+    # The session only takes a connection if it gets that far.
+    entry = await menu_cache.get(restaurant_id)
+    if entry is None:
+        generation = menu_cache.generation
+        restaurant = await db.get(Restaurant, restaurant_id)
+        if not restaurant:
+            raise HTTPException(status_code=404, detail="Restaurant not found")
+
+        result = await db.execute(
+            select(Item)
+            .where(Item.restaurant_id == restaurant_id, Item.is_available.is_(True))
+            .order_by(Item.name, Item.id)
+        )
+        menu = MenuResponse.model_validate(
+            {"restaurant": restaurant, "items": result.scalars().all()},
+            from_attributes=True,
+        )
+        entry = await menu_cache.set(
+            restaurant_id, menu.model_dump_json().encode(), generation
+        )
+
+    etag, body = entry
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _location(fields: dict):
+    """Pop latitude/longitude from ``fields`` and turn them into a point."""
+    latitude = fields.pop("latitude", None)
+    longitude = fields.pop("longitude", None)
+    if (latitude is None) != (longitude is None):
+        raise HTTPException(
+            status_code=400, detail="latitude and longitude must be given together"
+        )
+    if latitude is None:
+        return None
+    return point(latitude, longitude)
+
 
 @router.post("/", response_model=RestaurantResponse)
-def create_restaurant(
-    data: RestaurantCreate,
-    db: db_dep,
-    current_user: current_user_dep
+async def create_restaurant(
+    data: RestaurantCreate, db: async_db_dep, current_user: current_user_dep
 ):
     if not current_user.is_superuser and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    restaurant = Restaurant(**data.model_dump())
+    fields = data.model_dump()
+    restaurant = Restaurant(location=_location(fields), **fields)
     db.add(restaurant)
-    db.commit()
-    db.refresh(restaurant)
+    await db.commit()
+    await db.refresh(restaurant)
     return restaurant
 
 
 @router.put("/{restaurant_id}/", response_model=RestaurantResponse)
-def update_restaurant(
-    restaurant_id: int,
+async def update_restaurant(
+    restaurant_id: UUID,
     data: RestaurantUpdate,
-    db: db_dep,
-    current_user: current_user_dep
+    db: async_db_dep,
+    current_user: current_user_dep,
 ):
     if not current_user.is_superuser and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    restaurant = db.query(Restaurant).get(restaurant_id).first()
+    restaurant = await db.get(Restaurant, restaurant_id)
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
 
-    for field, value in data.model_dump(exclude_unset=True).items():
+    fields = data.model_dump(exclude_unset=True)
+    if "latitude" in fields or "longitude" in fields:
+        restaurant.location = _location(fields)
+    for field, value in fields.items():
         setattr(restaurant, field, value)
 
-    db.commit()
-    db.refresh(restaurant)
+    await db.commit()
+    await menu_cache.invalidate(restaurant_id)
+    await db.refresh(restaurant)
     return restaurant
 
 
 @router.delete("/{restaurant_id}/", response_model=dict)
-def delete_restaurant(
-    restaurant_id: int,
-    db: db_dep,
-    current_user: current_user_dep
+async def delete_restaurant(
+    restaurant_id: UUID, db: async_db_dep, current_user: current_user_dep
+):
+    if not current_user.is_superuser and not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    restaurant = await db.get(Restaurant, restaurant_id)
+    if not restaurant:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+
+    await db.delete(restaurant)
+    await db.commit()
+    await menu_cache.invalidate(restaurant_id)
+    return {"detail": "Restaurant deleted"}
+
+
+BULK_IMPORT_BATCH_SIZE = 1000
+BULK_IMPORT_MAX_ROWS = 50_000
+BULK_UPDATE_FIELDS = (
+    "name",
+    "description",
+    "price_cents",
+    "image",
+    "is_available",
+    "is_recommended",
+)
+
+
+def _bulk_records(file, import_format: str):
+    """Yield raw records from the upload one at a time, without loading it whole.
+
+    A record that cannot be parsed comes out as the error message instead.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if import_format == "csv":
+        reader = csv.DictReader(text)
+        while True:
+            try:
+                record = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield f"invalid CSV: {e}"
+                continue
+            # Empty CSV cells mean "not given", not "empty string".
+            yield {k: v for k, v in record.items() if k is not None and v != ""}
+
+    for line in text:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield "invalid JSON"
+
+
+def _parse_upload(file, import_format: str) -> tuple[list[dict], list[BulkRowError]]:
+    """Validated, de-duplicated rows of the upload and the errors of the rest.
+
+    Blocking (file reads and per-row validation); run it in a thread.
+    """
+    rows: list[dict] = []
+    errors: list[BulkRowError] = []
+    seen: dict[str, int] = {}
+    for number, record in enumerate(_bulk_records(file, import_format), start=1):
+        if number > BULK_IMPORT_MAX_ROWS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"At most {BULK_IMPORT_MAX_ROWS} rows per import",
+            )
+        if isinstance(record, str):
+            errors.append(BulkRowError(row=number, errors=[record]))
+            continue
+        if not isinstance(record, dict):
+            errors.append(BulkRowError(row=number, errors=["not a JSON object"]))
+            continue
+
+        try:
+            row = BulkItemRow.model_validate(record)
+        except ValidationError as e:
+            sku = record.get("sku")
+            errors.append(
+                BulkRowError(
+                    row=number,
+                    sku=None if sku is None else str(sku),
+                    errors=[
+                        f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                        for err in e.errors()
+                    ],
+                )
+            )
+            continue
+
+        if row.sku in seen:
+            errors.append(
+                BulkRowError(
+                    row=number,
+                    sku=row.sku,
+                    errors=[f"duplicate sku, first seen in row {seen[row.sku]}"],
+                )
+            )
+            continue
+        seen[row.sku] = number
+        rows.append(row.model_dump())
+    return rows, errors
+
+
+async def _upsert_items(db, restaurant_id: UUID, rows: list[dict]) -> int:
+    """Batched INSERT ... ON CONFLICT (restaurant_id, sku) DO UPDATE.
+
+    Passing the rows as executemany parameters lets SQLAlchemy send them as
+    multi-row VALUES ("insertmanyvalues") from one cached compiled statement.
+    Returns how many rows were new: ``xmax = 0`` only holds for tuples this
+    statement inserted rather than updated.
+    """
+    stmt = pg_insert(Item)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_items_restaurant_id_sku",
+        set_={field: stmt.excluded[field] for field in BULK_UPDATE_FIELDS},
+    ).returning(literal_column("xmax = 0"))
+    result = await db.execute(
+        stmt, [{**row, "restaurant_id": restaurant_id} for row in rows]
+    )
+    return sum(1 for (inserted,) in result if inserted)
+
+
+@router.post("/{restaurant_id}/items/bulk/", response_model=BulkImportResponse)
+async def bulk_import_items(
+    restaurant_id: UUID,
+    db: async_db_dep,
+    current_user: current_user_dep,
+    file: UploadFile = File(...),
+    import_format: Literal["csv", "ndjson"] = Query(None, alias="format"),
 ):
     if not current_user.is_superuser and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    restaurant = db.query(Restaurant).get(restaurant_id).first()
+    restaurant = await db.get(Restaurant, restaurant_id)
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
 
-    db.delete(restaurant)
-    db.commit()
-    return {"detail": "Restaurant deleted"}
\ No newline at end of file
+    if import_format is None:
+        is_csv = (file.filename or "").endswith(
+            ".csv"
+        ) or file.content_type == "text/csv"
+        import_format = "csv" if is_csv else "ndjson"
+
+    try:
+        rows, errors = await asyncio.to_thread(_parse_upload, file.file, import_format)
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail="File must be UTF-8") from e
+
+    inserted = 0
+    for start in range(0, len(rows), BULK_IMPORT_BATCH_SIZE):
+        batch = rows[start : start + BULK_IMPORT_BATCH_SIZE]
+        inserted += await _upsert_items(db, restaurant_id, batch)
+
+    await db.commit()
+    await menu_cache.invalidate(restaurant_id)
+    return BulkImportResponse(
+        processed=len(rows),
+        inserted=inserted,
+        updated=len(rows) - inserted,
+        errors=errors,
+    )
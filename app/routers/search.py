@@ -0,0 +1,65 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Query
+from sqlalchemy import func, literal, or_, select
+
+from app.dependencies import db_read_dep
+from app.models import Item, Restaurant
+from app.responses import columns_for
+from app.schemas.search import ItemSearchResult, RestaurantSearchResult, SearchResponse
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+# Response fields backed by properties rather than columns.
+LOCATION = {
+    Restaurant: {
+        "latitude": func.ST_Y(Restaurant.location),
+        "longitude": func.ST_X(Restaurant.location),
+    },
+}
+
+
+def _ranked(model, schema, q: str):
+    """Full-text match on name/description, or a fuzzy (trigram) match on name.
+
+    Both predicates are served by GIN indexes (search_vector and
+    gin_trgm_ops on name), so the OR becomes a BitmapOr rather than a scan.
+    Only the columns the response needs are selected.
+    """
+    tsquery = func.websearch_to_tsquery("simple", q)
+    rank = func.greatest(
+        func.ts_rank_cd(model.search_vector, tsquery),
+        func.word_similarity(q, model.name),
+    ).label("rank")
+    return (
+        select(*columns_for(schema, model, rank=rank, **LOCATION.get(model, {})))
+        .where(
+            or_(
+                model.search_vector.op("@@")(tsquery),
+                literal(q).op("<%")(model.name),
+            )
+        )
+        .order_by(rank.desc(), model.id)
+    )
+
+
+@router.get("/", response_model=SearchResponse)
+async def search(
+    db: db_read_dep,
+    q: str = Query(..., min_length=2, max_length=100),
+    restaurant_id: UUID = Query(None),
+    limit: int = Query(20, ge=1, le=50),
+):
+    items_query = _ranked(Item, ItemSearchResult, q)
+    if restaurant_id:
+        items_query = items_query.where(Item.restaurant_id == restaurant_id)
+    items = (await db.execute(items_query.limit(limit))).mappings().all()
+
+    restaurants = []
+    if not restaurant_id:
+        restaurants_query = _ranked(Restaurant, RestaurantSearchResult, q)
+        restaurants = (
+            (await db.execute(restaurants_query.limit(limit))).mappings().all()
+        )
+
+    return {"items": items, "restaurants": restaurants}
@@ -1,39 +1,46 @@
 from fastapi import APIRouter, HTTPException
-from app.models import User
-from app.schemas.user import UserResponse, UserUpdate
-from app.dependencies import db_dep, current_user_dep
+
+from app.cache import principal_cache
+from app.dependencies import async_db_dep, current_user_dep, current_user_read_dep
+from app.hashing import check_password, hash_password
 from app.schemas.password import ChangePasswordRequest
-from app.utils import verify_password, get_password_hash
+from app.schemas.user import UserResponse, UserUpdate
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.get("/me/", response_model=UserResponse)
-def get_me(current_user: current_user_dep):
+async def get_me(current_user: current_user_read_dep):
     return current_user
 
 
 @router.put("/me/", response_model=UserResponse)
-def update_me(
+async def update_me(
     update_data: UserUpdate,
-    db: db_dep,
+    db: async_db_dep,
     current_user: current_user_dep,
 ):
+    old_email = current_user.email
     for field, value in update_data.model_dump(exclude_unset=True).items():
         setattr(current_user, field, value)
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await principal_cache.invalidate(old_email, current_user.email)
+    await db.refresh(current_user)
     return current_user
 
+
 @router.post("/change-password/", response_model=dict)
-def change_password(
+async def change_password(
     data: ChangePasswordRequest,
-    db: db_dep,
+    db: async_db_dep,
     current_user: current_user_dep,
 ):
-    if not verify_password(data.old_password, current_user.hashed_pw):
+    # Cached principals do not carry the hash.
+    await db.refresh(current_user, ["hashed_pw"])
+    if not await check_password(data.old_password, current_user.hashed_pw):
         raise HTTPException(status_code=400, detail="Incorrect current password")
 
-    current_user.hashed_pw = get_password_hash(data.new_password)
-    db.commit()
-    return {"detail": "Password updated successfully"}
\ No newline at end of file
+    current_user.hashed_pw = await hash_password(data.new_password)
+    await db.commit()
+    await principal_cache.invalidate(current_user.email)
+    return {"detail": "Password updated successfully"}
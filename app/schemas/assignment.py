@@ -1,6 +1,7 @@
 from datetime import datetime
 from uuid import UUID
-from pydantic import BaseModel
+
+from pydantic import BaseModel, ConfigDict
 
 
 class CourierAssignmentResponse(BaseModel):
@@ -10,5 +11,4 @@ class CourierAssignmentResponse(BaseModel):
     picked_up_at: datetime | None = None
     delivered_at: datetime | None = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
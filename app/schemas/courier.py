@@ -0,0 +1,15 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class CourierLocationUpdate(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    is_available: bool = True
+
+
+class CourierLocationResponse(CourierLocationUpdate):
+    courier_id: UUID
+    updated_at: datetime
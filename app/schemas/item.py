@@ -1,11 +1,13 @@
-from pydantic import BaseModel
 from uuid import UUID
 
+from pydantic import BaseModel, ConfigDict, Field
+
 
 class ItemBase(BaseModel):
     name: str
-    description: str
+    description: str | None = None
     price_cents: int
+    sku: str | None = None
 
 
 class ItemCreate(ItemBase):
@@ -15,9 +17,32 @@ class ItemCreate(ItemBase):
 class ItemUpdate(ItemBase):
     pass
 
+
 class ItemResponse(ItemBase):
     id: UUID
     restaurant_id: UUID
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BulkItemRow(BaseModel):
+    sku: str = Field(..., min_length=1, max_length=64)
+    name: str = Field(..., min_length=1)
+    description: str | None = None
+    price_cents: int = Field(..., ge=0)
+    image: str | None = None
+    is_available: bool = True
+    is_recommended: bool = False
+
+
+class BulkRowError(BaseModel):
+    row: int
+    sku: str | None = None
+    errors: list[str]
+
+
+class BulkImportResponse(BaseModel):
+    processed: int
+    inserted: int
+    updated: int
+    errors: list[BulkRowError]
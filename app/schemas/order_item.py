@@ -1,7 +1,10 @@
 from datetime import datetime
 from enum import Enum
 from uuid import UUID
-from pydantic import BaseModel
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.schemas.assignment import CourierAssignmentResponse
 
 
 class OrderStatus(str, Enum):
@@ -15,13 +18,17 @@ class OrderStatus(str, Enum):
 
 class OrderItemCreate(BaseModel):
     item_id: UUID
-    quantity: int
+    quantity: int = Field(..., ge=1, le=99)
 
 
 class OrderCreate(BaseModel):
     restaurant_id: UUID
     delivery_address: str
-    items: list[OrderItemCreate]
+    items: list[OrderItemCreate] = Field(..., min_length=1, max_length=100)
+
+
+class OrderTransition(BaseModel):
+    status: OrderStatus
 
 
 class OrderResponse(BaseModel):
@@ -33,5 +40,17 @@ class OrderResponse(BaseModel):
     status: OrderStatus
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class OrderItemResponse(BaseModel):
+    item_id: UUID
+    quantity: int
+    price_at_time: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class OrderDetailResponse(OrderResponse):
+    order_items: list[OrderItemResponse]
+    assignment: CourierAssignmentResponse | None = None
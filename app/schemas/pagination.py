@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class Page[T](BaseModel):
+    items: list[T]
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
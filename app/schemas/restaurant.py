@@ -1,6 +1,9 @@
-from pydantic import BaseModel, EmailStr
 from uuid import UUID
 
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
+
+from app.schemas.item import ItemResponse
+
 
 class RestaurantBase(BaseModel):
     name: str
@@ -9,6 +12,8 @@ class RestaurantBase(BaseModel):
     email: EmailStr
     description: str | None = None
     operating_hours: str
+    latitude: float | None = Field(None, ge=-90, le=90)
+    longitude: float | None = Field(None, ge=-180, le=180)
 
 
 class RestaurantCreate(RestaurantBase):
@@ -22,10 +27,22 @@ class RestaurantUpdate(BaseModel):
     email: EmailStr | None = None
     description: str | None = None
     operating_hours: str | None = None
+    latitude: float | None = Field(None, ge=-90, le=90)
+    longitude: float | None = Field(None, ge=-180, le=180)
 
 
 class RestaurantResponse(RestaurantBase):
     id: UUID
+    # Checked on the way in; EmailStr's IDNA checks per row dominated list pages.
+    email: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class NearbyRestaurantResponse(RestaurantResponse):
+    distance: float
+
 
-    class Config:
-        orm_mode = True
+class MenuResponse(BaseModel):
+    restaurant: RestaurantResponse
+    items: list[ItemResponse]
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+
+from app.schemas.item import ItemResponse
+from app.schemas.restaurant import RestaurantResponse
+
+
+class ItemSearchResult(ItemResponse):
+    rank: float
+
+
+class RestaurantSearchResult(RestaurantResponse):
+    rank: float
+
+
+class SearchResponse(BaseModel):
+    items: list[ItemSearchResult]
+    restaurants: list[RestaurantSearchResult]
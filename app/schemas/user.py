@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
-from uuid import UUID
 from enum import Enum
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, EmailStr
 
 
 class UserRole(str, Enum):
@@ -32,5 +33,4 @@ class UserResponse(UserBase):
     is_active: bool
     is_verified: bool
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
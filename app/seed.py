@@ -0,0 +1,496 @@
+"""Bulk synthetic data for capacity testing, streamed in with COPY.
+
+Usage: python -m app.seed [--users N] [--restaurants N] [--orders N]
+           [--items-per-restaurant N] [--couriers N] [--batch-size N]
+           [--jobs N] [--seed N] [--reset]
+
+Loads into the database from the DB_* settings, whose schema must already
+be at ``alembic upgrade head``. Rows are cut into fixed batches, and every
+batch is generated from ``(seed, table, batch number)`` alone, so batches
+can run in any order and in parallel worker processes and still produce
+the same rows. Ids are derived from row numbers too, which is how an order
+knows its customer's and items' ids without asking the database.
+
+Each batch is committed together with its row in ``seed_batches``. An
+interrupted run picks up where it stopped when started again with the same
+arguments. ``--reset`` truncates the app's tables first.
+
+Popularity is skewed: restaurants and customers are drawn from Zipf-like
+distributions over a shuffled ranking, so a few of each account for most
+orders.
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import UTC, datetime
+
+import numpy as np
+
+from app.database import engine
+from app.geo import SRID
+from app.models import OrderStatus, UserRole
+from app.utils import get_password_hash
+
+PASSWORD = "seed-password"
+EMAIL_DOMAIN = "seed.quickbite.example.com"
+HISTORY_SECONDS = 180 * 86400
+CENTER = (52.52, 13.40)
+MAX_LINES = 4
+NULL = "\\N"
+
+# Namespaces for the ids and random streams of each table.
+PARTS = {"users": 1, "restaurants": 2, "items": 3, "orders": 4}
+
+# Shared with benchmarks/dataset.py, so both datasets have the same shape.
+# Share of orders in each status; mostly history, a live tail.
+STATUS_WEIGHTS = {
+    OrderStatus.DONE: 0.85,
+    OrderStatus.CANCELLED: 0.05,
+    OrderStatus.PLACED: 0.03,
+    OrderStatus.ACCEPTED: 0.03,
+    OrderStatus.READY: 0.02,
+    OrderStatus.PICKED_UP: 0.02,
+}
+ASSIGNED_STATUSES = (OrderStatus.READY, OrderStatus.PICKED_UP, OrderStatus.DONE)
+# Zipf exponents of restaurant and customer popularity.
+RESTAURANT_SKEW = 1.1
+CUSTOMER_SKEW = 0.8
+
+STATUS_NAMES = np.array([status.name for status in STATUS_WEIGHTS])
+STATUS_P = np.array(list(STATUS_WEIGHTS.values()))
+ASSIGNED = np.isin(STATUS_NAMES, [status.name for status in ASSIGNED_STATUSES])
+
+# TRUNCATE order for --reset; CASCADE covers the rest.
+TABLES = (
+    "courier_assignments",
+    "courier_locations",
+    "order_items",
+    "orders",
+    "items",
+    "restaurants",
+    "users",
+)
+
+PROGRESS_DDL = """
+CREATE TABLE IF NOT EXISTS seed_batches (
+    part text NOT NULL,
+    batch integer NOT NULL,
+    config text NOT NULL,
+    PRIMARY KEY (part, batch)
+)
+"""
+
+
+def row_id(part: str, n: int) -> str:
+    """Deterministic, valid version-4 UUID for row ``n`` of ``part``.
+
+    Sequential within a table, which also keeps the primary key index
+    appends cheap while loading.
+    """
+    return f"{PARTS[part]:08x}-0000-4000-8000-{n:012x}"
+
+
+def zipf_weights(n: int, s: float) -> np.ndarray:
+    """Probability of each of ``n`` ranks under a Zipf-like law with exponent ``s``."""
+    weights = 1 / np.arange(1, n + 1) ** s
+    return weights / weights.sum()
+
+
+def _rng(config: dict, part: str, batch: int) -> np.random.Generator:
+    return np.random.default_rng([config["seed"], PARTS[part], batch])
+
+
+def _ts(epoch: np.ndarray) -> list[str]:
+    return np.datetime_as_string(epoch.astype("datetime64[s]"), unit="s").tolist()
+
+
+class _World:
+    """Per-process lookup tables shared by every batch: who is popular and
+    what each item costs. Derived from the config, so identical everywhere."""
+
+    def __init__(self, config: dict):
+        rng = np.random.default_rng([config["seed"], 0])
+        restaurants = config["restaurants"]
+        per_restaurant = config["items_per_restaurant"]
+        self.customer_offset = 1 + config["couriers"]
+        customers = config["users"] - self.customer_offset
+
+        self.restaurant_rank = rng.permutation(restaurants)
+        self.restaurant_p = zipf_weights(restaurants, RESTAURANT_SKEW)
+        self.customer_rank = rng.permutation(customers) + self.customer_offset
+        self.customer_p = zipf_weights(customers, CUSTOMER_SKEW)
+        self.item_price = rng.integers(30, 300, restaurants * per_restaurant) * 10
+
+
+_config: dict = {}
+_world: _World | None = None
+
+
+def _init_worker(config: dict) -> None:
+    global _config, _world
+    # Connections inherited from the parent belong to the parent.
+    engine.dispose(close=False)
+    _config = config
+    _world = _World(config)
+
+
+def _copy(cursor, table: str, columns: tuple, lines: list[str]) -> None:
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN",
+        io.StringIO("".join(lines)),
+    )
+
+
+def _users(cursor, start: int, stop: int) -> int:
+    hashed_pw = _config["hashed_pw"]
+    couriers = _config["couriers"]
+    lines = []
+    for n in range(start, stop):
+        role = (
+            UserRole.ADMIN
+            if n == 0
+            else UserRole.COURIER
+            if n <= couriers
+            else UserRole.CUSTOMER
+        )
+        lines.append(
+            f"{row_id('users', n)}\tuser{n}\tuser{n}@{EMAIL_DOMAIN}\t{hashed_pw}\t"
+            f"{role.name}\tt\tt\t{'t' if n == 0 else 'f'}\n"
+        )
+    _copy(
+        cursor,
+        "users",
+        (
+            "id",
+            "username",
+            "email",
+            "hashed_pw",
+            "role",
+            "is_active",
+            "is_verified",
+            "is_superuser",
+        ),
+        lines,
+    )
+    return len(lines)
+
+
+def _restaurants(cursor, start: int, stop: int, batch: int) -> int:
+    rng = _rng(_config, "restaurants", batch)
+    count = stop - start
+    lat = rng.normal(CENTER[0], 0.05, count)
+    lon = rng.normal(CENTER[1], 0.08, count)
+    rating = np.round(rng.uniform(3.0, 5.0, count), 1)
+    is_open = rng.random(count) < 0.8
+    lines = [
+        f"{row_id('restaurants', n)}\tRestaurant {n}\t{n % 500 + 1} Seed Street\t"
+        f"+49{3000000000 + n}\trestaurant{n}@{EMAIL_DOMAIN}\t10:00-22:00\t"
+        f"{rating[i]}\t{'t' if is_open[i] else 'f'}\t"
+        f"SRID={SRID};POINT({lon[i]:.6f} {lat[i]:.6f})\n"
+        for i, n in enumerate(range(start, stop))
+    ]
+    _copy(
+        cursor,
+        "restaurants",
+        (
+            "id",
+            "name",
+            "address",
+            "phone",
+            "email",
+            "operating_hours",
+            "rating",
+            "is_open",
+            "location",
+        ),
+        lines,
+    )
+    return len(lines)
+
+
+def _items(cursor, start: int, stop: int, batch: int) -> int:
+    """Items ``start..stop`` by global item number; restaurant = n // per_restaurant."""
+    rng = _rng(_config, "items", batch)
+    per_restaurant = _config["items_per_restaurant"]
+    available = rng.random(stop - start) < 0.95
+    lines = [
+        f"{row_id('items', n)}\tItem {n % per_restaurant} of {n // per_restaurant}\t"
+        f"Seeded menu item\t{_world.item_price[n]}\tSKU-{n % per_restaurant}\t"
+        f"{'t' if available[i] else 'f'}\tf\t{row_id('restaurants', n // per_restaurant)}\n"
+        for i, n in enumerate(range(start, stop))
+    ]
+    _copy(
+        cursor,
+        "items",
+        (
+            "id",
+            "name",
+            "description",
+            "price_cents",
+            "sku",
+            "is_available",
+            "is_recommended",
+            "restaurant_id",
+        ),
+        lines,
+    )
+    return len(lines)
+
+
+def _orders(cursor, start: int, stop: int, batch: int) -> int:
+    """Orders plus their line items and courier assignments."""
+    rng = _rng(_config, "orders", batch)
+    world = _world
+    per_restaurant = _config["items_per_restaurant"]
+    count = stop - start
+
+    restaurant = world.restaurant_rank[
+        rng.choice(len(world.restaurant_p), count, p=world.restaurant_p)
+    ]
+    customer = world.customer_rank[
+        rng.choice(len(world.customer_p), count, p=world.customer_p)
+    ]
+    status = rng.choice(len(STATUS_P), count, p=STATUS_P)
+    created = _config["now"] - rng.integers(0, HISTORY_SECONDS, count)
+    line_count = rng.integers(1, min(MAX_LINES, per_restaurant) + 1, count)
+    # A random permutation of the menu per order; its first `lines` entries.
+    picks = np.argsort(rng.random((count, per_restaurant)), axis=1)[:, :MAX_LINES]
+    quantity = rng.choice(
+        [1, 2, 3], (count, picks.shape[1]), p=[8 / 12, 3 / 12, 1 / 12]
+    )
+    item = restaurant[:, None] * per_restaurant + picks
+    used = np.arange(picks.shape[1]) < line_count[:, None]
+    total = (world.item_price[item] * quantity * used).sum(axis=1)
+    courier = rng.integers(1, _config["couriers"] + 1, count)
+
+    created_at = _ts(created)
+    assigned_at = _ts(created + 600)
+    picked_up_at = _ts(created + 1200)
+    delivered_at = _ts(created + 2400)
+
+    orders, order_items, assignments = [], [], []
+    for i, n in enumerate(range(start, stop)):
+        order_id = row_id("orders", n)
+        state = STATUS_NAMES[status[i]]
+        orders.append(
+            f"{order_id}\t{row_id('users', int(customer[i]))}\t"
+            f"{row_id('restaurants', int(restaurant[i]))}\t{n % 997 + 1} Customer Road\t"
+            f"{total[i]}\t{state}\t{created_at[i]}+00\t{created_at[i]}+00\n"
+        )
+        for j in range(line_count[i]):
+            order_items.append(
+                f"{order_id}\t{row_id('items', int(item[i, j]))}\t{quantity[i, j]}\t"
+                f"{world.item_price[item[i, j]]}\t{created_at[i]}+00\t{created_at[i]}+00\n"
+            )
+        if ASSIGNED[status[i]]:
+            assignments.append(
+                f"{order_id}\t{row_id('users', int(courier[i]))}\t{assigned_at[i]}\t"
+                f"{picked_up_at[i] if state != 'READY' else NULL}\t"
+                f"{delivered_at[i] if state == 'DONE' else NULL}\t"
+                f"{created_at[i]}+00\t{created_at[i]}+00\n"
+            )
+
+    _copy(
+        cursor,
+        "orders",
+        (
+            "id",
+            "customer_id",
+            "restaurant_id",
+            "delivery_address",
+            "total_cents",
+            "status",
+            "created_at",
+            "updated_at",
+        ),
+        orders,
+    )
+    _copy(
+        cursor,
+        "order_items",
+        (
+            "order_id",
+            "item_id",
+            "quantity",
+            "price_at_time",
+            "created_at",
+            "updated_at",
+        ),
+        order_items,
+    )
+    _copy(
+        cursor,
+        "courier_assignments",
+        (
+            "order_id",
+            "courier_id",
+            "assigned_at",
+            "picked_up_at",
+            "delivered_at",
+            "created_at",
+            "updated_at",
+        ),
+        assignments,
+    )
+    return len(orders) + len(order_items) + len(assignments)
+
+
+LOADERS = {
+    "users": lambda cursor, start, stop, batch: _users(cursor, start, stop),
+    "restaurants": _restaurants,
+    "items": _items,
+    "orders": _orders,
+}
+
+
+def _load_batch(part: str, batch: int) -> tuple[str, int, int]:
+    """COPY one batch and record it, in a single transaction."""
+    size = _config["batch_size"]
+    start = batch * size
+    stop = min(start + size, _config["totals"][part])
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        rows = LOADERS[part](cursor, start, stop, batch)
+        cursor.execute(
+            "INSERT INTO seed_batches (part, batch, config) VALUES (%s, %s, %s)",
+            (part, batch, _config["fingerprint"]),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return part, batch, rows
+
+
+def _prepare(config: dict, reset: bool) -> set[tuple[str, int]]:
+    """Create the progress table and return the batches already loaded."""
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        if reset:
+            cursor.execute(f"TRUNCATE {', '.join(TABLES)} CASCADE")
+            cursor.execute("DROP TABLE IF EXISTS seed_batches")
+        cursor.execute(PROGRESS_DDL)
+        cursor.execute("SELECT DISTINCT config FROM seed_batches")
+        fingerprints = {row[0] for row in cursor.fetchall()}
+        if fingerprints - {config["fingerprint"]}:
+            raise SystemExit(
+                "seed_batches was written with other arguments; rerun them or pass --reset"
+            )
+        cursor.execute("SELECT part, batch FROM seed_batches")
+        done = {(part, batch) for part, batch in cursor.fetchall()}
+        conn.commit()
+    finally:
+        conn.close()
+    return done
+
+
+# Later phases reference rows from earlier ones.
+PHASES = (("users", "restaurants"), ("items",), ("orders",))
+
+
+def run(config: dict, jobs: int, reset: bool) -> None:
+    done = _prepare(config, reset)
+    pool = ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(config,))
+    try:
+        for phase in PHASES:
+            todo = [
+                (part, batch)
+                for part in phase
+                for batch in range(-(-config["totals"][part] // config["batch_size"]))
+                if (part, batch) not in done
+            ]
+            started = time.perf_counter()
+            loaded = 0
+            futures = [pool.submit(_load_batch, part, batch) for part, batch in todo]
+            for future in as_completed(futures):
+                part, batch, rows = future.result()
+                loaded += rows
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{part} batch {batch}: {rows} rows "
+                    f"({loaded / elapsed:,.0f} rows/s in this phase)",
+                    flush=True,
+                )
+    finally:
+        # On Ctrl-C or a failed batch, finish only what is already running;
+        # the rest is picked up by the next run.
+        pool.shutdown(cancel_futures=True)
+
+    conn = engine.raw_connection()
+    try:
+        conn.set_session(autocommit=True)
+        conn.cursor().execute("ANALYZE")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--couriers", type=int, default=5_000)
+    parser.add_argument("--restaurants", type=int, default=20_000)
+    parser.add_argument("--items-per-restaurant", type=int, default=25)
+    parser.add_argument("--orders", type=int, default=10_000_000)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--reset", action="store_true", help="truncate the app's tables first"
+    )
+    args = parser.parse_args()
+    if args.couriers < 1:
+        parser.error("--couriers must be at least 1; delivered orders need one")
+    if args.users < args.couriers + 2:
+        parser.error(
+            "--users must leave room for an admin, the couriers and a customer"
+        )
+
+    # "now" is pinned in the fingerprint, so a resumed run keeps the
+    # timestamps of the first one; pass --reset to move it.
+    config = {
+        "seed": args.seed,
+        "users": args.users,
+        "couriers": args.couriers,
+        "restaurants": args.restaurants,
+        "items_per_restaurant": args.items_per_restaurant,
+        "orders": args.orders,
+        "batch_size": args.batch_size,
+    }
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(PROGRESS_DDL)
+        cursor.execute("SELECT config FROM seed_batches LIMIT 1")
+        previous = cursor.fetchone()
+        conn.commit()
+    finally:
+        conn.close()
+    stored = json.loads(previous[0]) if previous and not args.reset else {}
+    if stored.get("params") == config:
+        now = stored["now"]
+    else:
+        now = int(datetime.now(UTC).timestamp())
+
+    config |= {
+        "now": now,
+        "totals": {
+            "users": args.users,
+            "restaurants": args.restaurants,
+            "items": args.restaurants * args.items_per_restaurant,
+            "orders": args.orders,
+        },
+        "hashed_pw": get_password_hash(PASSWORD),
+        "fingerprint": json.dumps({"params": config, "now": now}, sort_keys=True),
+    }
+    started = time.perf_counter()
+    run(config, args.jobs, args.reset)
+    print(f"done in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
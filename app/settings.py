@@ -1,4 +1,5 @@
 import os
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,13 +10,66 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME")
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+
+
+# ---------------DATABASE POOL
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+
+# ---------------READ REPLICAS
+# Comma separated SQLAlchemy async URLs, e.g.
+# postgresql+asyncpg://user:pw@replica-1:5432/quickbite
+DB_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()
+]
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "10"))
 
 
 # ---------------JWT CREDENTIALS
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_HOURS = os.getenv("AC   CESS_TOKEN_EXPIRE_HOURS")
-REFRESH_TOKEN_EXPIRE_DAYS = os.getenv("REFRESH_TOKEN_EXPIRE_DAYS")
+ACCESS_TOKEN_EXPIRE_HOURS = float(os.getenv("ACCESS_TOKEN_EXPIRE_HOURS", "24"))
+REFRESH_TOKEN_EXPIRE_DAYS = float(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+
+
+# ---------------PASSWORD HASHING
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(max((os.cpu_count() or 2) // 2, 1)))
+)
+PASSWORD_HASH_MAX_WAITING = int(os.getenv("PASSWORD_HASH_MAX_WAITING", "64"))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "2"))
+
+
+# ---------------CACHE
+# Optional shared tier for the in-process caches, which also carries their
+# invalidations to the other workers; leave empty to disable (single worker).
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "30"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+MENU_CACHE_TTL = float(os.getenv("MENU_CACHE_TTL", "300"))
+MENU_CACHE_MAX_BYTES = int(os.getenv("MENU_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+# ---------------ORDER EVENTS
+# Redis pub/sub fan-out between workers; in-process only when empty.
+EVENTS_REDIS_URL = os.getenv("EVENTS_REDIS_URL")
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "16"))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+
+# ---------------COURIER DISPATCH
+DISPATCH_ENABLED = os.getenv("DISPATCH_ENABLED", "false").lower() == "true"
+DISPATCH_INTERVAL_SECONDS = float(os.getenv("DISPATCH_INTERVAL_SECONDS", "2"))
+DISPATCH_BATCH_SIZE = int(os.getenv("DISPATCH_BATCH_SIZE", "5000"))
+DISPATCH_MAX_DISTANCE_METERS = float(os.getenv("DISPATCH_MAX_DISTANCE_METERS", "5000"))
+# Couriers whose position is older than this are not offered orders.
+DISPATCH_COURIER_STALE_SECONDS = int(os.getenv("DISPATCH_COURIER_STALE_SECONDS", "120"))
 
 
 # ---------------SMTP CREDENTIALS
@@ -24,3 +78,75 @@ SMTP_PORT = os.getenv("SMTP_PORT")
 EMAIL_ADDRESS = os.getenv("SMTP_USERNAME")
 EMAIL_PASSWORD = os.getenv("SMTP_PASSWORD")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
+
+
+# ---------------EMAIL DELIVERY
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+# Connections kept open per worker process.
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+# Many relays cap messages per session; reconnect before hitting the cap.
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(
+    os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100")
+)
+# A connection idle longer than this is NOOP-checked before reuse.
+SMTP_IDLE_CHECK_SECONDS = float(os.getenv("SMTP_IDLE_CHECK_SECONDS", "30"))
+EMAIL_RATE_LIMIT = float(os.getenv("EMAIL_RATE_LIMIT", "20"))  # messages/s per worker
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "100"))
+EMAIL_MAX_RETRIES = int(os.getenv("EMAIL_MAX_RETRIES", "5"))
+EMAIL_RETRY_BACKOFF_MAX = int(os.getenv("EMAIL_RETRY_BACKOFF_MAX", "600"))
+
+
+# ---------------CELERY
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
+
+
+# ---------------NOTIFICATIONS
+NOTIFICATION_BACKEND = os.getenv("NOTIFICATION_BACKEND", "file")  # file | redis
+NOTIFICATION_LOG_PATH = os.getenv("NOTIFICATION_LOG_PATH", "log.txt")
+NOTIFICATION_LOG_MAX_BYTES = int(
+    os.getenv("NOTIFICATION_LOG_MAX_BYTES", str(10 * 1024 * 1024))
+)
+NOTIFICATION_LOG_BACKUPS = int(os.getenv("NOTIFICATION_LOG_BACKUPS", "5"))
+NOTIFICATION_REDIS_URL = os.getenv("NOTIFICATION_REDIS_URL", CELERY_BROKER_URL)
+NOTIFICATION_STREAM = os.getenv("NOTIFICATION_STREAM", "quickbite:notifications")
+NOTIFICATION_STREAM_MAXLEN = int(os.getenv("NOTIFICATION_STREAM_MAXLEN", "100000"))
+NOTIFICATION_QUEUE_SIZE = int(os.getenv("NOTIFICATION_QUEUE_SIZE", "10000"))
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "500"))
+NOTIFICATION_FLUSH_INTERVAL = float(os.getenv("NOTIFICATION_FLUSH_INTERVAL", "1"))
+
+
+# ---------------TOKEN REVOCATION
+# Shared denylist; without it revocations only reach the worker that made them.
+REVOCATION_REDIS_URL = os.getenv("REVOCATION_REDIS_URL", CACHE_REDIS_URL)
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+# Full resync from Redis; also drops expired jtis from the local filter.
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "300"))
+
+
+# ---------------METRICS
+# Per-route latency/query metrics on GET /metrics (Prometheus text format).
+# The endpoint is unauthenticated: keep it off the public listener (block it
+# at the proxy) or turn metrics off.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+
+# ---------------QUERY PROFILING
+# Development/canary only: groups SQL per request, flags N+1 patterns and
+# EXPLAINs slow statements. Adds per-query regex work; keep it off in prod.
+QUERY_PROFILING = os.getenv("QUERY_PROFILING", "false").lower() == "true"
+QUERY_PROFILING_SLOW_MS = float(os.getenv("QUERY_PROFILING_SLOW_MS", "100"))
+# The same normalized statement this many times in one request is logged.
+QUERY_PROFILING_REPEAT_THRESHOLD = int(
+    os.getenv("QUERY_PROFILING_REPEAT_THRESHOLD", "5")
+)
+# Raise QueryBudgetExceededError instead of logging; for test runs.
+QUERY_PROFILING_STRICT = os.getenv("QUERY_PROFILING_STRICT", "false").lower() == "true"
+
+
+# ---------------FAST JSON
+# The restaurant and order list endpoints select only their response columns
+# and render the rows with orjson, skipping per-object response_model
+# validation. Items stay on the schema path: their saving was within noise.
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true"
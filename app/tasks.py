@@ -1,35 +1,86 @@
-import asyncio
-import smtplib
-from email.mime.text import MIMEText
+import logging
 
 from celery import Celery
-from app.settings import SMTP_HOST, SMTP_PORT, EMAIL_ADDRESS, EMAIL_PASSWORD
+from celery.signals import worker_process_init, worker_process_shutdown
+from celery.utils.time import get_exponential_backoff_interval
+
+from app.mailer import email_metrics, mailer, smtp_pool
+from app.notifications import notification_sink
+from app.settings import (
+    CELERY_BROKER_URL,
+    EMAIL_BATCH_SIZE,
+    EMAIL_MAX_RETRIES,
+    EMAIL_RETRY_BACKOFF_MAX,
+)
+
+logger = logging.getLogger(__name__)
 
 clry = Celery(
-    broker="redis://localhost:6379/0",
-    backend="redis://localhost:6379/0",
+    broker=CELERY_BROKER_URL,
+    backend=CELERY_BROKER_URL,
 )
 
 
-@clry.task
-def send_email(to_email: str, subject: str, body: str):
-    try:
-        msg = MIMEText(body, "plain", "utf-8")
-        msg["Subject"] = subject
-        msg["From"] = EMAIL_ADDRESS
-        msg["To"] = to_email
+@worker_process_init.connect
+def _reset_smtp_pool(**kwargs):
+    smtp_pool.reset()
+
+
+@worker_process_shutdown.connect
+def _close_smtp_pool(**kwargs):
+    smtp_pool.close()
+
+
+def _record(task, report: dict) -> bool:
+    """Count the outcome of one delivery; True if ``task`` should retry."""
+    retry = report["retry"]
+    exhausted = bool(retry) and task.request.retries >= task.max_retries
+    email_metrics.incr(
+        sent=report["sent"],
+        failed=len(report["failed"]) + (len(retry) if exhausted else 0),
+        retried=0 if exhausted else len(retry),
+    )
+    if exhausted:
+        logger.error(
+            "giving up on %d email(s) after %d retries", len(retry), task.max_retries
+        )
+    return bool(retry) and not exhausted
+
+
+def _backoff(task) -> int:
+    return get_exponential_backoff_interval(
+        factor=2,
+        retries=task.request.retries,
+        maximum=EMAIL_RETRY_BACKOFF_MAX,
+        full_jitter=True,
+    )
+
+
+@clry.task(bind=True, max_retries=EMAIL_MAX_RETRIES)
+def send_email(self, to_email: str, subject: str, body: str):
+    report = mailer.deliver([{"to_email": to_email, "subject": subject, "body": body}])
+    if _record(self, report):
+        raise self.retry(countdown=_backoff(self))
+    return {"sent": report["sent"], "failed": len(report["failed"])}
+
+
+@clry.task(bind=True, max_retries=EMAIL_MAX_RETRIES)
+def send_email_batch(self, messages: list[dict]):
+    """Send ``{to_email, subject, body}`` dicts over shared SMTP sessions.
+
+    Only the messages that failed transiently are retried, not the batch.
+    """
+    report = mailer.deliver(messages)
+    if _record(self, report):
+        raise self.retry(args=[report["retry"]], countdown=_backoff(self))
+    return {"sent": report["sent"], "failed": len(report["failed"])}
 
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            server.starttls()
-            server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-            server.send_message(msg)
 
-    except Exception as e:
-        print(f"Failed to send email to {to_email}: {e!s}")
+def queue_emails(messages: list[dict]) -> None:
+    """Enqueue bulk mail as batch tasks of ``EMAIL_BATCH_SIZE`` messages."""
+    for start in range(0, len(messages), EMAIL_BATCH_SIZE):
+        send_email_batch.delay(messages[start : start + EMAIL_BATCH_SIZE])
 
 
 async def write_notification(email: str, message: str = ""):
-    await asyncio.sleep(3)
-    with open("log.txt", mode="a") as email_file:
-        content = f"Notification for {email}: {message}\n"
-        email_file.write(content)
+    notification_sink.notify(email, message)
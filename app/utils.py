@@ -1,11 +1,19 @@
-from datetime import datetime, timedelta, UTC
+import base64
+import hashlib
+import hmac
+import json
+import math
+import uuid
+from datetime import UTC, datetime, timedelta
+
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+
 from app.settings import (
-    SECRET_KEY,
-    ALGORITHM,
     ACCESS_TOKEN_EXPIRE_HOURS,
+    ALGORITHM,
     REFRESH_TOKEN_EXPIRE_DAYS,
+    SECRET_KEY,
 )
 
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
@@ -19,24 +27,34 @@ def verify_password(plain_password: str, hashed_pw: str) -> bool:
     return pwd_context.verify(plain_password, hashed_pw)
 
 
-def create_access_token(data: dict) -> str:
+ACCESS_TOKEN_LIFETIME = timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
+REFRESH_TOKEN_LIFETIME = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+
+
+def _create_token(data: dict, token_type: str, lifetime: timedelta) -> str:
     to_encode = data.copy()
-    expire = datetime.now(UTC) + timedelta(
-        hours=24
+    now = datetime.now(UTC)
+    to_encode.update(
+        {
+            "exp": now + lifetime,
+            # Sub-second iat so a "revoke all sessions" cutoff never catches
+            # a token issued right after it. Floored, so a token issued just
+            # before a cutoff can't round up past it.
+            "iat": math.floor(now.timestamp() * 1000) / 1000,
+            "jti": uuid.uuid4().hex,
+            "type": token_type,
+        }
     )
-    to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def create_access_token(data: dict) -> str:
+    return _create_token(data, "access", ACCESS_TOKEN_LIFETIME)
+
+
 def create_refresh_token(data: dict) -> str:
-    to_encode = data.copy()
-    expire = datetime.now(UTC) + timedelta(
-        days=7
-    )
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    return _create_token(data, "refresh", REFRESH_TOKEN_LIFETIME)
 
 
 def decode_token(token: str) -> dict:
@@ -51,3 +69,26 @@ def generate_confirmation_token(email: str) -> str:
     expiration = datetime.now(UTC) + timedelta(hours=1)
     payload = {"email": email, "exp": expiration, "type": "confirmation"}
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def encode_cursor(data: dict) -> str:
+    """Opaque, tamper-proof pagination cursor: base64(json).base64(hmac)."""
+    payload = base64.urlsafe_b64encode(
+        json.dumps(data, separators=(",", ":")).encode()
+    ).rstrip(b"=")
+    signature = hmac.new(SECRET_KEY.encode(), payload, hashlib.sha256).digest()
+    return f"{payload.decode()}.{base64.urlsafe_b64encode(signature).rstrip(b'=').decode()}"
+
+
+def decode_cursor(cursor: str) -> dict | None:
+    try:
+        payload, signature = cursor.encode().split(b".", 1)
+        expected = hmac.new(SECRET_KEY.encode(), payload, hashlib.sha256).digest()
+        given = base64.urlsafe_b64decode(signature + b"=" * (-len(signature) % 4))
+        if not hmac.compare_digest(expected, given):
+            return None
+        return json.loads(
+            base64.urlsafe_b64decode(payload + b"=" * (-len(payload) % 4))
+        )
+    except (ValueError, TypeError):
+        return None
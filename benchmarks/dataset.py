@@ -0,0 +1,286 @@
+"""Deterministic benchmark dataset: restaurants, items, users, orders, assignments.
+
+Everything is derived from ``seed`` and ``scale``, so two runs seeded the
+same way see identical rows and their reports are comparable. Popularity is
+skewed the way real traffic is: a few restaurants take most orders and a few
+customers place most of them.
+"""
+
+import random
+import uuid
+from datetime import UTC, datetime, timedelta
+from itertools import accumulate
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.database import Base
+from app.geo import point
+from app.models import (
+    CourierAssignment,
+    Item,
+    Order,
+    OrderItem,
+    OrderStatus,
+    Restaurant,
+    User,
+    UserRole,
+)
+from app.seed import (
+    ASSIGNED_STATUSES,
+    CENTER,
+    CUSTOMER_SKEW,
+    RESTAURANT_SKEW,
+    STATUS_WEIGHTS,
+    zipf_weights,
+)
+from app.utils import get_password_hash
+
+EMAIL_DOMAIN = "bench.quickbite.example.com"
+PASSWORD = "benchmark-password"
+
+# Rows per unit of --scale.
+RESTAURANTS = 200
+ITEMS_PER_RESTAURANT = 25
+CUSTOMERS = 2_000
+COURIERS = 100
+ORDERS = 20_000
+
+HISTORY_DAYS = 90
+INSERT_CHUNK = 5_000
+# One row: the seed and scale the loaded dataset was generated from.
+DATASET_TABLE = "benchmark_dataset"
+
+WORDS = (
+    "spicy",
+    "crispy",
+    "classic",
+    "smoked",
+    "green",
+    "golden",
+    "double",
+    "veggie",
+    "chicken",
+    "beef",
+    "tofu",
+    "noodle",
+    "curry",
+    "burger",
+    "pizza",
+    "salad",
+    "ramen",
+    "taco",
+    "falafel",
+    "dumpling",
+    "wrap",
+    "bowl",
+    "soup",
+    "pie",
+)
+
+
+def email(kind: str, n: int) -> str:
+    return f"{kind}{n}@{EMAIL_DOMAIN}"
+
+
+def _cum_weights(weights) -> list[float]:
+    return list(accumulate(float(w) for w in weights))
+
+
+def _name(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).title()
+
+
+def generate(seed: int, scale: float) -> dict[type, list[dict]]:
+    """All rows, keyed by model, in insert order."""
+    rng = random.Random(seed)
+
+    def uid() -> uuid.UUID:
+        return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+    now = datetime.now(UTC).replace(microsecond=0)
+    hashed_pw = get_password_hash(PASSWORD)
+
+    def user(kind: str, n: int, role: UserRole, superuser: bool = False) -> dict:
+        return {
+            "id": uid(),
+            "username": f"{kind}{n}",
+            "email": email(kind, n),
+            "hashed_pw": hashed_pw,
+            "role": role,
+            "is_active": True,
+            "is_verified": True,
+            "is_superuser": superuser,
+        }
+
+    users = [user("admin", 0, UserRole.ADMIN, superuser=True)]
+    customers = [
+        user("customer", n, UserRole.CUSTOMER) for n in range(int(CUSTOMERS * scale))
+    ]
+    couriers = [
+        user("courier", n, UserRole.COURIER)
+        for n in range(max(int(COURIERS * scale), 1))
+    ]
+    users += customers + couriers
+
+    restaurants = []
+    items_by_restaurant = []
+    items = []
+    for n in range(max(int(RESTAURANTS * scale), 1)):
+        restaurant_id = uid()
+        restaurants.append(
+            {
+                "id": restaurant_id,
+                "name": f"{_name(rng, 2)} {n}",
+                "address": f"{rng.randint(1, 200)} Bench Street",
+                "phone": f"+49{rng.randrange(10**9, 10**10)}",
+                "email": f"restaurant{n}@{EMAIL_DOMAIN}",
+                "description": _name(rng, 6),
+                "operating_hours": "10:00-22:00",
+                "rating": round(rng.uniform(3.0, 5.0), 1),
+                "is_open": rng.random() < 0.8,
+                "location": point(
+                    rng.gauss(CENTER[0], 0.03), rng.gauss(CENTER[1], 0.05)
+                ),
+            }
+        )
+        menu = [
+            {
+                "id": uid(),
+                "name": _name(rng, 2),
+                "description": _name(rng, 8),
+                "price_cents": rng.randrange(300, 3000, 10),
+                "sku": f"SKU-{n}-{i}",
+                "is_available": rng.random() < 0.95,
+                "is_recommended": rng.random() < 0.1,
+                "restaurant_id": restaurant_id,
+            }
+            for i in range(ITEMS_PER_RESTAURANT)
+        ]
+        items_by_restaurant.append([i for i in menu if i["is_available"]] or menu)
+        items += menu
+
+    # Shuffle before weighting so popularity isn't tied to insert order.
+    popular = rng.sample(range(len(restaurants)), len(restaurants))
+    heavy = rng.sample(customers, len(customers))
+    restaurant_weights = _cum_weights(zipf_weights(len(popular), RESTAURANT_SKEW))
+    customer_weights = _cum_weights(zipf_weights(len(heavy), CUSTOMER_SKEW))
+    statuses = list(STATUS_WEIGHTS)
+    status_weights = _cum_weights(STATUS_WEIGHTS.values())
+
+    orders, order_items, assignments = [], [], []
+    for _ in range(int(ORDERS * scale)):
+        r = rng.choices(popular, cum_weights=restaurant_weights)[0]
+        customer = rng.choices(heavy, cum_weights=customer_weights)[0]
+        status = rng.choices(statuses, cum_weights=status_weights)[0]
+        created_at = now - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+        order_id = uid()
+        lines = rng.sample(
+            items_by_restaurant[r], min(rng.randint(1, 4), len(items_by_restaurant[r]))
+        )
+        quantities = [rng.choices((1, 2, 3), weights=(8, 3, 1))[0] for _ in lines]
+        orders.append(
+            {
+                "id": order_id,
+                "customer_id": customer["id"],
+                "restaurant_id": restaurants[r]["id"],
+                "delivery_address": f"{rng.randint(1, 500)} Customer Road",
+                "total_cents": sum(
+                    i["price_cents"] * q for i, q in zip(lines, quantities, strict=True)
+                ),
+                "status": status,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+        )
+        order_items += [
+            {
+                "order_id": order_id,
+                "item_id": i["id"],
+                "quantity": q,
+                "price_at_time": i["price_cents"],
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+            for i, q in zip(lines, quantities, strict=True)
+        ]
+        if status in ASSIGNED_STATUSES:
+            assigned_at = (created_at + timedelta(minutes=rng.randint(5, 20))).replace(
+                tzinfo=None
+            )
+            assignments.append(
+                {
+                    "order_id": order_id,
+                    "courier_id": rng.choice(couriers)["id"],
+                    "assigned_at": assigned_at,
+                    "picked_up_at": assigned_at + timedelta(minutes=10)
+                    if status != OrderStatus.READY
+                    else None,
+                    "delivered_at": assigned_at + timedelta(minutes=30)
+                    if status == OrderStatus.DONE
+                    else None,
+                }
+            )
+
+    return {
+        User: users,
+        Restaurant: restaurants,
+        Item: items,
+        Order: orders,
+        OrderItem: order_items,
+        CourierAssignment: assignments,
+    }
+
+
+async def is_seeded(engine: AsyncEngine) -> bool | None:
+    """True if the benchmark dataset is there, None if the database holds
+    anything else (and must not be wiped), False if it is empty."""
+    async with engine.connect() as conn:
+        exists = await conn.scalar(select(func.to_regclass("users")))
+        if exists is None:
+            return False
+        total = await conn.scalar(select(func.count()).select_from(User))
+        ours = await conn.scalar(
+            select(func.count()).where(User.email.like(f"%@{EMAIL_DOMAIN}"))
+        )
+    if total == 0:
+        return False
+    return True if ours == total else None
+
+
+async def seeded_with(engine: AsyncEngine) -> tuple[int, float] | None:
+    """(seed, scale) of the loaded dataset, or None if it was not recorded."""
+    async with engine.connect() as conn:
+        if await conn.scalar(select(func.to_regclass(DATASET_TABLE))) is None:
+            return None
+        row = (
+            await conn.execute(text(f"SELECT seed, scale FROM {DATASET_TABLE}"))
+        ).first()
+    return (row.seed, row.scale) if row else None
+
+
+async def seed(engine: AsyncEngine, seed: int, scale: float) -> dict[str, int]:
+    """Drop and recreate every table, then load the dataset; returns row counts."""
+    rows = generate(seed, scale)
+    async with engine.begin() as conn:
+        for extension in ("postgis", "pg_trgm"):
+            await conn.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        for model, batch in rows.items():
+            for start in range(0, len(batch), INSERT_CHUNK):
+                await conn.execute(insert(model), batch[start : start + INSERT_CHUNK])
+        await conn.execute(text(f"DROP TABLE IF EXISTS {DATASET_TABLE}"))
+        await conn.execute(
+            text(
+                f"CREATE TABLE {DATASET_TABLE} (seed bigint NOT NULL, scale float8 NOT NULL)"
+            )
+        )
+        await conn.execute(
+            text(f"INSERT INTO {DATASET_TABLE} VALUES (:seed, :scale)"),
+            {"seed": seed, "scale": scale},
+        )
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("ANALYZE"))
+    return {model.__tablename__: len(batch) for model, batch in rows.items()}
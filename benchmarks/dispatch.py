@@ -0,0 +1,90 @@
+"""Batch vs one-order-at-a-time courier matching.
+
+Usage: python -m benchmarks.dispatch [--orders N] [--couriers N] [--seed N]
+
+Both strategies run in memory on the same synthetic city. The sequential one
+is what a per-order KNN query would do (nearest free courier, claim it,
+repeat) without paying a database round trip per order, so the gap shown
+here is a lower bound.
+"""
+
+import argparse
+import time
+import uuid
+
+import numpy as np
+
+from app.dispatch import match
+from app.geo import project
+
+# Roughly a 20 x 20 km city.
+CENTER = (52.52, 13.40)
+SPREAD_DEGREES = (0.09, 0.15)
+
+
+def city(rng: np.random.Generator, n: int) -> list[tuple[uuid.UUID, float, float]]:
+    lat = rng.normal(CENTER[0], SPREAD_DEGREES[0] / 3, n)
+    lon = rng.normal(CENTER[1], SPREAD_DEGREES[1] / 3, n)
+    return [(uuid.uuid4(), float(a), float(o)) for a, o in zip(lat, lon, strict=True)]
+
+
+def match_sequential(orders, couriers, max_distance: float):
+    origin = float(np.mean([lat for _, lat, _ in orders]))
+    courier_xy = project(
+        [lat for _, lat, _ in couriers], [lon for _, _, lon in couriers], origin
+    )
+    free = np.ones(len(couriers), dtype=bool)
+    matches = []
+    for order_id, lat, lon in orders:
+        distances = np.hypot(*(courier_xy - project([lat], [lon], origin)).T)
+        distances[~free] = np.inf
+        best = int(np.argmin(distances))
+        if distances[best] <= max_distance:
+            free[best] = False
+            matches.append((order_id, couriers[best][0], float(distances[best])))
+    return matches
+
+
+def run(strategy, orders, couriers, max_distance, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        matches = strategy(orders, couriers, max_distance)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return {
+        "seconds": best,
+        "orders_per_second": len(orders) / best,
+        "matched": len(matches),
+        "mean_distance_m": float(np.mean([d for _, _, d in matches]))
+        if matches
+        else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--couriers", type=int, default=3000)
+    parser.add_argument("--max-distance", type=float, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    orders = city(rng, args.orders)
+    couriers = city(rng, args.couriers)
+
+    print(f"{args.orders} orders, {args.couriers} couriers, {args.max_distance:.0f} m")
+    for name, strategy in (("batch", match), ("sequential", match_sequential)):
+        result = run(strategy, orders, couriers, args.max_distance, args.repeat)
+        print(
+            f"{name:>10}: {result['seconds'] * 1000:8.1f} ms  "
+            f"{result['orders_per_second']:10.0f} orders/s  "
+            f"matched {result['matched']:5d}  "
+            f"mean {result['mean_distance_m']:6.0f} m"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Connection-per-message vs pooled SMTP delivery against a local aiosmtpd.
+
+Usage: python -m benchmarks.email [--messages N]
+
+Needs ``aiosmtpd`` (dev only). No TLS or AUTH is involved, so the gap
+shown is a lower bound: a real relay adds a STARTTLS handshake and a login
+to every fresh connection.
+"""
+
+import argparse
+import smtplib
+import time
+
+from aiosmtpd.controller import Controller
+
+from app.mailer import Mailer, RateLimiter, SMTPPool, _build_message
+
+
+class _Sink:
+    async def handle_DATA(self, server, session, envelope):  # noqa: N802 (aiosmtpd hook)
+        return "250 OK"
+
+
+def per_message(host: str, port: int, messages: list[dict]) -> None:
+    """What the task used to do: connect, send one message, quit."""
+    for message in messages:
+        with smtplib.SMTP(host, port) as server:
+            server.send_message(_build_message(message))
+
+
+def pooled(host: str, port: int, messages: list[dict]) -> None:
+    pool = SMTPPool(
+        host=host,
+        port=port,
+        username=None,
+        password=None,
+        starttls=False,
+        timeout=10,
+        size=1,
+        max_messages=100,
+        idle_check=30,
+    )
+    Mailer(pool, RateLimiter(rate=1e9)).deliver(messages)
+    pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+
+    controller = Controller(_Sink(), hostname="127.0.0.1", port=args.port)
+    controller.start()
+    try:
+        messages = [
+            {"to_email": f"user{i}@example.com", "subject": "Hi", "body": "Hello"}
+            for i in range(args.messages)
+        ]
+        for name, strategy in (("per-message", per_message), ("pooled", pooled)):
+            started = time.perf_counter()
+            strategy("127.0.0.1", args.port, messages)
+            elapsed = time.perf_counter() - started
+            print(
+                f"{name:>12}: {elapsed * 1000:8.1f} ms  "
+                f"{len(messages) / elapsed:8.0f} messages/s"
+            )
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main()
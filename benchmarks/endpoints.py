@@ -0,0 +1,334 @@
+"""Endpoint throughput and p50/p95/p99 latency against a seeded database.
+
+Usage: python -m benchmarks.endpoints [--target inprocess|URL] [--concurrency N]
+           [--duration S] [--scenarios a,b] [--scale X] [--seed N] [--reseed]
+           [--output report.json] [--baseline baseline.json] [--tolerance 0.1]
+
+The database comes from the app's own DB_* settings, so point them at a
+scratch database: seeding drops and recreates every table, and a database
+holding anything but the benchmark dataset is refused. A dataset generated
+with another ``--seed``/``--scale`` is rebuilt, and both are recorded in the
+report, so a baseline from a different dataset is refused too. ``--target
+inprocess`` drives ``main.app`` through httpx's ASGI transport, which
+measures the app without a network; a URL drives a server started
+separately (e.g. ``uvicorn main:app --workers 4``) on the same database.
+
+Each scenario runs ``--concurrency`` closed-loop clients for ``--duration``
+seconds after a short warm-up. With ``--baseline`` the run is compared with
+a saved report and exits 1 if any scenario's throughput dropped or its p95
+rose by more than ``--tolerance``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import UTC, datetime
+
+import httpx
+from sqlalchemy import select
+
+from app.database import async_engine
+from app.models import Item, User, UserRole
+from benchmarks import dataset
+
+PAGE_SIZE = 20
+
+
+async def login(client, ctx, rng):
+    return await client.post(
+        "/login/",
+        json={"email": rng.choice(ctx["emails"]), "password": dataset.PASSWORD},
+    )
+
+
+async def list_items(client, ctx, rng):
+    params = {"limit": PAGE_SIZE, "sort_by": rng.choice(("id", "name", "price_cents"))}
+    if rng.random() < 0.3:
+        params["restaurant_id"] = rng.choice(ctx["restaurants"])[0]
+    return await client.get("/items/", params=params)
+
+
+async def list_restaurants(client, ctx, rng):
+    params = {"limit": PAGE_SIZE, "sort_by": rng.choice(("id", "name"))}
+    return await client.get("/restaurants/", params=params)
+
+
+async def create_order(client, ctx, rng):
+    restaurant_id, item_ids = rng.choice(ctx["restaurants"])
+    lines = rng.sample(item_ids, min(rng.randint(1, 3), len(item_ids)))
+    return await client.post(
+        "/orders/",
+        headers=rng.choice(ctx["auth"]),
+        json={
+            "restaurant_id": restaurant_id,
+            "delivery_address": "1 Benchmark Road",
+            "items": [{"item_id": item_id, "quantity": 1} for item_id in lines],
+        },
+    )
+
+
+async def list_orders(client, ctx, rng):
+    return await client.get(
+        "/orders/", headers=rng.choice(ctx["auth"]), params={"limit": PAGE_SIZE}
+    )
+
+
+SCENARIOS = {
+    "login": login,
+    "list_items": list_items,
+    "list_restaurants": list_restaurants,
+    "create_order": create_order,
+    "list_orders": list_orders,
+}
+
+
+async def prepare(client, sessions: int) -> dict:
+    """Ids and logged-in customers the scenarios pick from."""
+    async with async_engine.connect() as conn:
+        rows = (
+            await conn.execute(
+                select(Item.restaurant_id, Item.id).where(Item.is_available.is_(True))
+            )
+        ).all()
+        emails = list(
+            await conn.scalars(
+                select(User.email)
+                .where(User.role == UserRole.CUSTOMER)
+                .order_by(User.email)
+            )
+        )
+    menus: dict[str, list[str]] = {}
+    for restaurant_id, item_id in rows:
+        menus.setdefault(str(restaurant_id), []).append(str(item_id))
+
+    auth = []
+    for email in emails[:sessions]:
+        response = await client.post(
+            "/login/", json={"email": email, "password": dataset.PASSWORD}
+        )
+        response.raise_for_status()
+        auth.append({"Authorization": f"Bearer {response.json()['access_token']}"})
+    return {"restaurants": sorted(menus.items()), "emails": emails, "auth": auth}
+
+
+def summarize(latencies: list[float], errors: int, seconds: float) -> dict:
+    result = {"requests": len(latencies), "errors": errors}
+    if not latencies:
+        return result | dict.fromkeys(
+            ("throughput_rps", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"), 0.0
+        )
+    cuts = (
+        statistics.quantiles(latencies, n=100, method="inclusive")
+        if len(latencies) > 1
+        else latencies * 99
+    )
+    return result | {
+        "throughput_rps": len(latencies) / seconds,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+async def measure(
+    client, scenario, ctx, concurrency: int, duration: float, warmup: float
+) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    recording = False
+
+    async def worker(n: int, until: float) -> None:
+        nonlocal errors
+        rng = random.Random(n)
+        while time.perf_counter() < until:
+            started = time.perf_counter()
+            try:
+                ok = (await scenario(client, ctx, rng)).status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            elapsed = time.perf_counter() - started
+            if not recording:
+                continue
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    until = time.perf_counter() + warmup
+    await asyncio.gather(*(worker(n, until) for n in range(concurrency)))
+    recording = True
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n, started + duration) for n in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Print the change per scenario; returns the names that regressed."""
+    regressed = []
+    print(
+        f"\nvs baseline {baseline['meta'].get('commit') or '?'} ({baseline['meta']['started_at']})"
+    )
+    for name, now in report["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if not before or not before["throughput_rps"] or not before["p95_ms"]:
+            continue
+        rps = now["throughput_rps"] / before["throughput_rps"] - 1
+        p95 = now["p95_ms"] / before["p95_ms"] - 1
+        bad = rps < -tolerance or p95 > tolerance
+        if bad:
+            regressed.append(name)
+        print(
+            f"{name:>17}: throughput {rps:+7.1%}  p95 {p95:+7.1%}"
+            f"{'  REGRESSION' if bad else ''}"
+        )
+    return regressed
+
+
+def _dataset(meta: dict) -> tuple:
+    """(seed, scale) a report was measured on; (None, None) for old reports."""
+    return meta.get("seed"), meta.get("scale")
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    seeded = await dataset.is_seeded(async_engine)
+    if seeded is None:
+        sys.exit("refusing to seed: the database holds non-benchmark data")
+    if seeded and await dataset.seeded_with(async_engine) != (args.seed, args.scale):
+        print(
+            f"dataset differs from --seed {args.seed} --scale {args.scale}; reseeding"
+        )
+        seeded = False
+    if args.reseed or not seeded:
+        started = time.perf_counter()
+        counts = await dataset.seed(async_engine, args.seed, args.scale)
+        print(f"seeded {counts} in {time.perf_counter() - started:.1f} s")
+
+    if args.target == "inprocess":
+        from main import app
+
+        lifespan = app.router.lifespan_context(app)
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        base_url = "http://benchmark"
+    else:
+        lifespan = None
+        transport = httpx.AsyncHTTPTransport(retries=0)
+        base_url = args.target
+
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "started_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "target": args.target,
+            "seed": args.seed,
+            "scale": args.scale,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+        },
+        "scenarios": {},
+    }
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        transport=transport, base_url=base_url, limits=limits, timeout=30
+    ) as client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            ctx = await prepare(client, sessions=args.concurrency * 4)
+            report["meta"]["customers"] = len(ctx["emails"])
+            report["meta"]["restaurants"] = len(ctx["restaurants"])
+            for name in args.scenarios:
+                result = await measure(
+                    client,
+                    SCENARIOS[name],
+                    ctx,
+                    args.concurrency,
+                    args.duration,
+                    args.warmup,
+                )
+                report["scenarios"][name] = result
+                print(
+                    f"{name:>17}: {result['throughput_rps']:8.1f} req/s  "
+                    f"p50 {result['p50_ms']:7.1f}  p95 {result['p95_ms']:7.1f}  "
+                    f"p99 {result['p99_ms']:7.1f} ms  errors {result['errors']}"
+                )
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+    await async_engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--target", default="inprocess", help="'inprocess' or a base URL"
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--duration", type=float, default=10, help="seconds per scenario"
+    )
+    parser.add_argument("--warmup", type=float, default=2, help="seconds per scenario")
+    parser.add_argument(
+        "--scenarios",
+        type=lambda value: value.split(","),
+        default=list(SCENARIOS),
+        help=f"comma-separated subset of {','.join(SCENARIOS)}",
+    )
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--reseed", action="store_true", help="rebuild the dataset first"
+    )
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if _dataset(baseline["meta"]) != (args.seed, args.scale):
+            parser.error(
+                "the baseline was measured on another dataset: (seed, scale) "
+                f"{_dataset(baseline['meta'])} vs {(args.seed, args.scale)}"
+            )
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if baseline is not None:
+        regressed = compare(report, baseline, args.tolerance)
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""CPU per page of the list endpoints: response_model path vs FAST_JSON_RESPONSES.
+
+Usage: python -m benchmarks.serialization [--page-size 100] [--requests 500]
+           [--runs 5] [--endpoints restaurants,orders]
+
+No database: the read session factory is swapped for one that hands back a
+canned page, as ORM objects for ``select(Model)`` and as rows for column
+selects, and authentication for a superuser, so what is timed is routing,
+validation and rendering of ``main.app`` through httpx's ASGI transport.
+(Not ``dependency_overrides``: FastAPI re-analyses overrides on every
+request, which would dwarf the difference being measured.) Each mode runs in
+its own interpreter because the flag is read at import.
+
+Modes alternate over ``--runs`` fresh interpreters each; the report gives the
+median and standard deviation per mode, and marks a saving smaller than the
+noise of the two modes combined as not significant. Also checks that both
+modes return the same JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import httpx
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+from sqlalchemy.engine.result import result_tuple
+
+from app.geo import SRID
+from app.models import Order, OrderStatus, Restaurant
+
+ENDPOINTS = {
+    "restaurants": "/restaurants/",
+    "orders": "/orders/",
+}
+MODES = ("schema", "fast")
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _records(model, count: int, rng: random.Random) -> list[dict]:
+    """Column values for ``count`` rows of ``model``, sorted by id."""
+    now = datetime(2025, 1, 1, tzinfo=UTC)
+    records = []
+    for n in range(count):
+        if model is Restaurant:
+            record = {
+                "id": _uuid(rng),
+                "name": f"Golden Dumpling {n}",
+                "address": f"{n} Bench Street",
+                "phone": f"+49{rng.randrange(10**9, 10**10)}",
+                "email": f"restaurant{n}@bench.quickbite.example.com",
+                "description": "Dumplings, noodles and soups",
+                "operating_hours": "10:00-22:00",
+                "latitude": round(rng.gauss(52.52, 0.03), 6),
+                "longitude": round(rng.gauss(13.40, 0.05), 6),
+            }
+        else:
+            record = {
+                "id": _uuid(rng),
+                "customer_id": _uuid(rng),
+                "restaurant_id": _uuid(rng),
+                "delivery_address": f"{n} Customer Road",
+                "total_cents": rng.randrange(500, 9000),
+                "status": rng.choice(list(OrderStatus)),
+                "created_at": now - timedelta(seconds=rng.randrange(90 * 86400)),
+            }
+        records.append(record)
+    return sorted(records, key=lambda r: r["id"])
+
+
+def _orm_object(model, record: dict):
+    if model is Restaurant:
+        record = dict(record)
+        location = Point(record.pop("longitude"), record.pop("latitude"))
+        return Restaurant(location=from_shape(location, srid=SRID), **record)
+    return model(**record)
+
+
+class _Result:
+    def __init__(self, objects, rows):
+        self.objects = objects
+        self.rows = rows
+
+    def scalars(self):
+        return SimpleNamespace(all=lambda: self.objects)
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Answers any select with the same page: ORM objects or rows.
+
+    Both are built once up front, so neither mode is charged for what the
+    database driver would do.
+    """
+
+    def __init__(self, page_size: int):
+        rng = random.Random(1)
+        self.records = {}
+        self.objects = {}
+        self.rows = {}
+        for model in (Restaurant, Order):
+            self.records[model] = _records(model, page_size + 1, rng)
+            self.objects[model] = [_orm_object(model, r) for r in self.records[model]]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def execute(self, query):
+        model = query.column_descriptions[0]["entity"]
+        names = tuple(column.key for column in query.selected_columns)
+        rows = self.rows.get(names)
+        if rows is None:
+            make_row = result_tuple(names)
+            rows = self.rows[names] = [
+                make_row([r.get(n) for n in names]) for r in self.records[model]
+            ]
+        return _Result(self.objects[model], rows)
+
+
+async def _child(args) -> dict:
+    from app import dependencies
+    from main import app
+
+    session = FakeSession(args.page_size)
+
+    async def superuser(token, db):
+        return SimpleNamespace(id=uuid.UUID(int=0), is_superuser=True)
+
+    dependencies.AsyncSessionLocal = lambda: session
+    dependencies.authenticate_token = superuser
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://benchmark"
+    ) as client:
+        for name in args.endpoints:
+            params = {"limit": args.page_size}
+            response = await client.get(ENDPOINTS[name], params=params)
+            response.raise_for_status()
+            for _ in range(args.requests // 10):
+                await client.get(ENDPOINTS[name], params=params)
+            started = time.process_time()
+            for _ in range(args.requests):
+                await client.get(ENDPOINTS[name], params=params)
+            cpu = time.process_time() - started
+            results[name] = {
+                "cpu_us_per_page": cpu / args.requests * 1e6,
+                "body": response.json(),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--endpoints",
+        type=lambda value: value.split(","),
+        default=list(ENDPOINTS),
+        help=f"comma-separated subset of {','.join(ENDPOINTS)}",
+    )
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    if args.child:
+        print(json.dumps(asyncio.run(_child(args))))
+        return
+
+    child_args = [sys.executable, "-m", "benchmarks.serialization", *sys.argv[1:]]
+    runs = {mode: [] for mode in MODES}
+    for _ in range(args.runs):
+        for mode in MODES:
+            env = os.environ | {"FAST_JSON_RESPONSES": str(mode == "fast").lower()}
+            output = subprocess.run(
+                [*child_args, "--child", mode],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            runs[mode].append(json.loads(output.splitlines()[-1]))
+
+    print(
+        f"CPU per {args.page_size}-row page (µs), {args.requests} requests each, "
+        f"median ± stdev of {args.runs} runs"
+    )
+    mismatched = []
+    for name in args.endpoints:
+        cpu = {
+            mode: [run[name]["cpu_us_per_page"] for run in runs[mode]] for mode in MODES
+        }
+        median = {mode: statistics.median(cpu[mode]) for mode in MODES}
+        stdev = {
+            mode: statistics.stdev(cpu[mode]) if args.runs > 1 else 0.0
+            for mode in MODES
+        }
+        saved = median["schema"] - median["fast"]
+        noise = (stdev["schema"] ** 2 + stdev["fast"] ** 2) ** 0.5
+        print(
+            f"{name:>12}: schema {median['schema']:8.0f} ± {stdev['schema']:5.0f}  "
+            f"fast {median['fast']:8.0f} ± {stdev['fast']:5.0f}  "
+            f"saved {saved:8.0f} ({saved / median['schema']:.0%})"
+            + ("" if saved > 2 * noise else "  not significant")
+        )
+        if any(
+            run[name]["body"] != runs["schema"][0][name]["body"] for run in runs["fast"]
+        ):
+            mismatched.append(name)
+    if mismatched:
+        sys.exit(f"responses differ between modes: {', '.join(mismatched)}")
+
+
+if __name__ == "__main__":
+    main()
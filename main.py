@@ -1,18 +1,74 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+
+from app.cache import cache_invalidations
+from app.database import read_replicas
+from app.dispatch import dispatcher
+from app.events import broadcaster
+from app.hashing import password_hasher
+from app.metrics import MetricsMiddleware
+from app.notifications import notification_sink
+from app.profiling import QueryProfilerMiddleware
+from app.responses import DEFAULT_RESPONSE_CLASS
+from app.revocation import token_revocation
+from app.routers.admin import router as admin_router
 from app.routers.auth import router as auth_router
-from app.routers.users import router as users_router
+from app.routers.couriers import router as couriers_router
 from app.routers.items import router as items_router
+from app.routers.metrics import router as metrics_router
 from app.routers.orders import router as orders_router
 from app.routers.restaurant import router as restaurant_router
+from app.routers.search import router as search_router
+from app.routers.users import router as users_router
+from app.settings import DISPATCH_ENABLED, METRICS_ENABLED, QUERY_PROFILING
+
 
-app = FastAPI(title="Quickbite API", description="Quickbite API", version="0.0.1")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await password_hasher.start()
+    await read_replicas.start()
+    await broadcaster.start()
+    notification_sink.start()
+    token_revocation.start()
+    cache_invalidations.start()
+    if DISPATCH_ENABLED:
+        dispatcher.start()
+    yield
+    await dispatcher.stop()
+    await cache_invalidations.stop()
+    await token_revocation.stop()
+    await notification_sink.stop()
+    await broadcaster.stop()
+    await read_replicas.stop()
+    password_hasher.shutdown()
+
+
+app = FastAPI(
+    title="Quickbite API",
+    description="Quickbite API",
+    version="0.0.1",
+    lifespan=lifespan,
+    default_response_class=DEFAULT_RESPONSE_CLASS,
+)
 
 
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(items_router)
 app.include_router(orders_router)
+app.include_router(couriers_router)
 app.include_router(restaurant_router)
+app.include_router(search_router)
+app.include_router(admin_router)
+
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router)
+
+if QUERY_PROFILING:
+    app.add_middleware(QueryProfilerMiddleware)
+
 
 @app.get("/")
 async def root():
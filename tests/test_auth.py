@@ -0,0 +1,80 @@
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.revocation import token_revocation
+from benchmarks import dataset
+
+pytestmark = pytest.mark.anyio
+
+
+async def _login(client) -> dict:
+    response = await client.post(
+        "/login/",
+        json={"email": dataset.email("customer", 1), "password": dataset.PASSWORD},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def _refresh(client, tokens: dict):
+    return await client.post(
+        "/refresh/", json={"refresh_token": tokens["refresh_token"]}
+    )
+
+
+def _bearer(tokens: dict) -> dict[str, str]:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+async def test_refresh_rotates_the_pair(client):
+    tokens = await _login(client)
+
+    response = await _refresh(client, tokens)
+    assert response.status_code == 200, response.text
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+
+    me = await client.get("/users/me/", headers=_bearer(rotated))
+    assert me.status_code == 200
+    assert me.json()["email"] == dataset.email("customer", 1)
+    assert (await _refresh(client, rotated)).status_code == 200
+
+
+async def test_replayed_refresh_token_revokes_the_session(client):
+    tokens = await _login(client)
+    rotated = (await _refresh(client, tokens)).json()
+
+    replay = await _refresh(client, tokens)
+    assert replay.status_code == 401
+
+    # Everything issued in the session is dead, including the rotated pair.
+    assert (await _refresh(client, rotated)).status_code == 401
+    assert (await client.get("/users/me/", headers=_bearer(rotated))).status_code == 401
+
+    # Other sessions of the same user are untouched.
+    other = await _login(client)
+    assert (await _refresh(client, other)).status_code == 200
+
+
+async def test_logout_revokes_both_tokens(client):
+    tokens = await _login(client)
+
+    response = await client.post("/logout/", json=tokens)
+    assert response.status_code == 200, response.text
+
+    assert (await _refresh(client, tokens)).status_code == 401
+    assert (await client.get("/users/me/", headers=_bearer(tokens))).status_code == 401
+
+
+async def test_unreachable_redis_is_503_and_keeps_the_session(client, monkeypatch):
+    tokens = await _login(client)
+
+    async def down(payload, fail_closed=True):
+        raise RedisConnectionError("down")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(token_revocation, "is_revoked", down)
+        response = await _refresh(client, tokens)
+    assert response.status_code == 503
+
+    assert (await _refresh(client, tokens)).status_code == 200
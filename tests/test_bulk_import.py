@@ -0,0 +1,98 @@
+import json
+
+import pytest
+from sqlalchemy import delete, select
+
+from app.database import async_engine
+from app.models import Item
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+async def _drop_imported(seeded):
+    yield
+    async with async_engine.begin() as conn:
+        await conn.execute(delete(Item).where(Item.sku.like("BULK-%")))
+
+
+def _ndjson(*records) -> bytes:
+    return "\n".join(
+        r if isinstance(r, str) else json.dumps(r) for r in records
+    ).encode()
+
+
+async def _import(client, admin, restaurant, filename: str, content: bytes):
+    response = await client.post(
+        f"/restaurants/{restaurant['id']}/items/bulk/",
+        headers=admin,
+        files={"file": (filename, content)},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_bad_rows_are_reported_not_fatal(client, admin, restaurant):
+    body = await _import(
+        client,
+        admin,
+        restaurant,
+        "items.ndjson",
+        _ndjson(
+            {"sku": "BULK-1", "name": "Imported Soup", "price_cents": 450},
+            {"sku": 123, "name": "Numeric Sku", "price_cents": -1},
+            "{not json",
+            ["a", "list"],
+            {"sku": "BULK-1", "name": "Again", "price_cents": 500},
+        ),
+    )
+    assert (body["processed"], body["inserted"], body["updated"]) == (1, 1, 0)
+    errors = {e["row"]: e for e in body["errors"]}
+    assert sorted(errors) == [2, 3, 4, 5]
+    assert errors[2]["sku"] == "123"
+    assert errors[3]["errors"] == ["invalid JSON"]
+    assert errors[4]["errors"] == ["not a JSON object"]
+    assert "duplicate sku" in errors[5]["errors"][0]
+
+    async with async_engine.connect() as conn:
+        price = await conn.scalar(
+            select(Item.price_cents).where(
+                Item.restaurant_id == restaurant["id"], Item.sku == "BULK-1"
+            )
+        )
+    assert price == 450
+
+
+async def test_unparseable_csv_row_is_a_row_error(client, admin, restaurant):
+    content = (
+        "sku,name,price_cents\n"
+        f"BULK-CSV-1,Huge,{'9' * 200_000}\n"
+        "BULK-CSV-2,Imported Salad,700\n"
+    ).encode()
+    body = await _import(client, admin, restaurant, "items.csv", content)
+    assert (body["processed"], body["inserted"], body["updated"]) == (1, 1, 0)
+    assert [(e["row"], e["sku"]) for e in body["errors"]] == [(1, None)]
+    assert body["errors"][0]["errors"][0].startswith("invalid CSV")
+
+    body = await _import(
+        client,
+        admin,
+        restaurant,
+        "items.csv",
+        b"sku,name,price_cents\nBULK-CSV-2,Salad,750\n",
+    )
+    assert (body["processed"], body["inserted"], body["updated"], body["errors"]) == (
+        1,
+        0,
+        1,
+        [],
+    )
+
+
+async def test_non_utf8_upload_is_rejected(client, admin, restaurant):
+    response = await client.post(
+        f"/restaurants/{restaurant['id']}/items/bulk/",
+        headers=admin,
+        files={"file": ("items.csv", "sku,name\nA,Caf\xe9\n".encode("latin-1"))},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,146 @@
+import uuid
+
+import pytest
+
+from app.cache import CacheInvalidations, MenuCache, PrincipalCache
+from app.models import User, UserRole
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_etag_revalidation(client, restaurant):
+    url = f"/restaurants/{restaurant['id']}/menu/"
+    first = await client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert {i["id"] for i in first.json()["items"]} == {
+        i["id"] for i in restaurant["items"]
+    }
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = await client.get(url, headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert not response.content
+
+    response = await client.get(url, headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == first.content
+
+
+async def test_update_changes_etag(client, admin, restaurant):
+    url = f"/restaurants/{restaurant['id']}/menu/"
+    etag = (await client.get(url)).headers["etag"]
+
+    response = await client.put(
+        f"/restaurants/{restaurant['id']}/",
+        headers=admin,
+        json={"name": "Renamed Kitchen"},
+    )
+    assert response.status_code == 200
+    try:
+        response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()["restaurant"]["name"] == "Renamed Kitchen"
+    finally:
+        await client.put(
+            f"/restaurants/{restaurant['id']}/",
+            headers=admin,
+            json={"name": restaurant["name"]},
+        )
+
+
+async def test_unknown_restaurant_is_404(client):
+    response = await client.get(
+        "/restaurants/00000000-0000-4000-8000-000000000000/menu/"
+    )
+    assert response.status_code == 404
+
+
+async def test_invalidation_from_another_worker():
+    cache = MenuCache(maxbytes=1 << 20, ttl=60)
+    invalidations = CacheInvalidations(redis=None)
+    invalidations.register("menu", cache.forget)
+
+    await cache.set("r1", b'{"items": []}', cache.generation)
+    generation = cache.generation
+    invalidations._apply("menu r1")
+    assert await cache.get("r1") is None
+
+    # A load that started before the invalidation must not be cached.
+    await cache.set("r1", b'{"items": ["stale"]}', generation)
+    assert await cache.get("r1") is None
+
+    await cache.set("r2", b"{}", cache.generation)
+    invalidations._apply("menu r2")
+    invalidations._apply("principal someone@example.com")
+    assert len(cache.local) == 0
+    assert invalidations.received == 2
+
+
+def test_principal_invalidation_from_another_worker():
+    cache = PrincipalCache(maxsize=10, ttl=60)
+    invalidations = CacheInvalidations(redis=None)
+    invalidations.register("principal", cache.forget)
+    cache.local.set("a@example.com", {"email": "a@example.com"})
+    cache.local.set("b@example.com", {"email": "b@example.com"})
+
+    invalidations._apply("principal a@example.com")
+    assert cache.local.get("a@example.com") is None
+    assert cache.local.get("b@example.com") is not None
+
+    # After a reconnect the listener can't tell what it missed.
+    cache.forget(None)
+    assert len(cache.local) == 0
+
+
+class RecordingRedis:
+    def __init__(self):
+        self.sets = {}
+
+    async def get(self, key):
+        return None
+
+    async def set(self, key, value, **expiry):
+        self.sets[key] = expiry
+
+
+def _user(email: str) -> User:
+    return User(
+        id=uuid.uuid4(),
+        username=email.partition("@")[0],
+        email=email,
+        role=UserRole.CUSTOMER,
+        is_active=True,
+        is_verified=True,
+        is_superuser=False,
+    )
+
+
+async def test_principal_load_racing_an_invalidation_is_not_cached():
+    redis = RecordingRedis()
+    cache = PrincipalCache(maxsize=10, ttl=60, redis=redis)
+    generation = cache.generation
+    cache.forget("a@example.com")
+
+    await cache.set(_user("a@example.com"), generation)
+    assert await cache.get("a@example.com") is None
+    assert redis.sets == {}
+
+    await cache.set(_user("a@example.com"), cache.generation)
+    assert (await cache.get("a@example.com"))["email"] == "a@example.com"
+
+
+async def test_principal_redis_expiry_survives_sub_second_ttl():
+    redis = RecordingRedis()
+    cache = PrincipalCache(maxsize=10, ttl=0.25, redis=redis)
+    await cache.set(_user("a@example.com"), cache.generation)
+    assert redis.sets == {"quickbite:principal:a@example.com": {"px": 250}}
+
+
+async def test_menu_redis_expiry_survives_sub_second_ttl():
+    redis = RecordingRedis()
+    cache = MenuCache(maxbytes=1 << 20, ttl=0.5, redis=redis)
+    await cache.set("r1", b"{}", cache.generation)
+    assert redis.sets == {"quickbite:menu:r1": {"px": 500}}
@@ -0,0 +1,75 @@
+from collections import Counter
+
+import pytest
+from conftest import SCALE, SEED
+from sqlalchemy import func, select
+
+from app.database import Base, async_engine
+from app.models import Order, User
+from benchmarks import dataset
+
+pytestmark = pytest.mark.anyio
+
+
+def _ids(rows: dict) -> dict[str, list]:
+    return {
+        model.__tablename__: [r.get("id") for r in batch]
+        for model, batch in rows.items()
+    }
+
+
+def test_generate_is_deterministic():
+    first, second = dataset.generate(3, 0.01), dataset.generate(3, 0.01)
+    assert _ids(first) == _ids(second)
+    assert [o["total_cents"] for o in first[Order]] == [
+        o["total_cents"] for o in second[Order]
+    ]
+    assert (
+        _ids(dataset.generate(4, 0.01))[Order.__tablename__]
+        != _ids(first)[Order.__tablename__]
+    )
+
+
+def test_generate_skews_orders_to_few_restaurants():
+    orders = dataset.generate(1, 0.05)[Order]
+    per_restaurant = sorted(
+        Counter(o["restaurant_id"] for o in orders).values(), reverse=True
+    )
+    assert per_restaurant[0] > 3 * per_restaurant[len(per_restaurant) // 2]
+
+
+async def test_seeded_tables_match_generated_counts(seeded):
+    assert await dataset.is_seeded(async_engine) is True
+    assert await dataset.seeded_with(async_engine) == (SEED, SCALE)
+    tables = Base.metadata.tables
+    async with async_engine.connect() as conn:
+        for table, count in seeded.items():
+            assert (
+                await conn.scalar(select(func.count()).select_from(tables[table]))
+                == count
+            )
+        superusers = await conn.scalar(
+            select(func.count()).select_from(User).where(User.is_superuser.is_(True))
+        )
+    assert superusers == 1
+
+
+async def test_order_pages_stay_within_query_budget(client, customer, admin):
+    for headers in (customer, admin):
+        seen = []
+        params = {"limit": 50}
+        while True:
+            response = await client.get("/orders/", headers=headers, params=params)
+            assert response.status_code == 200
+            page = response.json()
+            seen += [order["id"] for order in page["items"]]
+            if not page["next_cursor"] or len(seen) >= 200:
+                break
+            params["cursor"] = page["next_cursor"]
+        assert seen and len(seen) == len(set(seen))
+
+    response = await client.get(
+        "/orders/history/", headers=customer, params={"limit": 50}
+    )
+    assert response.status_code == 200
+    assert all(order["order_items"] for order in response.json()["items"])
@@ -0,0 +1,57 @@
+import uuid
+
+import pytest
+
+from app.dispatch import match
+from app.geo import haversine
+
+
+def _at(latitude: float, longitude: float):
+    return (uuid.uuid4(), latitude, longitude)
+
+
+def _east(point, meters: float):
+    """A point ``meters`` due east of ``point``, found by bisection on haversine."""
+    _, latitude, longitude = point
+    low, high = 0.0, 1.0
+    for _ in range(60):
+        mid = (low + high) / 2
+        if haversine(latitude, longitude, latitude, longitude + mid) < meters:
+            low = mid
+        else:
+            high = mid
+    return _at(latitude, longitude + low)
+
+
+def test_batch_across_cities_matches_within_each_city():
+    berlin, madrid = _at(52.52, 13.40), _at(40.42, -3.70)
+    berlin_courier, madrid_courier = _east(berlin, 1500), _east(madrid, 1500)
+    pairs = match([berlin, madrid], [madrid_courier, berlin_courier], max_distance=5000)
+    assert {(o, c) for o, c, _ in pairs} == {
+        (berlin[0], berlin_courier[0]),
+        (madrid[0], madrid_courier[0]),
+    }
+    assert all(d == pytest.approx(1500, abs=1) for _, _, d in pairs)
+
+
+def test_distances_hold_far_from_the_batch_mean_latitude():
+    # One projection around the mean (30°) stretched east-west distances at
+    # 60° by cos(30°) / cos(60°), pushing this courier out of range.
+    equator, north = _at(0.0, 10.0), _at(60.0, 10.0)
+    courier = _east(north, 4500)
+    pairs = match([equator, north], [courier], max_distance=5000)
+    assert [(o, c) for o, c, _ in pairs] == [(north[0], courier[0])]
+    assert pairs[0][2] == pytest.approx(4500, abs=1)
+
+
+def test_out_of_range_courier_is_not_matched():
+    order = _at(52.52, 13.40)
+    assert match([order], [_east(order, 5100)], max_distance=5000) == []
+
+
+def test_each_courier_goes_to_the_closest_order():
+    courier = _at(52.52, 13.40)
+    near, far = _east(courier, 100), _east(courier, 900)
+    other = _east(courier, 2000)
+    pairs = match([far, near], [courier, other], max_distance=5000)
+    assert {(o, c) for o, c, _ in pairs} == {(near[0], courier[0]), (far[0], other[0])}
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from conftest import auth
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.events import Broadcaster, MemoryBackend, RedisBackend, Subscription
+from app.routers.orders import _ws_relay
+from main import app
+
+pytestmark = pytest.mark.anyio
+
+
+class SlowBackend(MemoryBackend):
+    """Subscribing to ``slow`` hangs until released."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.calls = []
+
+    async def subscribe(self, channel: str) -> None:
+        self.calls.append(("subscribe", channel))
+        if channel == "slow":
+            await self.release.wait()
+
+    async def unsubscribe(self, channel: str) -> None:
+        self.calls.append(("unsubscribe", channel))
+
+
+async def test_a_slow_channel_does_not_block_others():
+    backend = SlowBackend()
+    broadcaster = Broadcaster(backend, queue_size=4)
+
+    async def join_slow():
+        async with broadcaster.subscribe("slow"):
+            pass
+
+    slow = asyncio.create_task(join_slow())
+    await asyncio.sleep(0)
+    async with asyncio.timeout(1):
+        async with broadcaster.subscribe("fast") as sub:
+            await broadcaster.publish("fast", {"n": 1})
+            assert json.loads(await sub.get()) == {"n": 1}
+    backend.release.set()
+    await slow
+    assert broadcaster.stats()["channels"] == 0
+
+
+async def test_backend_subscription_is_shared_and_dropped_with_the_last_listener():
+    backend = SlowBackend()
+    broadcaster = Broadcaster(backend, queue_size=4)
+    async with broadcaster.subscribe("c") as first:
+        async with broadcaster.subscribe("c") as second:
+            await broadcaster.publish("c", {"n": 1})
+            assert await first.get() == await second.get()
+        assert backend.calls == [("subscribe", "c")]
+    assert backend.calls == [("subscribe", "c"), ("unsubscribe", "c")]
+    stats = broadcaster.stats()
+    assert (stats["channels"], stats["subscribers"]) == (0, 0)
+
+
+class BrokenPubSub:
+    """Fails once with a non-Redis error, then delivers one message."""
+
+    def __init__(self):
+        self.listens = 0
+
+    async def listen(self):
+        self.listens += 1
+        if self.listens == 1:
+            raise ValueError("boom")
+        yield {"type": "message", "channel": b"c", "data": b"hello"}
+        await asyncio.Event().wait()
+
+
+async def test_reader_restarts_after_any_error():
+    backend = RedisBackend("redis://localhost:1")
+    backend.pubsub = BrokenPubSub()
+    received = asyncio.Queue()
+    backend.dispatch = lambda channel, message: received.put_nowait((channel, message))
+    task = asyncio.create_task(backend._reader())
+    try:
+        async with asyncio.timeout(5):
+            assert await received.get() == ("c", "hello")
+    finally:
+        task.cancel()
+    assert backend.pubsub.listens == 2
+
+
+QUERY_TOKEN = "?token=" + auth("admin@example.com")["Authorization"].removeprefix(
+    "Bearer "
+)
+
+
+@pytest.mark.parametrize(
+    "query, subprotocols", [("", None), ("", ["bearer"]), (QUERY_TOKEN, None)]
+)
+def test_websocket_without_a_bearer_subprotocol_is_refused(query, subprotocols):
+    with pytest.raises(WebSocketDisconnect) as refused:
+        with TestClient(app).websocket_connect(
+            f"/orders/{uuid.uuid4()}/ws{query}", subprotocols=subprotocols
+        ):
+            pass
+    assert refused.value.code == 1008
+
+
+class ChattyWebSocket:
+    """Has a client message waiting; records what the server sends."""
+
+    def __init__(self, *incoming):
+        self.incoming = asyncio.Queue()
+        for message in incoming:
+            self.incoming.put_nowait(message)
+        self.sent = []
+        self.closed = False
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def send_json(self, data):
+        self.sent.append(json.dumps(data))
+
+    async def close(self):
+        self.closed = True
+
+
+async def test_event_arriving_with_a_client_message_is_still_sent():
+    done = json.dumps({"type": "status", "order": {"status": "done"}})
+    subscription = Subscription(4)
+    subscription.push(done)
+    websocket = ChattyWebSocket({"type": "websocket.receive", "text": "hi"})
+    async with asyncio.timeout(1):
+        await _ws_relay(websocket, subscription)
+    assert websocket.sent == [done]
+    assert websocket.closed
+
+
+async def test_relay_stops_on_disconnect():
+    websocket = ChattyWebSocket({"type": "websocket.disconnect"})
+    async with asyncio.timeout(1):
+        await _ws_relay(websocket, Subscription(4))
+    assert websocket.sent == []
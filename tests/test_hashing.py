@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.hashing import PasswordHasherPool
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def pool():
+    pool = PasswordHasherPool(workers=1, max_waiting=0, queue_timeout=0.1)
+    await pool.start()
+    yield pool
+    pool.shutdown()
+
+
+async def test_cancelled_caller_keeps_the_slot_until_the_worker_is_done(pool):
+    caller = asyncio.create_task(pool.run(time.sleep, 0.5))
+    await asyncio.sleep(0.1)
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+
+    assert pool.in_flight == 1
+    with pytest.raises(HTTPException) as busy:
+        await pool.run(time.sleep, 0)
+    assert busy.value.status_code == 503
+
+    async with asyncio.timeout(5):
+        while pool.in_flight:
+            await asyncio.sleep(0.05)
+    assert pool.completed == 1
+    assert await pool.run(abs, -3) == 3
@@ -0,0 +1,122 @@
+import socket
+import time
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.mailer import Mailer, RateLimiter, SMTPPool
+
+
+class _Recorder:
+    """Accepts every message and remembers which session carried it."""
+
+    def __init__(self):
+        self.deliveries: list[tuple[tuple, str]] = []
+        self.drop_on: set[str] = set()
+        self.server = None
+
+    async def handle_DATA(self, server, session, envelope):  # noqa: N802 (aiosmtpd hook)
+        to = envelope.rcpt_tos[0]
+        if to in self.drop_on:
+            self.drop_on.discard(to)
+            server.transport.close()
+            return "421 dropped"
+        self.deliveries.append((session.peer, to))
+        self.server = server
+        return "250 OK"
+
+    @property
+    def sessions(self) -> set[tuple]:
+        return {peer for peer, _ in self.deliveries}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtpd():
+    handler = _Recorder()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    yield controller
+    controller.stop()
+
+
+def _pool(smtpd, **overrides) -> SMTPPool:
+    options = dict(
+        host=smtpd.hostname,
+        port=smtpd.port,
+        username=None,
+        password=None,
+        starttls=False,
+        timeout=5,
+        size=1,
+        max_messages=100,
+        idle_check=30,
+    )
+    return SMTPPool(**(options | overrides))
+
+
+def _messages(*names: str) -> list[dict]:
+    return [
+        {"to_email": f"{name}@example.com", "subject": "Hi", "body": "Hello"}
+        for name in names
+    ]
+
+
+def test_messages_share_one_session_until_max_messages(smtpd):
+    pool = _pool(smtpd, max_messages=3)
+    mailer = Mailer(pool, RateLimiter(rate=1e9))
+
+    report = mailer.deliver(_messages("a", "b", "c", "d", "e"))
+    assert report == {"sent": 5, "failed": [], "retry": []}
+    # Three on the first session, which is then retired; two on a second.
+    assert len(smtpd.handler.sessions) == 2
+
+    # The second session went back to the pool and carries the next call.
+    mailer.deliver(_messages("f"))
+    assert len(smtpd.handler.sessions) == 2
+    pool.close()
+
+
+def test_dropped_connection_leaves_the_rest_for_retry(smtpd):
+    pool = _pool(smtpd)
+    mailer = Mailer(pool, RateLimiter(rate=1e9))
+    smtpd.handler.drop_on.add("b@example.com")
+
+    report = mailer.deliver(_messages("a", "b", "c"))
+    assert report["sent"] == 1
+    assert report["failed"] == []
+    assert [m["to_email"] for m in report["retry"]] == [
+        "b@example.com",
+        "c@example.com",
+    ]
+    # The broken session was discarded rather than returned to the pool.
+    assert pool._idle == []
+
+    retried = mailer.deliver(report["retry"])
+    assert retried == {"sent": 2, "failed": [], "retry": []}
+    assert [to for _, to in smtpd.handler.deliveries] == [
+        "a@example.com",
+        "b@example.com",
+        "c@example.com",
+    ]
+    assert len(smtpd.handler.sessions) == 2
+    pool.close()
+
+
+def test_stale_idle_session_is_replaced_before_use(smtpd):
+    pool = _pool(smtpd, idle_check=0)
+    mailer = Mailer(pool, RateLimiter(rate=1e9))
+    mailer.deliver(_messages("a"))
+
+    # The server hangs up on the idle session; the NOOP check catches it.
+    smtpd.loop.call_soon_threadsafe(smtpd.handler.server.transport.close)
+    time.sleep(0.1)
+
+    assert mailer.deliver(_messages("b")) == {"sent": 1, "failed": [], "retry": []}
+    assert len(smtpd.handler.sessions) == 2
+    pool.close()
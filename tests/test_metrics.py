@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.database import async_engine
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_failed_statements_do_not_leak_start_times(seeded):
+    async with async_engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(DBAPIError):
+                await conn.execute(text("SELECT 1 / 0"))
+            await conn.rollback()
+        await conn.execute(text("SELECT 1"))
+        info = conn.sync_connection.info
+        assert info.get("query_start") == []
+        assert info.get("profile_start") == []
+
+
+async def test_metrics_endpoint_is_served(client):
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert "text/plain" in response.headers["content-type"]
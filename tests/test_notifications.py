@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.notifications import FileBackend, NotificationSink
+
+pytestmark = pytest.mark.anyio
+
+
+def _sink(path, batch_size: int, flush_interval: float) -> NotificationSink:
+    backend = FileBackend(str(path), max_bytes=0, backups=0)
+    return NotificationSink(
+        backend, queue_size=100, batch_size=batch_size, flush_interval=flush_interval
+    )
+
+
+async def _until(condition, timeout: float = 5) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+async def test_full_batch_is_flushed_without_waiting_for_the_interval(tmp_path):
+    path = tmp_path / "notifications.log"
+    sink = _sink(path, batch_size=3, flush_interval=1)
+    sink.start()
+    for n in range(3):
+        sink.notify(f"user{n}@example.com", "order ready")
+
+    await _until(lambda: sink.written == 3, timeout=0.5)
+    assert sink.flushes == 1
+    assert path.read_text().splitlines() == [
+        f"Notification for user{n}@example.com: order ready" for n in range(3)
+    ]
+    await sink.stop()
+
+
+async def test_partial_batch_is_flushed_after_the_interval(tmp_path):
+    path = tmp_path / "notifications.log"
+    sink = _sink(path, batch_size=100, flush_interval=0.05)
+    sink.start()
+    sink.notify("a@example.com", "hi")
+
+    await _until(lambda: sink.written == 1)
+    assert sink.flushes == 1
+    assert path.read_text() == "Notification for a@example.com: hi\n"
+    await sink.stop()
+
+
+async def test_stop_drains_the_queue_and_closes_the_file(tmp_path):
+    path = tmp_path / "notifications.log"
+    sink = _sink(path, batch_size=2, flush_interval=60)
+    sink.start()
+    for n in range(5):
+        sink.notify(f"user{n}@example.com")
+
+    await sink.stop()
+    assert sink.stats() | {"backend": None} == {
+        "backend": None,
+        "pending": 0,
+        "queued": 5,
+        "written": 5,
+        "dropped": 0,
+        "lost": 0,
+        "flushes": 3,
+        "errors": 0,
+    }
+    assert len(path.read_text().splitlines()) == 5
+    assert sink.backend._file is None
+
+
+async def test_file_is_rotated_once_it_reaches_max_bytes(tmp_path):
+    path = tmp_path / "notifications.log"
+    backend = FileBackend(str(path), max_bytes=10, backups=1)
+
+    await backend.write([{"email": "a@example.com", "message": "first"}])
+    await backend.write([{"email": "b@example.com", "message": "second"}])
+    await backend.close()
+
+    assert backend.rotations == 2
+    assert path.read_text() == ""
+    assert (tmp_path / "notifications.log.1").read_text() == (
+        "Notification for b@example.com: second\n"
+    )
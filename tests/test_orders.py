@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import delete, func, select, update
+
+from app.database import async_engine
+from app.models import Item, Order, OrderItem
+from app.routers import orders
+from app.routers.orders import EXPORT_COLUMNS, ORDER_MAX_TOTAL_CENTS
+
+pytestmark = pytest.mark.anyio
+
+
+def _order(restaurant, *lines) -> dict:
+    return {
+        "restaurant_id": restaurant["id"],
+        "delivery_address": "1 Test Road",
+        "items": [
+            {"item_id": item_id, "quantity": quantity} for item_id, quantity in lines
+        ],
+    }
+
+
+async def test_create_order_totals_its_lines(client, customer, restaurant):
+    first, *rest = restaurant["items"]
+    lines = [(first["id"], 2), (first["id"], 1)] + [(i["id"], 1) for i in rest[:1]]
+    response = await client.post(
+        "/orders/", headers=customer, json=_order(restaurant, *lines)
+    )
+    assert response.status_code == 200, response.text
+    order = response.json()
+    try:
+        expected = 3 * first["price_cents"] + sum(i["price_cents"] for i in rest[:1])
+        assert order["total_cents"] == expected
+        assert order["status"] == "placed"
+    finally:
+        async with async_engine.begin() as conn:
+            await conn.execute(
+                delete(OrderItem).where(OrderItem.order_id == order["id"])
+            )
+            await conn.execute(delete(Order).where(Order.id == order["id"]))
+
+
+@pytest.mark.parametrize("quantity", [0, 100])
+async def test_quantity_out_of_range_is_422(client, customer, restaurant, quantity):
+    item = restaurant["items"][0]
+    response = await client.post(
+        "/orders/", headers=customer, json=_order(restaurant, (item["id"], quantity))
+    )
+    assert response.status_code == 422
+
+
+async def test_too_many_lines_is_422(client, customer, restaurant):
+    item = restaurant["items"][0]
+    lines = [(item["id"], 1)] * 101
+    response = await client.post(
+        "/orders/", headers=customer, json=_order(restaurant, *lines)
+    )
+    assert response.status_code == 422
+
+
+async def test_total_overflowing_the_column_is_422(client, customer, restaurant):
+    item = restaurant["items"][0]
+    async with async_engine.begin() as conn:
+        await conn.execute(
+            update(Item)
+            .where(Item.id == item["id"])
+            .values(price_cents=ORDER_MAX_TOTAL_CENTS)
+        )
+    try:
+        response = await client.post(
+            "/orders/", headers=customer, json=_order(restaurant, (item["id"], 2))
+        )
+        assert response.status_code == 422
+        assert "may not exceed" in response.json()["detail"]
+    finally:
+        async with async_engine.begin() as conn:
+            await conn.execute(
+                update(Item)
+                .where(Item.id == item["id"])
+                .values(price_cents=item["price_cents"])
+            )
+
+
+async def _order_count(restaurant_id) -> int:
+    async with async_engine.connect() as conn:
+        return await conn.scalar(
+            select(func.count())
+            .select_from(Order)
+            .where(Order.restaurant_id == restaurant_id)
+        )
+
+
+async def test_export_ndjson_has_one_line_per_order(client, admin, restaurant):
+    response = await client.get(
+        "/orders/export/", headers=admin, params={"restaurant_id": restaurant["id"]}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == await _order_count(restaurant["id"])
+    assert {row["restaurant_id"] for row in rows} == {restaurant["id"]}
+    assert [(r["created_at"], r["id"]) for r in rows] == sorted(
+        (r["created_at"], r["id"]) for r in rows
+    )
+
+
+async def test_export_csv_starts_with_a_header(client, admin, restaurant):
+    response = await client.get(
+        "/orders/export/",
+        headers=admin,
+        params={"restaurant_id": restaurant["id"], "format": "csv"},
+    )
+    assert response.status_code == 200
+    header, *rows = csv.reader(io.StringIO(response.text))
+    assert header == [column.key for column in EXPORT_COLUMNS]
+    assert len(rows) == await _order_count(restaurant["id"])
+
+
+async def test_export_is_streamed_in_batches(seeded, restaurant, monkeypatch):
+    monkeypatch.setattr(orders, "EXPORT_BATCH_SIZE", 2)
+    query = (
+        select(*EXPORT_COLUMNS)
+        .where(Order.restaurant_id == restaurant["id"])
+        .order_by(Order.created_at, Order.id)
+    )
+    chunks = [chunk async for chunk in orders._export_rows(query, "ndjson")]
+    count = await _order_count(restaurant["id"])
+    assert count > 2
+    assert len(chunks) == -(-count // 2)
+    assert all(chunk.count("\n") <= 2 for chunk in chunks)
+
+
+async def test_export_is_for_superusers_only(client, customer):
+    response = await client.get("/orders/export/", headers=customer)
+    assert response.status_code == 403
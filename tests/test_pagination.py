@@ -0,0 +1,66 @@
+import pytest
+from fastapi import HTTPException
+
+from app import utils
+from app.dependencies import Pagination
+from app.models import Item
+from app.utils import decode_cursor, encode_cursor
+
+pytestmark = pytest.mark.anyio
+
+SORTABLE = {"id": Item.id, "name": Item.name}
+
+
+def _cursor(**overrides) -> str:
+    return encode_cursor({"s": "id", "o": "asc", "d": "next", "v": [1]} | overrides)
+
+
+def test_cursor_round_trips():
+    assert decode_cursor(_cursor()) == {"s": "id", "o": "asc", "d": "next", "v": [1]}
+
+
+def test_tampered_cursors_are_rejected():
+    payload, signature = _cursor().split(".")
+    other_payload, _ = _cursor(v=[2]).split(".")
+    flipped = signature[:-1] + ("A" if signature[-1] != "A" else "B")
+
+    assert decode_cursor(f"{other_payload}.{signature}") is None
+    assert decode_cursor(f"{payload}.{flipped}") is None
+    assert decode_cursor(payload) is None
+    assert decode_cursor("not a cursor") is None
+    assert decode_cursor("") is None
+
+
+def test_cursor_signed_with_a_rotated_key_is_rejected(monkeypatch):
+    old = _cursor()
+    monkeypatch.setattr(utils, "SECRET_KEY", "rotated-secret-key")
+    assert decode_cursor(old) is None
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        _cursor()[:-2],
+        _cursor(s="name"),
+        _cursor(o="desc"),
+    ],
+    ids=["tampered", "other-sort", "other-order"],
+)
+async def test_paginate_refuses_bad_cursors_before_querying(cursor):
+    pagination = Pagination(cursor=cursor, limit=20, sort_by="id", sort_order="asc")
+    with pytest.raises(HTTPException) as error:
+        # No session: the cursor is refused before any query runs.
+        await pagination.paginate(None, None, SORTABLE)
+    assert error.value.status_code == 400
+    assert error.value.detail == "Invalid cursor"
+
+
+async def test_api_answers_a_forged_cursor_with_400(client):
+    page = (await client.get("/items/", params={"limit": 1})).json()
+    signature = page["next_cursor"].split(".")[1]
+    forged = _cursor(v=["00000000-0000-0000-0000-000000000000"]).split(".")[0]
+
+    response = await client.get(
+        "/items/", params={"limit": 1, "cursor": f"{forged}.{signature}"}
+    )
+    assert response.status_code == 400
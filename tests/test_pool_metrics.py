@@ -0,0 +1,52 @@
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy import exc
+
+from app.pool_metrics import InstrumentedQueuePool, pool_status
+
+
+def _pool(timeout: float = 5) -> InstrumentedQueuePool:
+    return InstrumentedQueuePool(
+        lambda: sqlite3.connect(":memory:"),
+        pool_size=1,
+        max_overflow=0,
+        timeout=timeout,
+    )
+
+
+def test_waiting_for_a_connection_is_timed():
+    pool = _pool()
+    held = pool.connect()
+    threading.Timer(0.2, held.close).start()
+    pool.connect().close()
+
+    status = pool_status(pool)
+    assert status["checkouts"] == 2
+    assert status["timeouts"] == 0
+    assert status["wait_seconds_max"] >= 0.15
+    assert status["wait_seconds_avg"] == status["wait_seconds_total"] / 2
+    assert status["checked_out"] == 0
+
+
+def test_checkout_timeouts_are_counted():
+    pool = _pool(timeout=0.05)
+    held = pool.connect()
+    with pytest.raises(exc.TimeoutError):
+        pool.connect()
+    held.close()
+
+    assert pool.stats.snapshot()["timeouts"] == 1
+    assert pool.stats.snapshot()["checkouts"] == 1
+
+
+def test_counters_survive_recreate():
+    pool = _pool()
+    pool.connect().close()
+
+    recreated = pool.recreate()
+    recreated.connect().close()
+
+    assert recreated.stats is pool.stats
+    assert pool.stats.snapshot()["checkouts"] == 2
@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import select
+
+from app import profiling
+from app.database import async_engine
+
+pytestmark = pytest.mark.anyio
+
+
+def test_strict_mode_is_on():
+    # The rest of the suite relies on budget overruns raising.
+    assert profiling.QUERY_PROFILING_STRICT
+
+
+def test_normalize_folds_literals_and_in_lists():
+    assert profiling.normalize(
+        "SELECT * FROM items WHERE id IN ($1, $2, $3) AND price_cents > 100"
+    ) == profiling.normalize(
+        "SELECT * FROM items WHERE id IN ($1, $2) AND price_cents > 5"
+    )
+
+
+async def test_query_over_budget_raises(seeded):
+    profile = profiling.RequestProfile({"method": "GET", "path": "/test/"})
+    profile.budget = 2
+    token = profiling.current_profile.set(profile)
+    try:
+        async with async_engine.connect() as conn:
+            for _ in range(2):
+                await conn.execute(select(1))
+            with pytest.raises(
+                profiling.QueryBudgetExceededError, match="ran 3 queries, budget is 2"
+            ):
+                await conn.execute(select(1))
+    finally:
+        profiling.current_profile.reset(token)
+    assert profile.statements == {"SELECT ?": 3}
+
+
+async def test_budget_applies_per_request(client, customer):
+    # GET /orders/ declares query_budget(2): the principal and the page.
+    for _ in range(3):
+        response = await client.get("/orders/", headers=customer)
+        assert response.status_code == 200
@@ -0,0 +1,29 @@
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import async_engine
+from app.replicas import ReplicaSet
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_choose_uses_the_last_background_check(seeded):
+    down = create_async_engine("postgresql+asyncpg://nobody@127.0.0.1:1/nothing")
+    replicas = ReplicaSet(
+        [async_engine, down], max_lag_seconds=5, check_interval=3600, check_timeout=2
+    )
+    await replicas.start()
+    try:
+        assert [r["healthy"] for r in replicas.status()] == [True, False]
+        assert {replicas.choose() for _ in range(4)} == {async_engine}
+
+        # Nothing is re-checked on the request path until the task runs again.
+        replicas.replicas[0].healthy = False
+        assert replicas.choose() is None
+    finally:
+        await replicas.stop()
+        await down.dispose()
+
+
+def test_no_replicas_means_the_primary():
+    assert ReplicaSet([], max_lag_seconds=5, check_interval=10).choose() is None
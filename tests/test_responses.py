@@ -0,0 +1,31 @@
+import fastapi
+import pytest
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse
+
+from app.responses import ORJSONResponse, native_json
+from main import app
+
+
+@pytest.mark.parametrize(
+    "version, native",
+    [
+        ("0.116.1", False),
+        ("0.129.2", False),
+        ("0.130.0", True),
+        ("0.143.0", True),
+        ("1.0", True),
+    ],
+)
+def test_native_json_starts_at_0_130(version, native):
+    assert native_json(version) is native
+
+
+def test_default_response_class_follows_the_installed_fastapi():
+    active = app.router.default_response_class
+    if native_json(fastapi.__version__):
+        # Left as the default, so FastAPI keeps its pydantic-core fast path.
+        assert isinstance(active, DefaultPlaceholder)
+        assert active.value is JSONResponse
+    else:
+        assert active is ORJSONResponse
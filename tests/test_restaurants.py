@@ -0,0 +1,41 @@
+import pytest
+
+from app.geo import haversine
+from app.seed import CENTER
+
+pytestmark = pytest.mark.anyio
+
+LAT, LON = CENTER
+RADIUS = 20_000
+
+
+async def _nearby(client, **params) -> dict:
+    response = await client.get(
+        "/restaurants/nearby/", params={"lat": LAT, "lon": LON} | params
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_nearby_is_nearest_first_within_the_radius(client):
+    page = await _nearby(client, radius=RADIUS, limit=100)
+    distances = [r["distance"] for r in page["items"]]
+
+    assert len(distances) > 1
+    assert distances == sorted(distances)
+    assert distances[-1] <= RADIUS
+    for restaurant in page["items"]:
+        expected = haversine(LAT, LON, restaurant["latitude"], restaurant["longitude"])
+        assert restaurant["distance"] == pytest.approx(expected, rel=0.01)
+
+
+async def test_nearby_pages_continue_the_ordering(client):
+    everything = await _nearby(client, radius=RADIUS, limit=100)
+    first = await _nearby(client, radius=RADIUS, limit=3)
+    second = await _nearby(client, radius=RADIUS, limit=3, cursor=first["next_cursor"])
+
+    ids = [r["id"] for r in everything["items"]]
+    assert len(ids) > 6
+    assert [r["id"] for r in first["items"] + second["items"]] == ids[:6]
+    back = await _nearby(client, radius=RADIUS, limit=3, cursor=second["prev_cursor"])
+    assert back["items"] == first["items"]
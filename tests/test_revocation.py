@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.revocation import TokenRevocation
+
+pytestmark = pytest.mark.anyio
+
+
+def _revocation(redis=None, cutoff_ttl=60.0) -> TokenRevocation:
+    return TokenRevocation(
+        redis, capacity=8, error_rate=0.01, sync_interval=60, cutoff_ttl=cutoff_ttl
+    )
+
+
+async def test_in_process_denylist_drops_expired_ids():
+    revocation = _revocation()
+    for n in range(7):
+        assert await revocation.revoke(f"short-{n}", time.time() + 0.05)
+    await asyncio.sleep(0.1)
+    assert await revocation.revoke("long", time.time() + 60)
+
+    assert list(revocation._revoked) == ["long"]
+    assert await revocation.is_revoked({"jti": "long"})
+    assert not await revocation.is_revoked({"jti": "short-0"})
+    assert not await revocation.revoke("long", time.time() + 60)
+
+
+async def test_in_process_cutoffs_drop_once_their_tokens_expired():
+    revocation = _revocation(cutoff_ttl=0.05)
+    for n in range(7):
+        await revocation.revoke_user(f"user{n}@example.com")
+    await asyncio.sleep(0.1)
+    await revocation.revoke_user("last@example.com")
+
+    assert list(revocation._cutoffs) == ["last@example.com"]
+    assert await revocation.is_revoked(
+        {"email": "last@example.com", "iat": time.time() - 1}
+    )
+
+
+class DownRedis:
+    async def zmscore(self, key, members):
+        raise RedisConnectionError("down")
+
+
+async def test_redis_errors_fail_closed_unless_asked_not_to():
+    revocation = _revocation(redis=DownRedis())
+    revocation._note_token("jti-1")
+    payload = {"jti": "jti-1"}
+
+    assert await revocation.is_revoked(payload)
+    with pytest.raises(RedisConnectionError):
+        await revocation.is_revoked(payload, fail_closed=False)
+    assert revocation.errors == 2
@@ -0,0 +1,27 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_search_returns_restaurants_with_location(client, restaurant):
+    response = await client.get("/search/", params={"q": restaurant["name"]})
+    assert response.status_code == 200
+    found = {r["id"]: r for r in response.json()["restaurants"]}
+    assert restaurant["id"] in found
+    hit = found[restaurant["id"]]
+    assert hit["name"] == restaurant["name"]
+    assert -90 <= hit["latitude"] <= 90 and -180 <= hit["longitude"] <= 180
+    ranks = [r["rank"] for r in response.json()["restaurants"]]
+    assert ranks == sorted(ranks, reverse=True)
+
+
+async def test_search_within_a_restaurant_skips_restaurants(client, restaurant):
+    item = restaurant["items"][0]
+    response = await client.get(
+        "/search/", params={"q": item["name"], "restaurant_id": restaurant["id"]}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["restaurants"] == []
+    assert item["id"] in {i["id"] for i in body["items"]}
+    assert {i["restaurant_id"] for i in body["items"]} == {restaurant["id"]}
@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+from app import seed
+
+
+def test_zipf_weights_are_probabilities_skewed_to_the_top():
+    weights = seed.zipf_weights(100, seed.RESTAURANT_SKEW)
+    assert weights.sum() == pytest.approx(1)
+    assert np.all(np.diff(weights) < 0)
+
+
+@pytest.mark.parametrize("couriers", ["0", "-1"])
+def test_seed_needs_a_courier(monkeypatch, capsys, couriers):
+    monkeypatch.setattr("sys.argv", ["seed", "--users", "10", "--couriers", couriers])
+    with pytest.raises(SystemExit) as exit_:
+        seed.main()
+    assert exit_.value.code == 2
+    assert "--couriers must be at least 1" in capsys.readouterr().err